@@ -1,30 +1,53 @@
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
-from flask import send_from_directory
+from werkzeug.utils import safe_join
 import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from http_cache import send_cached_file
+
+IMG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+IMAGE_MAX_AGE = 3600
+
 app = Flask(__name__)
 CORS(app)
 
 try:
     from protein_analysis_api import (
         upload_protein_data, 
+        upload_protein_batch,
         get_protein_data, 
         get_analysis_chart, 
         protein_chat,
         get_correlation_analysis,
-        get_fitting_results
+        get_fitting_results,
+        list_protein_datasets,
+        delete_protein_dataset,
+        append_protein_dataset,
+        get_expression_kinetics,
+        get_upload_progress,
+        get_cache_stats,
+        get_chart_data,
+        get_correlation_matrix
     )
 
     app.add_url_rule('/api/protein-upload', 'protein_upload', upload_protein_data, methods=['POST'])
+    app.add_url_rule('/api/protein-upload-batch', 'protein_upload_batch', upload_protein_batch, methods=['POST'])
     app.add_url_rule('/api/protein-data', 'protein_data', get_protein_data, methods=['GET'])
     app.add_url_rule('/api/protein-analysis-chart', 'protein_chart', get_analysis_chart, methods=['GET'])
+    app.add_url_rule('/api/protein-chart-data', 'protein_chart_data', get_chart_data, methods=['GET'])
     app.add_url_rule('/api/protein-chat', 'protein_chat_route', protein_chat, methods=['POST'])
     app.add_url_rule('/api/protein-correlation', 'protein_correlation', get_correlation_analysis, methods=['GET'])
+    app.add_url_rule('/api/protein-correlation-matrix', 'protein_correlation_matrix', get_correlation_matrix, methods=['GET'])
     app.add_url_rule('/api/protein-fitting', 'protein_fitting', get_fitting_results, methods=['GET'])
+    app.add_url_rule('/api/protein-upload/progress/<upload_id>', 'protein_upload_progress', get_upload_progress, methods=['GET'])
+    app.add_url_rule('/api/protein-cache/stats', 'protein_cache_stats', get_cache_stats, methods=['GET'])
+    app.add_url_rule('/api/protein-datasets', 'protein_datasets', list_protein_datasets, methods=['GET'])
+    app.add_url_rule('/api/protein-datasets/<dataset_id>', 'protein_dataset_delete', delete_protein_dataset, methods=['DELETE'])
+    app.add_url_rule('/api/protein-kinetics', 'protein_kinetics', get_expression_kinetics, methods=['GET'])
+    app.add_url_rule('/api/protein-datasets/<dataset_id>/append', 'protein_dataset_append', append_protein_dataset, methods=['POST'])
     
 except ImportError as e:
     print(f"Warning: Could not import protein analysis functions: {e}")
@@ -33,6 +56,10 @@ except ImportError as e:
     def protein_upload_fallback():
         return jsonify({'error': 'protein'}), 500
     
+    @app.route('/api/protein-upload-batch', methods=['POST'])
+    def protein_upload_batch_fallback():
+        return jsonify({'error': 'protein'}), 500
+    
     @app.route('/api/protein-data', methods=['GET'])
     def protein_data_fallback():
         return jsonify([])
@@ -41,6 +68,10 @@ except ImportError as e:
     def protein_chart_fallback():
         return jsonify({'error': 'graph'}), 500
     
+    @app.route('/api/protein-chart-data', methods=['GET'])
+    def protein_chart_data_fallback():
+        return jsonify({'error': 'chart-data'}), 500
+    
     @app.route('/api/protein-chat', methods=['POST'])
     def protein_chat_fallback():
         return jsonify({'reply': 'chat'})
@@ -49,9 +80,25 @@ except ImportError as e:
     def protein_correlation_fallback():
         return jsonify({'error': 'correlation-analysis'}), 500
     
+    @app.route('/api/protein-correlation-matrix', methods=['GET'])
+    def protein_correlation_matrix_fallback():
+        return jsonify({'error': 'correlation-matrix'}), 500
+    
     @app.route('/api/protein-fitting', methods=['GET'])
     def protein_fitting_fallback():
         return jsonify({'error': 'fitting-analysis'}), 500
+    
+    @app.route('/api/protein-kinetics', methods=['GET'])
+    def protein_kinetics_fallback():
+        return jsonify({'error': 'kinetics'}), 500
+    
+    @app.route('/api/protein-datasets', methods=['GET'])
+    def protein_datasets_fallback():
+        return jsonify([])
+    
+    @app.route('/api/protein-datasets/<dataset_id>/append', methods=['POST'])
+    def protein_dataset_append_fallback(dataset_id):
+        return jsonify({'error': 'append'}), 500
 
 @app.route('/api/hello')
 def hello():
@@ -59,7 +106,7 @@ def hello():
 
 @app.route('/api/image')
 def get_image():
-    return send_from_directory('images', 'ZJU1.png')
+    return send_cached_file(os.path.join(IMG_DIR, 'ZJU1.png'), max_age=IMAGE_MAX_AGE)
 
 @app.route('/api/images')
 def get_images():
@@ -67,7 +114,10 @@ def get_images():
 
 @app.route('/api/image/<filename>')
 def get_specific_image(filename):
-    return send_from_directory('images', filename)
+    filepath = safe_join(IMG_DIR, filename)
+    if filepath is None or not os.path.isfile(filepath):
+        return 'File not found', 404
+    return send_cached_file(filepath, max_age=IMAGE_MAX_AGE)
 
 if __name__ == '__main__':
     app.run(port=5030)
@@ -1,16 +1,19 @@
 from flask import Flask, request, jsonify, Response
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
-from ultralytics import YOLO
 import cv2
 import numpy as np
-import base64
 import json
-import threading
 import time
 from datetime import datetime
-import queue
 import logging
+import os
+from detection_metrics import PROMETHEUS_CONTENT_TYPE, DetectionMetrics
+from detection_pipeline import (TARGET_FPS, DetectionDelta, DetectionPipeline, FrameDetector, camera_ids_from,
+                                target_fps_from)
+from detection_statistics import DetectionStatistics
+from model_backends import load_model
+from object_tracker import TRACKER_DETECT_INTERVAL, TRACKER_LOW_THRESHOLD, ObjectTracker, detect_interval_from
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,162 +23,174 @@ app.config['SECRET_KEY'] = 'yolo_detection_secret'
 CORS(app, origins=["http://localhost:3000"])
 socketio = SocketIO(app, cors_allowed_origins="http://localhost:3000")
 
+ALL_CAMERAS_ROOM = 'cameras'
+CONFIDENCE_THRESHOLD = 0.2
+STATS_INTERVAL = float(os.environ.get('DETECTION_STATS_INTERVAL', 1.0))
+
+def camera_room(camera_id):
+    return f'camera-{camera_id}'
+
 class YOLODetectionService:
-    def __init__(self, model_path=r".\best.pt"):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path=r".\best.pt", stats_interval=STATS_INTERVAL):
+        self.model = load_model(model_path)
+        self.stats_interval = stats_interval
+        self.last_stats_emit = 0
+        self.deltas = {}
+        self.sequence = 0
         self.is_running = False
-        self.camera = None
-        self.detection_thread = None
-        self.detection_results = queue.Queue(maxsize=100)
-        self.statistics = {
-            'total_detections': 0,
-            'plastic_types': {},
-            'detection_confidence_avg': 0.0,
-            'session_start_time': None
-        }
+        self.cameras = {}
+        self.camera_ids = [0]
+        self.pipeline = None
+        self.metrics = DetectionMetrics()
+        self.detector = FrameDetector(self.model, CONFIDENCE_THRESHOLD, self.update_statistics, self.metrics,
+                                      jpeg_quality=85)
+        self.statistics = DetectionStatistics()
+        self.camera_statistics = {}
         
     def start_camera(self, camera_id=0):
+        camera = None
         try:
-            self.camera = cv2.VideoCapture(camera_id)
-            if not self.camera.isOpened():
+            camera = cv2.VideoCapture(camera_id)
+            if not camera.isOpened():
                 raise Exception(f"{camera_id} fail")
             
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera.set(cv2.CAP_PROP_FPS, 30)
+            camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            camera.set(cv2.CAP_PROP_FPS, 30)
             
+            self.cameras[camera_id] = camera
             logger.info(f"{camera_id} success")
             return True
         except Exception as e:
             logger.error(f"fail: {e}")
+            if camera:
+                camera.release()
             return False
     
     def stop_camera(self):
-        if self.camera:
-            self.camera.release()
-            self.camera = None
+        for camera in self.cameras.values():
+            camera.release()
+        if self.cameras:
             logger.info("stopped")
+        self.cameras = {}
     
-    def detect_frame(self, frame):
-        try:
-            results = self.model.predict(frame, conf=0.2, verbose=False)
-            detections = []
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = float(box.conf[0].cpu().numpy())
-                        class_id = int(box.cls[0].cpu().numpy())
-                        class_name = self.model.names[class_id]
-                        
-                        detection = {
-                            'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                            'confidence': confidence,
-                            'class_id': class_id,
-                            'class_name': class_name,
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        detections.append(detection)
-                        
-                        self.update_statistics(class_name, confidence)
-            
-            annotated_frame = results[0].plot() if results else frame
-            
-            return annotated_frame, detections
-            
-        except Exception as e:
-            logger.error(f"检测错误: {e}")
-            return frame, []
-    
-    def update_statistics(self, class_name, confidence):
-        self.statistics['total_detections'] += 1
+    def update_statistics(self, detections, camera_id=None):
+        if not len(detections):
+            return
         
-        if class_name not in self.statistics['plastic_types']:
-            self.statistics['plastic_types'][class_name] = 0
-        self.statistics['plastic_types'][class_name] += 1
-        
-        total = self.statistics['total_detections']
-        current_avg = self.statistics['detection_confidence_avg']
-        self.statistics['detection_confidence_avg'] = (current_avg * (total - 1) + confidence) / total
+        self.statistics.record(detections, self.model.names)
+        if camera_id in self.camera_statistics:
+            self.camera_statistics[camera_id].record(detections, self.model.names)
     
-    def start_detection(self):
+    def start_detection(self, camera_ids=None, annotate=False, target_fps=TARGET_FPS, motion_gate=True,
+                        tracking=True, detect_interval=TRACKER_DETECT_INTERVAL):
         if self.is_running:
             return False
-            
-        if not self.start_camera():
-            return False
+        
+        for camera_id in camera_ids or self.camera_ids:
+            if not self.start_camera(camera_id):
+                self.stop_camera()
+                return False
             
         self.is_running = True
-        self.statistics['session_start_time'] = datetime.now().isoformat()
-        self.detection_thread = threading.Thread(target=self._detection_loop)
-        self.detection_thread.daemon = True
-        self.detection_thread.start()
+        self.camera_ids = list(self.cameras)
+        session_start_time = datetime.now().isoformat()
+        self.statistics.reset(session_start_time)
+        self.camera_statistics = {camera_id: DetectionStatistics(session_start_time) for camera_id in self.cameras}
+        trackers = {camera_id: ObjectTracker(detect_interval, high_threshold=CONFIDENCE_THRESHOLD)
+                    for camera_id in self.cameras} if tracking else {}
+        self.detector.reset(annotate, motion_gate, trackers, low_threshold=TRACKER_LOW_THRESHOLD)
+        self.deltas = {camera_id: DetectionDelta() for camera_id in self.cameras}
+        # camera reads, inference and encode/emit each get a thread; stale frames are dropped between them
+        sources = {camera_id: self.frame_reader(camera_id) for camera_id in self.cameras}
+        self.pipeline = DetectionPipeline(sources, self.detector.detect, self.encode_frame, self.emit_frame, target_fps=target_fps,
+                                          metrics=self.metrics)
+        self.pipeline.start()
         
         logger.info("testing activated")
         return True
     
     def stop_detection(self):
         self.is_running = False
-        if self.detection_thread:
-            self.detection_thread.join()
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
         self.stop_camera()
         logger.info("testing stopped")
     
-    def _detection_loop(self):
-        frame_count = 0
-        fps_start_time = time.time()
+    def frame_reader(self, camera_id):
+        camera = self.cameras[camera_id]
         
-        while self.is_running:
-            try:
-                ret, frame = self.camera.read()
-                if not ret:
-                    logger.warning("unable to catch")
-                    continue
-                
-                annotated_frame, detections = self.detect_frame(frame)
-                
-                _, buffer = cv2.imencode('.jpg', annotated_frame, 
-                                       [cv2.IMWRITE_JPEG_QUALITY, 85])
-                frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                frame_count += 1
-                if frame_count % 30 == 0:
-                    elapsed = time.time() - fps_start_time
-                    fps = 30 / elapsed if elapsed > 0 else 0
-                    fps_start_time = time.time()
-                else:
-                    fps = 0
-                
-                detection_data = {
-                    'frame': frame_base64,
-                    'detections': detections,
-                    'statistics': self.statistics.copy(),
-                    'fps': fps,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                socketio.emit('detection_update', detection_data)
-                
-                time.sleep(0.1)  # ~30 FPS
-                
-            except Exception as e:
-                logger.error(f"{e}")
-                time.sleep(1)
+        def read_frame():
+            ret, frame = camera.read()
+            if not ret:
+                logger.warning(f"unable to catch from {camera_id}")
+                return None
+            return frame
+        return read_frame
+    
+    def encode_frame(self, item):
+        return self.detector.encode(item, timestamp=datetime.now().isoformat())
+    
+    def request_keyframes(self):
+        for delta in list(self.deltas.values()):
+            delta.request_keyframe()
+    
+    def statistics_payload(self):
+        pipeline = self.pipeline
+        return {
+            'statistics': self.statistics.snapshot(),
+            'camera_statistics': {str(camera_id): statistics.snapshot() for camera_id, statistics in list(self.camera_statistics.items())},
+            'pipeline': pipeline.stats() if pipeline else None,
+            'motion_gate': self.detector.motion_gate.stats() if self.detector.motion_gate else None,
+            'tracking': {str(camera_id): tracker.stats() for camera_id, tracker in self.detector.trackers.items()},
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def emit_frame(self, camera_id, payload):
+        jpeg, detections, info = payload
+        pipeline = self.pipeline
+        self.sequence += 1
+        
+        # the JPEG goes out as a binary attachment and detections only as changes since the last frame
+        detection_data = {
+            'camera_id': camera_id,
+            'sequence': self.sequence,
+            'frame': jpeg,
+            'frame_size': info['frame_size'],
+            'annotated': info['annotated'],
+            'detections': self.deltas[camera_id].encode(detections),
+            'fps': pipeline.source_fps[camera_id] if pipeline else 0,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        # subscribers of a camera get its room only; everyone else gets every camera
+        socketio.emit('detection_frame', detection_data, to=camera_room(camera_id))
+        socketio.emit('detection_frame', detection_data, to=ALL_CAMERAS_ROOM)
+        
+        now = time.time()
+        if now - self.last_stats_emit >= self.stats_interval:
+            self.last_stats_emit = now
+            socketio.emit('statistics_update', self.statistics_payload())
 
 detection_service = YOLODetectionService()
 
 @app.route('/api/detection/start', methods=['POST'])
 def start_detection():
     try:
-        camera_id = request.json.get('camera_id', 0)
-        detection_service.camera_id = camera_id
+        data = request.get_json(silent=True) or {}
+        camera_ids = camera_ids_from(data)
+        
+        target_fps = target_fps_from(data)
+        detect_interval = detect_interval_from(data)
         
-        if detection_service.start_detection():
+        if detection_service.start_detection(camera_ids, annotate=bool(data.get('annotate', False)), target_fps=target_fps,
+                                             motion_gate=bool(data.get('motion_gate', True)),
+                                             tracking=bool(data.get('tracking', True)), detect_interval=detect_interval):
             return jsonify({
                 'status': 'success',
                 'message': 'activated',
+                'camera_ids': detection_service.camera_ids,
                 'timestamp': datetime.now().isoformat()
             })
         else:
@@ -184,6 +199,11 @@ def start_detection():
                 'message': 'failed'
             }), 500
             
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -209,18 +229,45 @@ def stop_detection():
 def get_detection_status():
     return jsonify({
         'is_running': detection_service.is_running,
-        'statistics': detection_service.statistics,
+        'camera_ids': detection_service.camera_ids,
+        'model_backend': getattr(detection_service.model, 'backend_info', None),
+        'annotate': detection_service.detector.annotate,
+        'statistics': detection_service.statistics.snapshot(),
+        'camera_statistics': {str(camera_id): statistics.snapshot()
+                              for camera_id, statistics in list(detection_service.camera_statistics.items())},
+        'pipeline': detection_service.pipeline.stats() if detection_service.pipeline else None,
+        'motion_gate': detection_service.detector.motion_gate.stats() if detection_service.detector.motion_gate else None,
+        'tracking': {str(camera_id): tracker.stats() for camera_id, tracker in detection_service.detector.trackers.items()},
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    # scrape target: stage latency histograms, queue depths and drop counters in the Prometheus text format
+    text = detection_service.metrics.prometheus(detection_service.pipeline, detection_service.detector.motion_gate,
+                                                detection_service.statistics)
+    return Response(text, content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/api/detection/metrics', methods=['GET'])
+def get_metrics():
+    return jsonify(dict(detection_service.metrics.summary(detection_service.pipeline, detection_service.detector.motion_gate),
+                        status='success'))
+
+@app.route('/api/detection/annotation', methods=['POST'])
+def set_annotation():
+    data = request.get_json(silent=True) or {}
+    detection_service.detector.annotate = bool(data.get('enabled', False))
+    return jsonify({
+        'status': 'success',
+        'annotate': detection_service.detector.annotate
+    })
+
 @app.route('/api/detection/statistics/reset', methods=['POST'])
 def reset_statistics():
-    detection_service.statistics = {
-        'total_detections': 0,
-        'plastic_types': {},
-        'detection_confidence_avg': 0.0,
-        'session_start_time': None
-    }
+    # reset in place, so the inference thread never records into a dict a request has just swapped out
+    detection_service.statistics.reset()
+    for statistics in list(detection_service.camera_statistics.values()):
+        statistics.reset()
     return jsonify({
         'status': 'success',
         'message': 'reset'
@@ -229,17 +276,38 @@ def reset_statistics():
 @socketio.on('connect')
 def handle_connect():
     logger.info('connected')
+    join_room(ALL_CAMERAS_ROOM)
+    detection_service.request_keyframes()
     emit('connection_status', {'status': 'connected'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     logger.info('disconnected')
 
+@socketio.on('subscribe_cameras')
+def handle_subscribe_cameras(data):
+    # narrow this client to the listed cameras; an empty list goes back to all of them
+    camera_ids = (data or {}).get('camera_ids') or []
+    for camera_id in detection_service.camera_ids:
+        leave_room(camera_room(camera_id))
+    if camera_ids:
+        leave_room(ALL_CAMERAS_ROOM)
+        for camera_id in camera_ids:
+            join_room(camera_room(camera_id))
+    else:
+        join_room(ALL_CAMERAS_ROOM)
+    detection_service.request_keyframes()
+    emit('subscription_status', {'camera_ids': camera_ids})
+
+@socketio.on('request_keyframe')
+def handle_keyframe_request():
+    detection_service.request_keyframes()
+
 @socketio.on('request_detection_status')
 def handle_status_request():
     emit('detection_status', {
         'is_running': detection_service.is_running,
-        'statistics': detection_service.statistics
+        'statistics': detection_service.statistics.snapshot()
     })
 
 if __name__ == '__main__':
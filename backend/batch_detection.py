@@ -0,0 +1,268 @@
+import argparse
+import collections
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from detection_pipeline import class_counts, detection_dicts, extract_detections
+from detection_statistics import HISTOGRAM_EDGES
+from model_backends import MODEL_BACKEND, MODEL_BACKENDS, MODEL_THREADS, load_model
+from object_tracker import ObjectTracker
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.m4v', '.wmv', '.mpg', '.mpeg'}
+BATCH_SIZE = int(os.environ.get('DETECTION_BATCH_SIZE', 8))
+BATCH_WORKERS = int(os.environ.get('DETECTION_BATCH_WORKERS', 2))
+BATCH_CONFIDENCE = 0.3
+MAX_BATCH_SIZE = 64
+MAX_BATCH_WORKERS = 8
+
+
+def media_kind(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
+
+def batch_options_from(data):
+    options = {
+        'batch_size': int(data.get('batch_size', BATCH_SIZE)),
+        'workers': int(data.get('workers', BATCH_WORKERS)),
+        'frame_stride': int(data.get('frame_stride', 1)),
+        'conf': float(data.get('conf', BATCH_CONFIDENCE))
+    }
+    if not 1 <= options['batch_size'] <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+    if not 1 <= options['workers'] <= MAX_BATCH_WORKERS:
+        raise ValueError(f"workers must be between 1 and {MAX_BATCH_WORKERS}")
+    if options['frame_stride'] < 1:
+        raise ValueError("frame_stride must be at least 1")
+    if not 0 < options['conf'] < 1:
+        raise ValueError("conf must be between 0 and 1")
+    return options
+
+
+def media_sources(paths):
+    # a directory is one source of images in name order; every video file is a source of its own
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            images = sorted(os.path.join(path, name) for name in os.listdir(path) if media_kind(name) == 'image')
+            videos = sorted(os.path.join(path, name) for name in os.listdir(path) if media_kind(name) == 'video')
+            if images:
+                sources.append((path, 'images', images))
+            sources += [(video, 'video', [video]) for video in videos]
+        elif media_kind(path) == 'video':
+            sources.append((path, 'video', [path]))
+        elif media_kind(path) == 'image':
+            sources.append((path, 'images', [path]))
+        else:
+            raise ValueError(f"unsupported media: {path}")
+    return sources
+
+
+def read_video(path, frame_stride=1):
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"cannot open video: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0
+    try:
+        index = 0
+        while True:
+            # grab() skips decoding the frames the stride drops
+            if index % frame_stride:
+                if not capture.grab():
+                    break
+            else:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                yield index, index / fps if fps else None, None, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def read_images(paths, frame_stride=1):
+    for index, path in enumerate(paths[::frame_stride]):
+        frame = cv2.imread(path)
+        if frame is None:
+            logger.warning(f"cannot read image {path}")
+            continue
+        yield index * frame_stride, None, os.path.basename(path), frame
+
+
+def media_frames(sources, frame_stride=1):
+    for source, kind, paths in sources:
+        frames = read_video(paths[0], frame_stride) if kind == 'video' else read_images(paths, frame_stride)
+        for index, timestamp, name, frame in frames:
+            yield {'source': source, 'kind': kind, 'frame': index, 'time': timestamp, 'file': name}, frame
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ModelPool:
+    # loaded models outlive a batch run and are lent to one worker at a time, since one predictor is not safe to
+    # share across threads; the pool only grows to the number of workers predicting at once
+    def __init__(self, model_factory, max_idle=MAX_BATCH_WORKERS):
+        self.model_factory = model_factory
+        self.max_idle = max_idle
+        self.idle = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def model(self):
+        with self.lock:
+            model = self.idle.pop() if self.idle else None
+        if model is None:
+            model = self.model_factory()
+        try:
+            yield model
+        finally:
+            with self.lock:
+                if len(self.idle) < self.max_idle:
+                    self.idle.append(model)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.idle)
+
+
+class BatchDetector:
+    def __init__(self, models, batch_size=BATCH_SIZE, workers=BATCH_WORKERS, conf=BATCH_CONFIDENCE):
+        self.models = models
+        self.batch_size = batch_size
+        self.workers = workers
+        self.conf = conf
+
+    def predict(self, batch):
+        with self.models.model() as model:
+            results = model.predict([frame for _, frame in batch], conf=self.conf, verbose=False)
+            names = model.names
+        # frames are dropped here so the window of pending batches only holds detections
+        return [(dict(info, frame_size=[frame.shape[1], frame.shape[0]]), extract_detections(result), names)
+                for (info, frame), result in zip(batch, results)]
+
+    def run(self, frames):
+        # results come back in input order; a bounded window keeps decoding just ahead of inference
+        executor = ThreadPoolExecutor(self.workers, thread_name_prefix='batch-detection')
+        pending = collections.deque()
+        try:
+            for batch in batched(frames, self.batch_size):
+                pending.append(executor.submit(self.predict, batch))
+                if len(pending) > 2 * self.workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class DetectionSummary:
+    def __init__(self, conf=BATCH_CONFIDENCE):
+        self.conf = conf
+        self.started = time.time()
+        self.frames = 0
+        self.sources = collections.Counter()
+        self.detections = collections.Counter()
+        self.unique_objects = collections.Counter()
+        self.confidence_sums = collections.Counter()
+        self.histograms = {}
+        self.trackers = {}
+
+    def add(self, info, detections, names):
+        self.frames += 1
+        self.sources[info['source']] += 1
+        self.detections.update(class_counts(detections, names))
+
+        for class_id in np.unique(detections['class_id']).tolist():
+            confidence = detections['confidence'][detections['class_id'] == class_id]
+            histogram = self.histograms.setdefault(names[class_id], np.zeros(len(HISTOGRAM_EDGES) - 1, dtype=int))
+            histogram += np.histogram(confidence, bins=HISTOGRAM_EDGES)[0]
+            self.confidence_sums[names[class_id]] += float(confidence.sum())
+
+        # consecutive video frames are tracked so an item crossing the view is counted once
+        if info['kind'] == 'video':
+            tracker = self.trackers.setdefault(info['source'], ObjectTracker(1, high_threshold=self.conf))
+            _, confirmed = tracker.update(detections)
+            self.unique_objects.update(class_counts(confirmed, names))
+
+    def to_dict(self):
+        elapsed = time.time() - self.started
+        return {
+            'frames': self.frames,
+            'sources': dict(self.sources),
+            'elapsed_seconds': elapsed,
+            'fps': self.frames / elapsed if elapsed > 0 else 0,
+            'detections_per_class': dict(self.detections),
+            'unique_objects_per_class': dict(self.unique_objects),
+            'mean_confidence': {name: self.confidence_sums[name] / count for name, count in self.detections.items()},
+            'confidence_histograms': {
+                'bin_edges': HISTOGRAM_EDGES.round(2).tolist(),
+                'classes': {name: histogram.tolist() for name, histogram in self.histograms.items()}
+            }
+        }
+
+
+def detect_media(detector, sources, summary, frame_stride=1):
+    for info, detections, names in detector.run(media_frames(sources, frame_stride)):
+        summary.add(info, detections, names)
+        yield dict(info, detections=detection_dicts(detections, names), counts=class_counts(detections, names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run plastic detection over video files and image folders')
+    parser.add_argument('inputs', nargs='+', help='video files, images or directories of them')
+    parser.add_argument('--model', default=os.environ.get('DETECTION_MODEL_PATH', r".\best.pt"))
+    parser.add_argument('--output', default='detection_results', help='directory for frames.jsonl and summary.json')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS)
+    parser.add_argument('--frame-stride', type=int, default=1)
+    parser.add_argument('--conf', type=float, default=BATCH_CONFIDENCE)
+    parser.add_argument('--backend', choices=MODEL_BACKENDS, default=MODEL_BACKEND)
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--threads', type=int, default=MODEL_THREADS, help='inference threads per worker')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    options = batch_options_from(vars(args))
+    sources = media_sources(args.inputs)
+    models = ModelPool(lambda: load_model(args.model, args.backend, args.int8, args.threads))
+    detector = BatchDetector(models, options['batch_size'], options['workers'], options['conf'])
+    summary = DetectionSummary(options['conf'])
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, 'frames.jsonl'), 'w', encoding='utf-8') as f:
+        for frame in detect_media(detector, sources, summary, options['frame_stride']):
+            f.write(json.dumps(frame, ensure_ascii=False) + '\n')
+            if summary.frames % 100 == 0:
+                logger.info(f"{summary.frames} frames processed")
+
+    with open(os.path.join(args.output, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary.to_dict(), f, ensure_ascii=False, indent=2)
+    logger.info(f"{summary.frames} frames from {len(sources)} sources written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from batch_detection import BATCH_CONFIDENCE, media_frames, media_sources
+from detection_pipeline import extract_detections, pairwise_iou
+from model_backends import MODEL_BACKENDS, MODEL_THREADS, load_model
+
+logger = logging.getLogger(__name__)
+
+MATCH_IOU = 0.5
+WARMUP_FRAMES = 3
+
+
+def match_detections(baseline, candidate, min_iou=MATCH_IOU):
+    # greedy same-class matching by IoU; the PyTorch boxes are treated as ground truth
+    iou = pairwise_iou(baseline['bbox'], candidate['bbox'])
+    if iou.size:
+        iou[baseline['class_id'][:, None] != candidate['class_id'][None, :]] = 0
+    matches = []
+    used_baseline, used_candidate = set(), set()
+    for flat in np.argsort(iou, axis=None)[::-1]:
+        row, col = np.unravel_index(flat, iou.shape)
+        if iou[row, col] < min_iou:
+            break
+        if row in used_baseline or col in used_candidate:
+            continue
+        used_baseline.add(row)
+        used_candidate.add(col)
+        matches.append((row, col, iou[row, col]))
+    return matches
+
+
+def run_backend(model, frames, conf):
+    for frame in frames[:WARMUP_FRAMES]:
+        model.predict([frame], conf=conf, verbose=False)
+
+    latencies, detections = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        result = model.predict([frame], conf=conf, verbose=False)[0]
+        latencies.append(time.perf_counter() - started)
+        detections.append(extract_detections(result))
+    return np.array(latencies), detections
+
+
+def accuracy(baseline, candidate):
+    true_positives = baseline_total = candidate_total = 0
+    ious, confidence_deltas = [], []
+    for expected, actual in zip(baseline, candidate):
+        matches = match_detections(expected, actual)
+        true_positives += len(matches)
+        baseline_total += len(expected)
+        candidate_total += len(actual)
+        ious += [iou for _, _, iou in matches]
+        confidence_deltas += [abs(float(expected['confidence'][row]) - float(actual['confidence'][col])) for row, col, _ in matches]
+
+    precision = true_positives / candidate_total if candidate_total else 1.0
+    recall = true_positives / baseline_total if baseline_total else 1.0
+    return {
+        'baseline_detections': baseline_total,
+        'detections': candidate_total,
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        'mean_iou': float(np.mean(ious)) if ious else None,
+        'mean_confidence_delta': float(np.mean(confidence_deltas)) if confidence_deltas else None
+    }
+
+
+def latency_report(latencies):
+    return {
+        'mean_ms': float(latencies.mean() * 1000),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'fps': float(1 / latencies.mean())
+    }
+
+
+def compare_backends(model_path, frames, candidates, threads=MODEL_THREADS, conf=BATCH_CONFIDENCE):
+    baseline_latencies, baseline = run_backend(load_model(model_path, 'pytorch', threads=threads), frames, conf)
+    reports = [dict(backend='pytorch', int8=False, **latency_report(baseline_latencies), speedup=1.0,
+                    **accuracy(baseline, baseline))]
+
+    for backend, int8 in candidates:
+        model = load_model(model_path, backend, int8, threads)
+        if model.backend_info['backend'] != backend:
+            logger.warning(f"skipping {backend}{' int8' if int8 else ''}: backend could not be loaded")
+            continue
+        latencies, detections = run_backend(model, frames, conf)
+        reports.append(dict(backend=backend, int8=int8, **latency_report(latencies),
+                            speedup=float(baseline_latencies.mean() / latencies.mean()), **accuracy(baseline, detections)))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare exported backends against the PyTorch model on the same frames')
+    parser.add_argument('inputs', nargs='+', help='video files, images or directories of them')
+    parser.add_argument('--model', default=os.environ.get('DETECTION_MODEL_PATH', r".\best.pt"))
+    parser.add_argument('--backends', nargs='+', choices=MODEL_BACKENDS[1:], default=list(MODEL_BACKENDS[1:]))
+    parser.add_argument('--int8', action='store_true', help='also compare the int8 export of every backend')
+    parser.add_argument('--threads', type=int, default=MODEL_THREADS)
+    parser.add_argument('--conf', type=float, default=BATCH_CONFIDENCE)
+    parser.add_argument('--frames', type=int, default=200, help='number of frames to compare on')
+    parser.add_argument('--frame-stride', type=int, default=1)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    frames = [frame for _, frame in itertools.islice(media_frames(media_sources(args.inputs), args.frame_stride), args.frames)]
+    if not frames:
+        parser.error('no frames found in the inputs')
+
+    candidates = [(backend, int8) for backend in args.backends for int8 in ((False, True) if args.int8 else (False,))]
+    reports = compare_backends(args.model, frames, candidates, args.threads, args.conf)
+
+    print(f"{len(frames)} frames, threads={args.threads or 'default'}")
+    print(f"{'backend':<14}{'mean ms':>9}{'p95 ms':>9}{'fps':>8}{'speedup':>9}{'precision':>11}{'recall':>8}{'mean iou':>10}")
+    for report in reports:
+        name = report['backend'] + (' int8' if report['int8'] else '')
+        mean_iou = f"{report['mean_iou']:.3f}" if report['mean_iou'] is not None else '-'
+        print(f"{name:<14}{report['mean_ms']:>9.1f}{report['p95_ms']:>9.1f}{report['fps']:>8.1f}{report['speedup']:>9.2f}"
+              f"{report['precision']:>11.3f}{report['recall']:>8.3f}{mean_iou:>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'frames': len(frames), 'threads': args.threads, 'reports': reports}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,87 +1,160 @@
+import copy
+import hashlib
+import os
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, Optional, Tuple
+from dataset_store import DatasetStore, dataset_store
 
-def parse_pollution_data(file_path: str) -> Dict:
-    df = pd.read_excel(file_path, sheet_name='Sheet1', header=None)
-    
-    data = {
-        'dosage_model': {},      
-        'time_model': {},       
-        'protein_expression': {} 
+# each block is found by its label in the first column; rows are taken relative to that header row
+# (offset 0 means the values sit on the header row itself) and scalars are fixed experiment constants
+POLLUTION_SCHEMA = {
+    'dosage_model': {
+        'offset': 1,
+        'rows': ['original_pb_concentration', 'added_pb_amount', 'treated_pb_amount', 'difference'],
+        'scalars': {'protein_concentration': 0.26, 'treatment_time': 30}
+    },
+    'time_model': {
+        'offset': 1,
+        'rows': ['time_points', 'pb_concentrations'],
+        'scalars': {'protein_concentration': 0.26}
+    },
+    'protein_expression': {
+        'offset': 0,
+        'rows': ['time_points', 'protein_concentrations'],
+        'scalars': {}
     }
+}
+
+MAX_PARSED_WORKBOOKS = 64
+
+parsed_workbooks = {}
+parsed_workbooks_lock = threading.Lock()
+
+def file_sha1(file_path: str) -> str:
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def pollution_dataset_id(file_path: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+    return f'pollution-{digest[:16]}'
+
+def parse_sheet(df: pd.DataFrame, schema: Dict = POLLUTION_SCHEMA) -> Dict:
+    labels = df.iloc[:, 0].astype(str) if df.shape[1] else pd.Series(dtype=str)
+    values = df.iloc[:, 1:].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
     
-    dosage_row_start = 0
-    if 'dosage_model' in str(df.iloc[dosage_row_start, 0]):
-        original_pb = []
-        added_pb = []
-        treated_pb = []
-        difference = []
+    data = {}
+    for block, spec in schema.items():
+        matches = np.flatnonzero(labels.str.contains(block, regex=False).to_numpy())
+        if len(matches) == 0:
+            data[block] = {}
+            continue
         
-        for col in range(1, 8):  
-            try:
-                if pd.notna(df.iloc[1, col]) and df.iloc[1, col] != 0:  
-                    original_pb.append(float(df.iloc[1, col]))
-                if pd.notna(df.iloc[2, col]) and df.iloc[2, col] != 0:  
-                    added_pb.append(float(df.iloc[2, col]))
-                if pd.notna(df.iloc[3, col]) and df.iloc[3, col] != 0:  
-                    treated_pb.append(float(df.iloc[3, col]))
-                if pd.notna(df.iloc[4, col]) and df.iloc[4, col] != 0:  
-                    difference.append(float(df.iloc[4, col]))
-            except (ValueError, TypeError):
-                continue
+        start = matches[0] + spec['offset']
+        rows = values[start:start + len(spec['rows'])]
         
-        data['dosage_model'] = {
-            'original_pb_concentration': original_pb,
-            'added_pb_amount': added_pb,
-            'treated_pb_amount': treated_pb,
-            'difference': difference,
-            'protein_concentration': 0.26,  
-            'treatment_time': 30  #
-        }
+        data[block] = {}
+        for i, name in enumerate(spec['rows']):
+            row = rows[i] if i < len(rows) else np.array([])
+            data[block][name] = row[~np.isnan(row)].tolist()
+        data[block].update(spec['scalars'])
     
+    return data
+
+def cached_workbook_entry(file_path: str, stat: os.stat_result, store: DatasetStore) -> Tuple[Optional[Dict], Optional[str]]:
+    entry = store.entry(pollution_dataset_id(file_path))
+    if entry is None:
+        return None, None
     
-    time_row_start = 8
-    if 'time_model' in str(df.iloc[time_row_start, 0]):
-        time_points = []
-        pb_concentrations = []
-        
-        for col in range(1, 8):
-            try:
-                if pd.notna(df.iloc[9, col]) and df.iloc[9, col] != 0:  
-                    time_points.append(float(df.iloc[9, col]))
-                if pd.notna(df.iloc[10, col]) and df.iloc[10, col] != 0:  
-                    pb_concentrations.append(float(df.iloc[10, col]))
-            except (ValueError, TypeError):
-                continue
-        
-        data['time_model'] = {
-            'time_points': time_points,
-            'pb_concentrations': pb_concentrations,
-            'protein_concentration': 0.26  
-        }
+    metadata = entry['metadata']
+    if metadata.get('mtime') == stat.st_mtime and metadata.get('size') == stat.st_size:
+        return entry, None
     
+    # touched but possibly unchanged: fall back to comparing content hashes
+    sha1 = file_sha1(file_path)
+    return (entry, sha1) if metadata.get('sha1') == sha1 else (None, sha1)
 
-    protein_row_start = 14
-    if 'protein_expression' in str(df.iloc[protein_row_start, 0]):
-        time_points = []
-        protein_concentrations = []
-        
-        for col in range(1, 8):
-            try:
-                if pd.notna(df.iloc[14, col]) and df.iloc[14, col] != 0:
-                    time_points.append(float(df.iloc[14, col]))
-                if pd.notna(df.iloc[15, col]) and df.iloc[15, col] != 0:
-                    protein_concentrations.append(float(df.iloc[15, col]))
-            except (ValueError, TypeError):
-                continue
-        
-        data['protein_expression'] = {
-            'time_points': time_points,
-            'protein_concentrations': protein_concentrations
-        }
+def load_stored_workbook(file_path: str, entry: Dict, store: DatasetStore) -> Optional[Dict]:
+    df = store.load(entry['dataset_id'])
+    if df is None:
+        return None
     
-    return data
+    groups = {
+        key: group['value'].tolist()
+        for key, group in df.sort_values('position').groupby(['sheet', 'block', 'series'])
+    }
+    workbook = {}
+    for sheet, layout in entry['metadata']['sheets'].items():
+        workbook[sheet] = {}
+        for block, fields in layout['fields'].items():
+            scalars = layout['scalars'][block]
+            workbook[sheet][block] = {
+                name: scalars[name] if name in scalars else groups.get((sheet, block, name), [])
+                for name in fields
+            }
+    return workbook
+
+def save_workbook(file_path: str, workbook: Dict, stat: os.stat_result, sha1: str, store: DatasetStore) -> None:
+    rows = []
+    sheets = {}
+    for sheet, data in workbook.items():
+        sheets[sheet] = {'fields': {}, 'scalars': {}}
+        for block, fields in data.items():
+            sheets[sheet]['fields'][block] = list(fields)
+            sheets[sheet]['scalars'][block] = {}
+            for name, values in fields.items():
+                if not isinstance(values, list):
+                    sheets[sheet]['scalars'][block][name] = values
+                    continue
+                rows.extend((sheet, block, name, position, float(value)) for position, value in enumerate(values))
+    
+    df = pd.DataFrame(rows, columns=['sheet', 'block', 'series', 'position', 'value'])
+    store.save(pollution_dataset_id(file_path), df, 'pollution', metadata={
+        'source': os.path.abspath(file_path),
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'sha1': sha1,
+        'sheets': sheets
+    })
+
+def parse_pollution_workbook(file_path: str, store: Optional[DatasetStore] = dataset_store) -> Dict:
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_mtime, stat.st_size)
+    with parsed_workbooks_lock:
+        if memo_key in parsed_workbooks:
+            return copy.deepcopy(parsed_workbooks[memo_key])
+    
+    workbook = None
+    sha1 = None
+    if store is not None and store.enabled:
+        entry, sha1 = cached_workbook_entry(file_path, stat, store)
+        if entry is not None:
+            workbook = load_stored_workbook(file_path, entry, store)
+    
+    if workbook is None:
+        sheets = pd.read_excel(file_path, sheet_name=None, header=None)
+        workbook = {sheet: parse_sheet(df) for sheet, df in sheets.items()}
+        if store is not None and store.enabled:
+            save_workbook(file_path, workbook, stat, sha1 or file_sha1(file_path), store)
+    elif sha1 is not None:
+        save_workbook(file_path, workbook, stat, sha1, store)
+    
+    with parsed_workbooks_lock:
+        if len(parsed_workbooks) >= MAX_PARSED_WORKBOOKS:
+            parsed_workbooks.clear()
+        parsed_workbooks[memo_key] = workbook
+    # callers get their own copy, so editing a result never reaches the memo
+    return copy.deepcopy(workbook)
+
+def parse_pollution_data(file_path: str, sheet_name: str = 'Sheet1', store: Optional[DatasetStore] = dataset_store) -> Dict:
+    workbook = parse_pollution_workbook(file_path, store=store)
+    if sheet_name not in workbook:
+        raise ValueError(f"sheet '{sheet_name}' not found in {file_path}")
+    return workbook[sheet_name]
 
 if __name__ == "__main__":
     data = parse_pollution_data('../polludata.xlsx')
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+    ipc = None
+
+STORE_DIR = os.environ.get('DATASET_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+MANIFEST_NAME = 'manifest.json'
+# the in-memory registry is capped separately; this caps what is kept on disk
+STORE_MAX_BYTES = int(os.environ.get('DATASET_STORE_MAX_MB', 4096)) * 1024 * 1024
+STORE_MAX_AGE = float(os.environ.get('DATASET_STORE_MAX_AGE_DAYS', 30)) * 24 * 3600
+
+
+class DatasetStore:
+    def __init__(self, root=STORE_DIR, max_bytes=STORE_MAX_BYTES, max_age=STORE_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.enabled = pa is not None
+        self.manifest = {}
+
+        if not self.enabled:
+            print("Warning: pyarrow is not installed, datasets will not be persisted")
+            return
+
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read dataset manifest: {e}")
+                self.manifest = {}
+
+        expired = self._expire()
+        if expired:
+            self._write_manifest()
+            self._delete_files(expired)
+
+    def _path(self, dataset_id):
+        return os.path.join(self.root, f'{dataset_id}.arrow')
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def save(self, dataset_id, df, kind, metadata=None):
+        if not self.enabled:
+            return None
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        path = self._path(dataset_id)
+        tmp_path = path + '.tmp'
+
+        # uncompressed Arrow IPC so reads can map the file instead of decoding it
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        entry = {
+            'dataset_id': dataset_id,
+            'kind': kind,
+            'rows': table.num_rows,
+            'columns': table.num_columns,
+            'schema': [{'name': field.name, 'type': str(field.type)} for field in table.schema],
+            'bytes': os.path.getsize(path),
+            'created': time.time(),
+            'metadata': metadata or {}
+        }
+        with self.lock:
+            self.manifest[dataset_id] = entry
+            expired = self._expire(keep=dataset_id)
+            self._write_manifest()
+        self._delete_files(expired)
+        return entry
+
+    def _expire(self, keep=None):
+        # oldest first: anything past max_age goes, then more until the store fits in max_bytes
+        now = time.time()
+        total = sum(entry['bytes'] for entry in self.manifest.values())
+        expired = []
+        for dataset_id, entry in sorted(self.manifest.items(), key=lambda item: item[1]['created']):
+            if dataset_id == keep:
+                continue
+            if now - entry['created'] <= self.max_age and total <= self.max_bytes:
+                break
+            del self.manifest[dataset_id]
+            total -= entry['bytes']
+            expired.append(dataset_id)
+        return expired
+
+    def _delete_files(self, dataset_ids):
+        for dataset_id in dataset_ids:
+            try:
+                os.remove(self._path(dataset_id))
+            except OSError:
+                pass
+
+    def load(self, dataset_id):
+        if not self.enabled or self.entry(dataset_id) is None:
+            return None
+
+        # split_blocks keeps one block per column so numeric columns stay views over the mapping;
+        # the frame's buffers keep the mapping alive after the file is closed
+        with pa.memory_map(self._path(dataset_id), 'r') as source:
+            table = ipc.open_file(source).read_all()
+            return table.to_pandas(split_blocks=True)
+
+    def entry(self, dataset_id):
+        with self.lock:
+            entry = self.manifest.get(dataset_id)
+            return dict(entry) if entry else None
+
+    def describe(self, kind=None):
+        with self.lock:
+            return [dict(entry) for entry in self.manifest.values() if kind is None or entry['kind'] == kind]
+
+    def remove(self, dataset_id):
+        if not self.enabled:
+            return False
+
+        with self.lock:
+            entry = self.manifest.pop(dataset_id, None)
+            if entry is None:
+                return False
+            self._write_manifest()
+
+        self._delete_files([dataset_id])
+        return True
+
+
+dataset_store = DatasetStore()
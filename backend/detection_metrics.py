@@ -0,0 +1,171 @@
+import bisect
+import collections
+import math
+import threading
+import time
+
+STAGES = ('capture', 'inference', 'annotation', 'encode', 'emit')
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5)
+RATE_WINDOW_SECONDS = 5.0
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum, self.max
+
+    def quantile(self, q, counts):
+        # linear interpolation inside the bucket, as histogram_quantile() does
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self):
+        counts, total, maximum = self.snapshot()
+        count = sum(counts)
+        quantiles = {f'p{int(q * 100)}_ms': self.quantile(q, counts) for q in (0.5, 0.95, 0.99)}
+        return dict(count=count, mean_ms=total / count * 1000 if count else None, max_ms=maximum * 1000,
+                    **{key: value * 1000 if value is not None else None for key, value in quantiles.items()})
+
+
+class RateMeter:
+    # events per second over a sliding time window, so a stalled stream decays to zero instead of freezing
+    def __init__(self, window=RATE_WINDOW_SECONDS):
+        self.window = window
+        self.events = collections.deque()
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def mark(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.events.append(now)
+            self._expire(now)
+
+    def _expire(self, now):
+        while self.events and self.events[0] < now - self.window:
+            self.events.popleft()
+
+    def rate(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self._expire(now)
+            elapsed = min(self.window, now - self.started)
+            return len(self.events) / elapsed if elapsed > 0 else 0.0
+
+
+def label_text(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def number_text(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class DetectionMetrics:
+    # lives as long as the service, so stage histograms keep counting across pipeline restarts
+    def __init__(self, stages=STAGES):
+        self.stages = {stage: LatencyHistogram() for stage in stages}
+
+    def observe(self, stage, seconds):
+        self.stages[stage].observe(seconds)
+
+    def summary(self, pipeline=None, motion_gate=None):
+        summary = {'stages': {stage: histogram.summary() for stage, histogram in self.stages.items()}}
+        if pipeline is not None:
+            stats = pipeline.stats()
+            summary.update({
+                'fps': stats['fps'],
+                'published_frames': stats['published_frames'],
+                'batches': stats['batches'],
+                'queues': {
+                    'results': {'depth': stats['queued_results'], 'dropped': stats['dropped_results']},
+                    'capture': {source_id: {'depth': source['queued_frames'], 'dropped': source['dropped_frames'],
+                                            'fps': source['fps']}
+                                for source_id, source in stats['sources'].items()}
+                }
+            })
+        if motion_gate is not None:
+            summary['motion_gate'] = motion_gate.stats()
+        return summary
+
+    def prometheus(self, pipeline=None, motion_gate=None, statistics=None, prefix='detection'):
+        lines = []
+
+        def family(name, kind, description, samples):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{prefix}_{name}{suffix}{label_text(labels)} {number_text(value)}')
+
+        samples = []
+        for stage, histogram in self.stages.items():
+            counts, total, _ = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + [math.inf], counts):
+                cumulative += count
+                samples.append(('_bucket', {'stage': stage, 'le': number_text(float(bound))}, cumulative))
+            samples.append(('_sum', {'stage': stage}, total))
+            samples.append(('_count', {'stage': stage}, cumulative))
+        family('stage_latency_seconds', 'histogram', 'Latency of each detection pipeline stage.', samples)
+
+        family('running', 'gauge', 'Whether the detection pipeline is running.',
+               [('', {}, int(pipeline is not None and pipeline.is_running))])
+        if pipeline is not None:
+            stats = pipeline.stats()
+            sources = stats['sources']
+            family('frames_published_total', 'counter', 'Frames published to clients.',
+                   [('', {'camera': source_id}, source['published_frames']) for source_id, source in sources.items()])
+            family('inference_batches_total', 'counter', 'Predict calls made by the inference worker.', [('', {}, stats['batches'])])
+            family('frames_dropped_total', 'counter', 'Frames discarded by drop-oldest queues.',
+                   [('', {'queue': 'capture', 'camera': source_id}, source['dropped_frames'])
+                    for source_id, source in sources.items()] + [('', {'queue': 'results'}, stats['dropped_results'])])
+            family('queue_depth', 'gauge', 'Items waiting in each pipeline queue.',
+                   [('', {'queue': 'capture', 'camera': source_id}, source['queued_frames'])
+                    for source_id, source in sources.items()] + [('', {'queue': 'results'}, stats['queued_results'])])
+            family('fps', 'gauge', 'Published frames per second over the last few seconds.',
+                   [('', {'camera': source_id}, source['fps']) for source_id, source in sources.items()])
+        if motion_gate is not None:
+            family('motion_skipped_frames_total', 'counter', 'Frames whose inference the motion gate skipped.',
+                   [('', {}, motion_gate.skipped)])
+        if statistics is not None:
+            snapshot = statistics.snapshot()
+            family('objects_total', 'counter', 'Plastic items counted since the statistics were last reset.',
+                   [('', {'class': class_name}, count) for class_name, count in snapshot['plastic_types'].items()])
+            family('objects_per_minute', 'gauge', 'Plastic items counted per minute over a rolling window.',
+                   [('', {'window': name}, window['detections_per_minute']) for name, window in snapshot['windows'].items()])
+            family('window_objects', 'gauge', 'Plastic items of each class counted within a rolling window.',
+                   [('', {'window': name, 'class': class_name}, count)
+                    for name, window in snapshot['windows'].items() for class_name, count in window['plastic_types'].items()])
+
+        return '\n'.join(lines) + '\n'
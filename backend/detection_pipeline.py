@@ -0,0 +1,615 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from detection_metrics import DetectionMetrics, RateMeter
+
+logger = logging.getLogger(__name__)
+
+MAX_CAMERAS = 16
+MJPEG_BOUNDARY = 'frame'
+DELTA_MATCH_IOU = 0.5
+DELTA_MOVE_TOLERANCE = float(os.environ.get('DETECTION_DELTA_TOLERANCE_PX', 2.0))
+DELTA_CONFIDENCE_TOLERANCE = 0.02
+KEYFRAME_INTERVAL = int(os.environ.get('DETECTION_KEYFRAME_INTERVAL', 30))
+TARGET_FPS = float(os.environ.get('DETECTION_TARGET_FPS', 15))
+MAX_TARGET_FPS = 120
+LATENCY_SMOOTHING = 0.2
+PACED_STAGES = ('inference', 'encode')
+MOTION_THUMBNAIL_WIDTH = 80
+MOTION_PIXEL_THRESHOLD = float(os.environ.get('DETECTION_MOTION_PIXEL_THRESHOLD', 25))
+MOTION_AREA_THRESHOLD = float(os.environ.get('DETECTION_MOTION_AREA', 0.002))
+MOTION_MAX_SKIP_SECONDS = float(os.environ.get('DETECTION_MOTION_MAX_SKIP', 2.0))
+JPEG_QUALITY = 80
+BOX_COLORS = [(56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+              (10, 249, 72), (23, 204, 146), (134, 219, 61), (211, 188, 0), (255, 149, 0)]
+
+
+def parse_camera_id(value):
+    # device indexes arrive as strings from query args; anything else is a stream URL or file path
+    if value is None or isinstance(value, int):
+        return value
+    return int(value) if str(value).isdigit() else value
+
+
+def target_fps_from(data):
+    target_fps = float(data.get('target_fps', TARGET_FPS))
+    if not 0 < target_fps <= MAX_TARGET_FPS:
+        raise ValueError(f"target_fps must be between 0 and {MAX_TARGET_FPS}")
+    return target_fps
+
+
+def camera_ids_from(data):
+    camera_ids = data.get('camera_ids')
+    if camera_ids is None:
+        camera_ids = [data.get('camera_id', 0)]
+    if not isinstance(camera_ids, list):
+        camera_ids = [camera_ids]
+    camera_ids = list(dict.fromkeys(parse_camera_id(camera_id) for camera_id in camera_ids))
+    if not camera_ids or len(camera_ids) > MAX_CAMERAS:
+        raise ValueError(f"between 1 and {MAX_CAMERAS} cameras are supported")
+    return camera_ids
+
+
+class DropOldestQueue:
+    def __init__(self, maxsize=2, condition=None):
+        self.items = collections.deque(maxlen=maxsize)
+        self.condition = condition or threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        # a full queue discards its oldest item so consumers always see the freshest frames
+        with self.condition:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            return self.items.popleft() if self.items else None
+
+    def get_nowait(self):
+        with self.condition:
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.items.clear()
+            self.condition.notify_all()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.items)
+
+
+class FrameBroadcaster:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frames = {}
+        self.sequence = 0
+
+    def publish(self, source_id, jpeg, detections, **info):
+        # one sequence across sources and restarts, so a waiting client never mistakes an old frame for a new one
+        with self.condition:
+            self.sequence += 1
+            self.frames[source_id] = dict(info, sequence=self.sequence, jpeg=jpeg, detections=detections,
+                                          timestamp=time.time())
+            self.condition.notify_all()
+
+    def latest(self, source_id):
+        with self.condition:
+            return self.frames.get(source_id)
+
+    def wait(self, source_id, after=0, timeout=1.0):
+        def fresh():
+            entry = self.frames.get(source_id)
+            return entry if entry and entry['sequence'] > after else None
+
+        with self.condition:
+            self.condition.wait_for(fresh, timeout)
+            return fresh()
+
+    def clear(self):
+        with self.condition:
+            self.frames = {}
+            self.condition.notify_all()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.frames)
+
+
+DETECTION_DTYPE = np.dtype([('bbox', 'f4', (4,)), ('confidence', 'f4'), ('class_id', 'i4')])
+
+
+def as_numpy(values):
+    # torch tensors from ultralytics, plain arrays from the exported-model backends
+    return values.cpu().numpy() if hasattr(values, 'cpu') else np.asarray(values)
+
+
+def extract_detections(result):
+    # whole-tensor copies instead of three .cpu().numpy() round trips per box
+    boxes = getattr(result, 'boxes', None)
+    if boxes is None or len(boxes) == 0:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+    detections = np.empty(len(boxes), dtype=DETECTION_DTYPE)
+    detections['bbox'] = as_numpy(boxes.xyxy)
+    detections['confidence'] = as_numpy(boxes.conf)
+    detections['class_id'] = as_numpy(boxes.cls)
+    return detections
+
+
+def detection_dicts(detections, names, **fields):
+    dicts = [
+        dict(fields, bbox=bbox, confidence=confidence, class_id=class_id, class_name=names[class_id])
+        for bbox, confidence, class_id in zip(detections['bbox'].tolist(), detections['confidence'].tolist(),
+                                              detections['class_id'].tolist())
+    ]
+    if 'track_id' in detections.dtype.names:
+        for detection, track_id in zip(dicts, detections['track_id'].tolist()):
+            detection['track_id'] = track_id
+    return dicts
+
+
+def draw_detections(frame, detections, names):
+    # detector-run and tracker-predicted frames are drawn from the same boxes, so annotation holds steady between runs
+    frame = frame.copy()
+    track_ids = detections['track_id'].tolist() if 'track_id' in detections.dtype.names else [None] * len(detections)
+    for bbox, confidence, class_id, track_id in zip(detections['bbox'].round().astype(int).tolist(),
+                                                    detections['confidence'].tolist(), detections['class_id'].tolist(),
+                                                    track_ids):
+        color = BOX_COLORS[class_id % len(BOX_COLORS)]
+        label = f'{names[class_id]} {confidence:.2f}' if track_id is None else f'#{track_id} {names[class_id]} {confidence:.2f}'
+        cv2.rectangle(frame, tuple(bbox[:2]), tuple(bbox[2:]), color, 2)
+        cv2.putText(frame, label, (bbox[0], max(bbox[1] - 5, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+    return frame
+
+
+def class_counts(detections, names):
+    class_ids, counts = np.unique(detections['class_id'], return_counts=True)
+    return {names[class_id]: count for class_id, count in zip(class_ids.tolist(), counts.tolist())}
+
+
+def pairwise_iou(a, b):
+    a = np.asarray(a, dtype=float).reshape(-1, 4)
+    b = np.asarray(b, dtype=float).reshape(-1, 4)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nan_to_num(inter / (area_a[:, None] + area_b[None, :] - inter))
+
+
+class DetectionDelta:
+    # turns per-frame detection lists into added/updated/removed messages keyed by a stable id
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.previous = {}
+        self.next_id = 1
+        self.frames = 0
+        self.force_keyframe = True
+
+    def request_keyframe(self):
+        self.force_keyframe = True
+
+    def _changed(self, old, new):
+        moved = max(abs(x - y) for x, y in zip(old['bbox'], new['bbox']))
+        return moved > DELTA_MOVE_TOLERANCE or abs(old['confidence'] - new['confidence']) > DELTA_CONFIDENCE_TOLERANCE
+
+    def encode(self, detections):
+        if detections and all('track_id' in d for d in detections):
+            return self._emit({d['track_id']: d for d in detections})
+
+        previous_ids = list(self.previous)
+        previous = [self.previous[i] for i in previous_ids]
+        iou = pairwise_iou([d['bbox'] for d in detections], [d['bbox'] for d in previous])
+
+        matched = {}
+        if iou.size:
+            same_class = np.array([[d['class_id'] == p['class_id'] for p in previous] for d in detections])
+            iou = np.where(same_class, iou, 0)
+            # greedy best-first matching is plenty for the handful of boxes in a frame
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                row, col = np.unravel_index(flat, iou.shape)
+                if iou[row, col] < DELTA_MATCH_IOU:
+                    break
+                if row in matched or previous_ids[col] in matched.values():
+                    continue
+                matched[row] = previous_ids[col]
+
+        current = {}
+        for row, detection in enumerate(detections):
+            if row in matched:
+                current[matched[row]] = detection
+            else:
+                current[self.next_id] = detection
+                self.next_id += 1
+        return self._emit(current)
+
+    def _emit(self, detections):
+        # tracked detections bring their own ids; the rest were matched against the previous frame above
+        current = {}
+        added, updated = [], []
+        for detection_id, detection in detections.items():
+            old = self.previous.get(detection_id)
+            if old is None:
+                current[detection_id] = dict(detection, id=detection_id)
+                added.append(current[detection_id])
+            elif self._changed(old, detection):
+                current[detection_id] = dict(detection, id=detection_id)
+                updated.append(current[detection_id])
+            else:
+                current[detection_id] = old
+        removed = [detection_id for detection_id in self.previous if detection_id not in current]
+
+        self.previous = current
+        self.frames += 1
+        if self.force_keyframe or self.frames % self.keyframe_interval == 0:
+            self.force_keyframe = False
+            return {'keyframe': True, 'detections': list(current.values())}
+        return {'keyframe': False, 'added': added, 'updated': updated, 'removed': removed}
+
+
+class MotionGate:
+    # a strided grayscale thumbnail against the last inferred one; a static scene keeps its previous detections
+    def __init__(self, pixel_threshold=MOTION_PIXEL_THRESHOLD, area_threshold=MOTION_AREA_THRESHOLD,
+                 max_skip_seconds=MOTION_MAX_SKIP_SECONDS):
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.max_skip_seconds = max_skip_seconds
+        self.references = {}
+        self.checked = 0
+        self.skipped = 0
+
+    def thumbnail(self, frame):
+        step = max(1, frame.shape[1] // MOTION_THUMBNAIL_WIDTH)
+        small = frame[::step, ::step]
+        return small.mean(axis=2, dtype=np.float32) if small.ndim == 3 else small.astype(np.float32)
+
+    def changed(self, source_id, frame, now=None):
+        now = time.time() if now is None else now
+        current = self.thumbnail(frame)
+        self.checked += 1
+
+        reference = self.references.get(source_id)
+        # the reference only moves on inference, so slow drift still adds up; a forced refresh bounds staleness
+        if reference is not None and reference[0].shape == current.shape and now - reference[1] < self.max_skip_seconds:
+            moving = np.count_nonzero(np.abs(current - reference[0]) > self.pixel_threshold) / current.size
+            if moving < self.area_threshold:
+                self.skipped += 1
+                return False
+
+        self.references[source_id] = (current, now)
+        return True
+
+    def select(self, batch):
+        return [(source_id, frame) for source_id, frame in batch if self.changed(source_id, frame)]
+
+    def reset(self, source_id=None):
+        if source_id is None:
+            self.references = {}
+        else:
+            self.references.pop(source_id, None)
+
+    def stats(self):
+        return {
+            'checked_frames': self.checked,
+            'skipped_frames': self.skipped,
+            'skip_ratio': self.skipped / self.checked if self.checked else 0.0
+        }
+
+
+class FrameDetector:
+    # the inference and encode stages of both detection services: motion gating, one predict call for the latest
+    # frame of every camera, per-camera tracking, then JPEG encoding with optional server-side boxes
+    def __init__(self, model, confidence_threshold, record, metrics=None, jpeg_quality=JPEG_QUALITY):
+        self.model = model
+        self.confidence_threshold = confidence_threshold
+        self.predict_threshold = confidence_threshold
+        self.record = record
+        self.metrics = metrics or DetectionMetrics()
+        self.jpeg_quality = jpeg_quality
+        self.annotate = False
+        self.motion_gate = None
+        self.trackers = {}
+        self.last_detections = {}
+
+    @property
+    def names(self):
+        return self.model.names if self.model is not None else {}
+
+    def reset(self, annotate=False, motion_gate=True, trackers=None, low_threshold=None):
+        self.annotate = annotate
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.trackers = trackers or {}
+        self.last_detections = {}
+        # weak boxes are only fetched when a tracker can use them to keep a track alive
+        self.predict_threshold = low_threshold if self.trackers and low_threshold else self.confidence_threshold
+
+    def detect(self, batch):
+        # static scenes reuse the last boxes; between detector runs each camera's tracker carries them forward
+        moving = self.motion_gate.select(batch) if self.motion_gate else batch
+        due = [(camera_id, frame) for camera_id, frame in moving
+               if camera_id not in self.trackers or self.trackers[camera_id].detection_due()]
+        predictions = self.predict(due)
+        moved = {camera_id for camera_id, _ in moving}
+
+        outputs = []
+        for camera_id, frame in batch:
+            tracker = self.trackers.get(camera_id)
+            if camera_id in predictions:
+                detections = predictions[camera_id]
+                if tracker:
+                    # each object is counted once, when its track is confirmed
+                    detections, counted = tracker.update(detections)
+                else:
+                    counted = detections
+                self.record(counted, camera_id)
+            elif tracker and camera_id in moved:
+                detections = tracker.predict()
+            else:
+                detections = self.last_detections.get(camera_id, extract_detections(None))
+            self.last_detections[camera_id] = detections
+            outputs.append((camera_id, frame, detections))
+        return outputs
+
+    def predict(self, batch):
+        if not batch or self.model is None:
+            return {}
+
+        try:
+            results = self.model.predict([frame for _, frame in batch], conf=self.predict_threshold, verbose=False)
+        except Exception as e:
+            logger.warning(f"detection failed, sending frames without boxes: {e}")
+            return {}
+
+        predictions = {}
+        for (camera_id, _), result in zip(batch, results):
+            try:
+                predictions[camera_id] = extract_detections(result)
+            except Exception as e:
+                logger.warning(f"reading detections from {camera_id} failed: {e}")
+                predictions[camera_id] = extract_detections(None)
+        return predictions
+
+    def encode(self, item, **fields):
+        camera_id, frame, detections = item
+
+        # boxes are drawn by the client unless server-side annotation was asked for
+        annotated = self.annotate
+        if annotated:
+            started = time.perf_counter()
+            try:
+                frame = draw_detections(frame, detections, self.names)
+                self.metrics.observe('annotation', time.perf_counter() - started)
+            except Exception as e:
+                logger.warning(f"annotation failed, sending the original frame: {e}")
+                annotated = False
+
+        started = time.perf_counter()
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        self.metrics.observe('encode', time.perf_counter() - started)
+        detections = detection_dicts(detections, self.names, **fields) if len(detections) else []
+        return buffer.tobytes(), detections, {'frame_size': [frame.shape[1], frame.shape[0]], 'annotated': annotated}
+
+
+class RateController:
+    # paces inference to the target FPS, or to the slowest paced stage when that cannot keep up;
+    # capture latency is only reported, since a camera blocking in read() does not hold up inference
+    def __init__(self, target_fps=TARGET_FPS, smoothing=LATENCY_SMOOTHING, paced_stages=PACED_STAGES):
+        self.target_fps = target_fps
+        self.smoothing = smoothing
+        self.paced_stages = paced_stages
+        # recorded from the capture, inference and encode threads while pace() and stats() read it
+        self.lock = threading.Lock()
+        self.latency = {}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            previous = self.latency.get(stage)
+            self.latency[stage] = seconds if previous is None else previous + self.smoothing * (seconds - previous)
+
+    @property
+    def interval(self):
+        target = 1.0 / self.target_fps if self.target_fps else 0.0
+        with self.lock:
+            return max([target] + [seconds for stage, seconds in self.latency.items() if stage in self.paced_stages])
+
+    def pace(self, started, stopped):
+        remaining = started + self.interval - time.perf_counter()
+        if remaining > 0:
+            stopped.wait(remaining)
+
+    def stats(self):
+        interval = self.interval
+        with self.lock:
+            latency = {stage: seconds * 1000 for stage, seconds in self.latency.items()}
+        return {
+            'target_fps': self.target_fps,
+            'inference_interval': interval,
+            'latency_ms': latency
+        }
+
+
+def mjpeg_frames(broadcaster, source_id, is_running, max_fps=None):
+    # raw JPEG parts for multipart/x-mixed-replace; each part replaces the previous image in the browser
+    sequence = 0
+    min_interval = 1.0 / max_fps if max_fps else 0
+    while is_running():
+        entry = broadcaster.wait(source_id, sequence)
+        if entry is None:
+            continue
+        sequence = entry['sequence']
+        jpeg = entry['jpeg']
+        yield (f'--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n'.encode('ascii')
+               + jpeg + b'\r\n')
+        if min_interval:
+            time.sleep(min_interval)
+
+
+class DetectionPipeline:
+    def __init__(self, sources, infer, encode, publish, queue_size=2, target_fps=TARGET_FPS, metrics=None):
+        # sources maps a source id to its read(); infer takes [(source_id, frame)] and returns one result per frame
+        self.sources = dict(sources)
+        self.infer = infer
+        self.encode = encode
+        self.publish = publish
+        self.rate = RateController(target_fps)
+        self.metrics = metrics or DetectionMetrics()
+        self.stopped = threading.Event()
+        self.ready = threading.Condition()
+        self.frames = {source_id: DropOldestQueue(queue_size, self.ready) for source_id in self.sources}
+        self.results = DropOldestQueue(queue_size * len(self.sources))
+        self.is_running = False
+        self.threads = []
+        self.published = 0
+        self.source_published = {source_id: 0 for source_id in self.sources}
+        self.batches = 0
+        self.meter = RateMeter()
+        self.source_meters = {source_id: RateMeter() for source_id in self.sources}
+
+    @property
+    def fps(self):
+        return self.meter.rate()
+
+    @property
+    def source_fps(self):
+        return {source_id: meter.rate() for source_id, meter in self.source_meters.items()}
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.stopped.clear()
+        self.threads = [
+            threading.Thread(target=self._capture_worker, args=(source_id, read),
+                             name=f'detection-capture-{source_id}', daemon=True)
+            for source_id, read in self.sources.items()
+        ]
+        self.threads += [
+            threading.Thread(target=self._inference_worker, name='detection-inference', daemon=True),
+            threading.Thread(target=self._encode_worker, name='detection-encode', daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        self.is_running = False
+        self.stopped.set()
+        for frames in self.frames.values():
+            frames.close()
+        self.results.close()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.threads = []
+
+    def _capture_worker(self, source_id, read):
+        # camera reads never wait on inference: stale frames are dropped from the queue instead
+        frames = self.frames[source_id]
+        while self.is_running:
+            try:
+                started = time.perf_counter()
+                frame = read()
+                elapsed = time.perf_counter() - started
+                self.rate.record('capture', elapsed)
+                self.metrics.observe('capture', elapsed)
+                if frame is None:
+                    time.sleep(0.01)
+                    continue
+                frames.put(frame)
+            except Exception as e:
+                logger.error(f"capture from {source_id} failed: {e}")
+                time.sleep(1)
+
+    def next_batch(self, timeout=0.5):
+        # the freshest frame of every source that has one goes into the same predict call
+        with self.ready:
+            if not any(len(frames) for frames in self.frames.values()):
+                self.ready.wait(timeout)
+            batch = []
+            for source_id, frames in self.frames.items():
+                frame = frames.get_nowait()
+                if frame is not None:
+                    batch.append((source_id, frame))
+            return batch
+
+    def _inference_worker(self):
+        while self.is_running:
+            batch = self.next_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                results = self.infer(batch)
+            except Exception as e:
+                logger.error(f"inference failed: {e}")
+                results = []
+            elapsed = time.perf_counter() - started
+            self.rate.record('inference', elapsed)
+            self.metrics.observe('inference', elapsed)
+            if results:
+                self.batches += 1
+            for (source_id, _), result in zip(batch, results):
+                self.results.put((source_id, result))
+            # frames captured while we wait are dropped, so an idle interval costs no CPU
+            self.rate.pace(started, self.stopped)
+
+    def _encode_worker(self):
+        while self.is_running:
+            item = self.results.get(timeout=0.5)
+            if item is None:
+                continue
+            source_id, result = item
+            started = time.perf_counter()
+            try:
+                payload = self.encode(result)
+                emit_started = time.perf_counter()
+                self._publish(source_id, payload)
+                self.metrics.observe('emit', time.perf_counter() - emit_started)
+            except Exception as e:
+                logger.error(f"encode for {source_id} failed: {e}")
+            self.rate.record('encode', time.perf_counter() - started)
+
+    def _publish(self, source_id, payload):
+        self.publish(source_id, payload)
+        self.published += 1
+        self.source_published[source_id] += 1
+        self.meter.mark()
+        self.source_meters[source_id].mark()
+
+    def stats(self):
+        source_fps = self.source_fps
+        return {
+            **self.rate.stats(),
+            'fps': self.fps,
+            'published_frames': self.published,
+            'batches': self.batches,
+            'queued_results': len(self.results),
+            'dropped_results': self.results.dropped,
+            'sources': {
+                str(source_id): {
+                    'fps': source_fps[source_id],
+                    'published_frames': self.source_published[source_id],
+                    'queued_frames': len(frames),
+                    'dropped_frames': frames.dropped
+                }
+                for source_id, frames in self.frames.items()
+            }
+        }
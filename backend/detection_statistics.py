@@ -0,0 +1,124 @@
+import threading
+import time
+
+import numpy as np
+
+HISTOGRAM_EDGES = np.linspace(0, 1, 21)
+# name: (window seconds, bucket seconds)
+STATISTICS_WINDOWS = {'last_minute': (60, 1), 'last_hour': (3600, 60)}
+
+
+def confidence_bins(confidence):
+    # same bins as np.histogram, whose last bin also holds a confidence of exactly 1
+    return np.clip(np.searchsorted(HISTOGRAM_EDGES, confidence, side='right') - 1, 0, len(HISTOGRAM_EDGES) - 2)
+
+
+class RollingCounter:
+    # a ring of time buckets; a bucket is cleared when its slot comes round again, so nothing is ever scanned or expired
+    def __init__(self, window, resolution):
+        self.window = window
+        self.resolution = resolution
+        self.slots = int(window // resolution)
+        self.epochs = np.full(self.slots, -1, dtype=np.int64)
+        self.totals = np.zeros(self.slots, dtype=np.int64)
+        self.confidence_sums = np.zeros(self.slots)
+        self.classes = {}
+
+    def add(self, now, counts, confidence_sum):
+        epoch = int(now // self.resolution)
+        slot = epoch % self.slots
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.totals[slot] = 0
+            self.confidence_sums[slot] = 0
+            for class_counts in self.classes.values():
+                class_counts[slot] = 0
+        self.totals[slot] += sum(counts.values())
+        self.confidence_sums[slot] += confidence_sum
+        for class_name, count in counts.items():
+            self.classes.setdefault(class_name, np.zeros(self.slots, dtype=np.int64))[slot] += count
+
+    def summary(self, now, started):
+        epoch = int(now // self.resolution)
+        live = (self.epochs > epoch - self.slots) & (self.epochs <= epoch)
+        total = int(self.totals[live].sum())
+        # a session younger than the window is rated over the time it has actually run
+        elapsed = min(self.window, now - started)
+        per_class = {class_name: int(class_counts[live].sum()) for class_name, class_counts in self.classes.items()}
+        return {
+            'window_seconds': self.window,
+            'total_detections': total,
+            'plastic_types': {class_name: count for class_name, count in per_class.items() if count},
+            'detections_per_minute': total / elapsed * 60 if elapsed > 0 else 0.0,
+            'detection_confidence_avg': float(self.confidence_sums[live].sum()) / total if total else 0.0
+        }
+
+
+class DetectionStatistics:
+    # written by the inference thread and read by request threads; everything shared sits behind one lock,
+    # and the numpy work of a frame is done before the lock is taken
+    def __init__(self, session_start_time=None, windows=STATISTICS_WINDOWS):
+        self.window_sizes = windows
+        self.lock = threading.Lock()
+        self.reset(session_start_time)
+
+    def reset(self, session_start_time=None):
+        windows = {name: RollingCounter(window, resolution) for name, (window, resolution) in self.window_sizes.items()}
+        with self.lock:
+            self.session_start_time = session_start_time
+            self.started = time.time()
+            self.total = 0
+            self.confidence_sum = 0.0
+            self.counts = {}
+            self.confidence_sums = {}
+            self.histograms = {}
+            self.windows = windows
+
+    def record(self, detections, names, now=None):
+        if not len(detections):
+            return
+        now = time.time() if now is None else now
+
+        confidence = detections['confidence'].astype(float)
+        class_ids, inverse = np.unique(detections['class_id'], return_inverse=True)
+        class_names = [names[class_id] for class_id in class_ids.tolist()]
+        counts = dict(zip(class_names, np.bincount(inverse).tolist()))
+        sums = np.bincount(inverse, weights=confidence).tolist()
+        histograms = np.zeros((len(class_ids), len(HISTOGRAM_EDGES) - 1), dtype=np.int64)
+        np.add.at(histograms, (inverse, confidence_bins(confidence)), 1)
+        confidence_sum = float(confidence.sum())
+
+        with self.lock:
+            self.total += len(detections)
+            self.confidence_sum += confidence_sum
+            for class_name, class_sum, histogram in zip(class_names, sums, histograms):
+                self.counts[class_name] = self.counts.get(class_name, 0) + counts[class_name]
+                self.confidence_sums[class_name] = self.confidence_sums.get(class_name, 0.0) + class_sum
+                if class_name in self.histograms:
+                    self.histograms[class_name] += histogram
+                else:
+                    self.histograms[class_name] = histogram
+            for window in self.windows.values():
+                window.add(now, counts, confidence_sum)
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            total, confidence_sum = self.total, self.confidence_sum
+            counts, confidence_sums = dict(self.counts), dict(self.confidence_sums)
+            histograms = {class_name: histogram.tolist() for class_name, histogram in self.histograms.items()}
+            windows = {name: window.summary(now, self.started) for name, window in self.windows.items()}
+            session_start_time = self.session_start_time
+
+        return {
+            'total_detections': total,
+            'plastic_types': counts,
+            'detection_confidence_avg': confidence_sum / total if total else 0.0,
+            'session_start_time': session_start_time,
+            'class_confidence_avg': {class_name: confidence_sums[class_name] / count for class_name, count in counts.items()},
+            'confidence_histograms': {
+                'bin_edges': HISTOGRAM_EDGES.round(2).tolist(),
+                'classes': histograms
+            },
+            'windows': windows
+        }
@@ -0,0 +1,237 @@
+import numpy as np
+from scipy import stats
+from scipy.optimize import curve_fit
+
+PARAMETER_NAMES = ('max_conc', 'growth_rate', 'lag_time')
+KINETIC_MODELS = ('gompertz', 'logistic')
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-10
+
+
+def gompertz(t, max_conc, growth_rate, lag_time):
+    return max_conc * np.exp(-np.exp(growth_rate * np.e / max_conc * (lag_time - t) + 1))
+
+
+def logistic(t, max_conc, growth_rate, lag_time):
+    return max_conc / (1 + np.exp(4 * growth_rate / max_conc * (lag_time - t) + 2))
+
+
+MODEL_FUNCS = {'gompertz': gompertz, 'logistic': logistic}
+
+
+def harvest_time(model, params, fraction=0.95):
+    # time at which the curve reaches the given fraction of max_conc
+    max_conc, growth_rate, lag_time = (params[..., i] for i in range(3))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if model == 'gompertz':
+            return lag_time - max_conc / (growth_rate * np.e) * (np.log(-np.log(fraction)) - 1)
+        return lag_time - max_conc / (4 * growth_rate) * (np.log(1 / fraction - 1) - 2)
+
+
+def evaluate(model, params, t):
+    # params (R, 3) against times (T,) -> (R, T)
+    p = params[:, :, None]
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        return MODEL_FUNCS[model](t[None, :], p[:, 0], p[:, 1], p[:, 2])
+
+
+def jacobian(model, params, t):
+    steps = 1e-6 * np.maximum(np.abs(params), 1e-3)
+    columns = []
+    for i in range(params.shape[1]):
+        shift = np.zeros_like(params)
+        shift[:, i] = steps[:, i]
+        columns.append((evaluate(model, params + shift, t) - evaluate(model, params - shift, t)) / (2 * steps[:, i, None]))
+    return np.stack(columns, axis=-1)
+
+
+def initial_guess(t, Y):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        y_max = np.nanmax(Y, axis=1)
+        slopes = np.diff(Y, axis=1) / np.diff(t)[None, :]
+        slopes = np.where(np.isnan(slopes), -np.inf, slopes)
+        steepest = np.argmax(slopes, axis=1)
+        rows = np.arange(len(Y))
+        growth_rate = slopes[rows, steepest]
+        growth_rate = np.where(np.isfinite(growth_rate) & (growth_rate > 0), growth_rate, (y_max + 1e-9) / max(np.ptp(t), 1e-9))
+
+        # the lag is where the tangent at the steepest point crosses zero
+        y_mid = np.nan_to_num(Y[rows, steepest])
+        lag_time = np.clip(t[steepest] - y_mid / growth_rate, t.min(), t.max())
+
+    max_conc = np.where(np.isfinite(y_max) & (y_max > 0), y_max * 1.05, 1.0)
+    return np.column_stack([max_conc, np.maximum(growth_rate, 1e-6), lag_time])
+
+
+def constrain(params, t):
+    span = max(np.ptp(t), 1e-9)
+    params[:, 0] = np.maximum(params[:, 0], 1e-9)
+    params[:, 1] = np.maximum(params[:, 1], 1e-9)
+    params[:, 2] = np.clip(params[:, 2], t.min() - span, t.max() + span)
+    return params
+
+
+def batched_least_squares(model, t, Y, p0):
+    # Levenberg-Marquardt stepped for every culture at once; missing points carry zero weight
+    weights = (~np.isnan(Y)).astype(float)
+    target = np.nan_to_num(Y)
+
+    def residuals(params, rows):
+        return np.nan_to_num((evaluate(model, params, t) - target[rows]) * weights[rows], nan=1e6, posinf=1e6, neginf=-1e6)
+
+    params = constrain(p0.copy(), t)
+    r = residuals(params, slice(None))
+    cost = (r ** 2).sum(axis=1)
+    damping = np.full(len(Y), 1e-3)
+    active = np.ones(len(Y), dtype=bool)
+
+    for _ in range(MAX_ITERATIONS):
+        idx = np.flatnonzero(active)
+        if not len(idx):
+            break
+
+        J = np.nan_to_num(jacobian(model, params[idx], t)) * weights[idx, :, None]
+        JTJ = np.einsum('rti,rtj->rij', J, J)
+        gradient = np.einsum('rti,rt->ri', J, r[idx])
+        scale = np.maximum(np.einsum('rii->ri', JTJ), 1e-12)
+        system = JTJ + (damping[idx, None] * scale)[:, :, None] * np.eye(3)
+        step = -np.linalg.solve(system, gradient[:, :, None])[:, :, 0]
+
+        trial = constrain(params[idx] + step, t)
+        trial_r = residuals(trial, idx)
+        trial_cost = (trial_r ** 2).sum(axis=1)
+
+        better = trial_cost < cost[idx]
+        improvement = (cost[idx] - trial_cost) / np.maximum(cost[idx], 1e-300)
+        accepted = idx[better]
+        params[accepted] = trial[better]
+        r[accepted] = trial_r[better]
+        cost[accepted] = trial_cost[better]
+        damping[idx] = np.where(better, damping[idx] * 0.3, damping[idx] * 10)
+
+        done = (better & (improvement < TOLERANCE)) | (damping[idx] > 1e10)
+        active[idx[done]] = False
+
+    return params, cost, ~active
+
+
+def fit_model(model, t, Y):
+    t = np.asarray(t, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    order = np.argsort(t)
+    t, Y = t[order], Y[:, order]
+
+    n = (~np.isnan(Y)).sum(axis=1)
+    params, rss, converged = batched_least_squares(model, t, Y, initial_guess(t, Y))
+
+    # the rare culture the batched solver leaves behind gets a bounded scipy fit
+    for i in np.flatnonzero(~converged & (n >= 3)):
+        mask = ~np.isnan(Y[i])
+        try:
+            popt, _ = curve_fit(MODEL_FUNCS[model], t[mask], Y[i, mask], p0=params[i], maxfev=5000,
+                                bounds=([1e-9, 1e-9, -np.inf], [np.inf, np.inf, np.inf]))
+            residual = MODEL_FUNCS[model](t[mask], *popt) - Y[i, mask]
+            params[i], rss[i], converged[i] = popt, float(residual @ residual), True
+        except Exception:
+            continue
+
+    dof = n - len(PARAMETER_NAMES)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residual_var = np.where(dof > 0, rss / dof, np.nan)
+    J = jacobian(model, params, t) * (~np.isnan(Y))[:, :, None]
+    cov = np.linalg.pinv(np.einsum('rti,rtj->rij', J, J)) * residual_var[:, None, None]
+
+    params[n < 3] = np.nan
+    return {
+        'model': model,
+        'params': params,
+        'cov': cov,
+        'rss': rss,
+        'n': n,
+        'dof': dof,
+        'residual_var': residual_var,
+        'converged': converged & (n >= 3)
+    }
+
+
+def forecast(fit, times, level=0.95):
+    times = np.asarray(times, dtype=float)
+    params = fit['params']
+    mean = evaluate(fit['model'], params, times)
+
+    # delta method: propagate the parameter covariance through the model gradient
+    G = jacobian(fit['model'], np.nan_to_num(params), times)
+    mean_var = np.maximum(np.einsum('rfi,rij,rfj->rf', G, fit['cov'], G), 0)
+    with np.errstate(invalid='ignore'):
+        q = stats.t.ppf((1 + level) / 2, np.where(fit['dof'] > 0, fit['dof'], np.nan))[:, None]
+    half = q * np.sqrt(mean_var)
+    prediction_half = q * np.sqrt(mean_var + fit['residual_var'][:, None])
+
+    return {
+        'mean': mean,
+        'lower': mean - half,
+        'upper': mean + half,
+        'prediction_lower': mean - prediction_half,
+        'prediction_upper': mean + prediction_half
+    }
+
+
+def fit_kinetics(t, Y, models=KINETIC_MODELS):
+    fits = {model: fit_model(model, t, Y) for model in models}
+    rss = np.column_stack([np.where(fits[model]['converged'], fits[model]['rss'], np.inf) for model in models])
+    best = np.argmin(rss, axis=1)
+    return fits, [models[i] if np.isfinite(rss[row, i]) else None for row, i in enumerate(best)]
+
+
+def json_values(values):
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def kinetics_report(t, Y, names, forecast_times, level=0.95, fraction=0.95):
+    fits, best = fit_kinetics(t, Y)
+    forecasts = {model: forecast(fit, forecast_times, level) for model, fit in fits.items()}
+    harvest = {model: harvest_time(model, fit['params'], fraction) for model, fit in fits.items()}
+
+    cultures = []
+    for i, name in enumerate(names):
+        model = best[i]
+        if model is None:
+            cultures.append({'name': name, 'model': None, 'data_points': int(fits[KINETIC_MODELS[0]]['n'][i])})
+            continue
+
+        fit = fits[model]
+        n = int(fit['n'][i])
+        aic = n * np.log(max(fit['rss'][i], 1e-300) / n) + 2 * len(PARAMETER_NAMES)
+        cultures.append({
+            'name': name,
+            'model': model,
+            'data_points': n,
+            'parameters': dict(zip(PARAMETER_NAMES, json_values(fit['params'][i]))),
+            'standard_errors': dict(zip(PARAMETER_NAMES, json_values(np.sqrt(np.diag(fit['cov'][i]))))),
+            'rmse': json_values([np.sqrt(fit['rss'][i] / n)])[0],
+            'aic': json_values([aic])[0],
+            'harvest_time': json_values([harvest[model][i]])[0],
+            'forecast': {key: json_values(values[i]) for key, values in forecasts[model].items()}
+        })
+
+    fitted = [i for i, model in enumerate(best) if model is not None]
+    summary = {'model_counts': {model: best.count(model) for model in KINETIC_MODELS if model in best}}
+    if fitted:
+        means = np.array([forecasts[best[i]]['mean'][i] for i in fitted])
+        harvest_times = np.array([harvest[best[i]][i] for i in fitted])
+        tail = (1 - level) / 2 * 100
+        summary.update({
+            'forecast_median': json_values(np.nanmedian(means, axis=0)),
+            'forecast_lower': json_values(np.nanpercentile(means, tail, axis=0)),
+            'forecast_upper': json_values(np.nanpercentile(means, 100 - tail, axis=0)),
+            'harvest_time_median': json_values([np.nanmedian(harvest_times)])[0]
+        })
+
+    return {
+        'forecast_times': json_values(forecast_times),
+        'level': level,
+        'harvest_fraction': fraction,
+        'cultures': cultures,
+        'summary': summary
+    }
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import threading
+
+from flask import request, send_file, make_response
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MAX_FILE_ETAGS = 4096
+
+file_etags = {}
+file_etags_lock = threading.Lock()
+
+
+def file_etag(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with file_etags_lock:
+        etag = file_etags.get(key)
+    if etag is not None:
+        return etag
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    etag = digest.hexdigest()
+
+    with file_etags_lock:
+        if len(file_etags) >= MAX_FILE_ETAGS:
+            file_etags.clear()
+        file_etags[key] = etag
+    return etag
+
+
+def not_modified(etag, cache_control):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def cache_control_header(max_age, immutable=False, private=False):
+    if max_age == 0:
+        return 'private, no-cache' if private else 'no-cache'
+    parts = ['private' if private else 'public', f'max-age={max_age}']
+    if immutable:
+        parts.append('immutable')
+    return ', '.join(parts)
+
+
+def send_cached_file(path, mimetype=None, max_age=0, immutable=False):
+    etag = file_etag(path)
+    cache_control = cache_control_header(max_age, immutable)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag, cache_control)
+
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def conditional_response(etag, produce, cache_control='no-cache'):
+    # produce() is only called when the client's copy is stale, so a 304 skips rendering entirely
+    if request.if_none_match.contains(etag):
+        return not_modified(etag, cache_control)
+
+    response = make_response(produce())
+    if response.status_code == 200:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,305 @@
+import argparse
+import ast
+import glob
+import logging
+import os
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from detection_pipeline import pairwise_iou
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import openvino as ov
+except ImportError:
+    ov = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_BACKENDS = ('pytorch', 'onnx', 'openvino')
+MODEL_BACKEND = os.environ.get('DETECTION_BACKEND', 'pytorch').lower()
+MODEL_INT8 = os.environ.get('DETECTION_INT8', '').lower() in ('1', 'true', 'yes')
+MODEL_THREADS = int(os.environ.get('DETECTION_THREADS', 0))
+IMAGE_SIZE = 640
+NMS_IOU = 0.7
+MAX_DETECTIONS = 300
+CLASS_OFFSET = 7680
+PAD_VALUE = 114
+
+
+def exported_path(model_path, backend, int8=False):
+    stem = os.path.splitext(model_path)[0]
+    if backend == 'onnx':
+        return f'{stem}.int8.onnx' if int8 else f'{stem}.onnx'
+    if backend == 'openvino':
+        return f'{stem}_int8_openvino_model' if int8 else f'{stem}_openvino_model'
+    return model_path
+
+
+def parse_names(value):
+    # ultralytics stores the class map as a python-literal string in the exported metadata
+    if isinstance(value, str):
+        value = ast.literal_eval(value)
+    return {int(class_id): name for class_id, name in (value or {}).items()}
+
+
+def letterbox(frame, size):
+    h, w = frame.shape[:2]
+    ratio = min(size[0] / h, size[1] / w)
+    new_w, new_h = round(w * ratio), round(h * ratio)
+    top, left = round((size[0] - new_h) / 2 - 0.1), round((size[1] - new_w) / 2 - 0.1)
+    canvas = np.full((size[0], size[1], 3), PAD_VALUE, dtype=np.uint8)
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas[top:top + new_h, left:left + new_w] = frame
+    return canvas, ratio, (left, top)
+
+
+def preprocess(frames, size):
+    # the same letterbox as ultralytics, so exported models see what the PyTorch model saw
+    images, scales = [], []
+    for frame in frames:
+        image, ratio, pad = letterbox(frame, size)
+        images.append(image)
+        scales.append((ratio, pad))
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255, scales
+
+
+def non_max_suppression(boxes, scores, iou_threshold):
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        overlap = pairwise_iou(boxes[best], boxes[order[1:]])[0]
+        order = order[1:][overlap <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+def postprocess(output, frames, scales, conf, iou=NMS_IOU, max_det=MAX_DETECTIONS):
+    # YOLOv8 heads emit (batch, 4 + classes, anchors) with centre-size boxes and per-class scores
+    boxes_per_frame = []
+    for prediction, frame, (ratio, (left, top)) in zip(output, frames, scales):
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), class_ids]
+        keep = confidence > conf
+        centre, size = prediction[keep, :2], prediction[keep, 2:4]
+        boxes = np.hstack([centre - size / 2, centre + size / 2])
+        class_ids, confidence = class_ids[keep], confidence[keep]
+
+        # one NMS pass for all classes: shifting each class apart keeps boxes of different classes from suppressing each other
+        kept = non_max_suppression(boxes + class_ids[:, None] * CLASS_OFFSET, confidence, iou)[:max_det]
+        boxes = (boxes[kept] - [left, top, left, top]) / ratio
+        boxes = np.clip(boxes, 0, [frame.shape[1], frame.shape[0], frame.shape[1], frame.shape[0]])
+        boxes_per_frame.append(ExportedBoxes(boxes, confidence[kept], class_ids[kept]))
+    return boxes_per_frame
+
+
+class ExportedBoxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy.astype(np.float32)
+        self.conf = conf.astype(np.float32)
+        self.cls = cls.astype(np.float32)
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, index):
+        return ExportedBoxes(self.xyxy[index], self.conf[index], self.cls[index])
+
+
+class ExportedResult:
+    def __init__(self, frame, boxes, names):
+        self.orig_img = frame
+        self.boxes = boxes
+        self.names = names
+
+    def __getitem__(self, index):
+        return ExportedResult(self.orig_img, self.boxes[index], self.names)
+
+    def plot(self):
+        image = self.orig_img.copy()
+        for (x1, y1, x2, y2), confidence, class_id in zip(self.boxes.xyxy.astype(int).tolist(), self.boxes.conf.tolist(),
+                                                          self.boxes.cls.astype(int).tolist()):
+            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(image, f'{self.names.get(class_id, class_id)} {confidence:.2f}', (x1, max(y1 - 5, 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        return image
+
+
+class ExportedModel(ABC):
+    # predict() mirrors the slice of the ultralytics API the services use: frames in, results with boxes out
+    def __init__(self, input_shape, names, backend_info):
+        batch, _, height, width = input_shape
+        self.static_batch = batch if isinstance(batch, int) and batch > 0 else None
+        self.image_size = (height if isinstance(height, int) and height > 0 else IMAGE_SIZE,
+                           width if isinstance(width, int) and width > 0 else IMAGE_SIZE)
+        self.names = names
+        self.backend_info = backend_info
+
+    @abstractmethod
+    def run(self, batch):
+        pass
+
+    def predict(self, frames, conf=0.25, iou=NMS_IOU, verbose=False):
+        frames = frames if isinstance(frames, list) else [frames]
+        batch, scales = preprocess(frames, self.image_size)
+        if self.static_batch:
+            output = np.concatenate([self.run(batch[i:i + self.static_batch])
+                                     for i in range(0, len(batch), self.static_batch)])
+        else:
+            output = self.run(batch)
+        boxes = postprocess(output, frames, scales, conf, iou)
+        return [ExportedResult(frame, frame_boxes, self.names) for frame, frame_boxes in zip(frames, boxes)]
+
+
+class OnnxRuntimeModel(ExportedModel):
+    def __init__(self, path, threads=0, backend_info=None):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        names = parse_names(self.session.get_modelmeta().custom_metadata_map.get('names'))
+        super().__init__(model_input.shape, names, backend_info)
+
+    def run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoModel(ExportedModel):
+    def __init__(self, path, threads=0, backend_info=None):
+        core = ov.Core()
+        xml = path if path.endswith('.xml') else glob.glob(os.path.join(path, '*.xml'))[0]
+        model = core.read_model(xml)
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        self.compiled = core.compile_model(model, 'CPU', config)
+
+        metadata = os.path.join(os.path.dirname(xml), 'metadata.yaml')
+        names = {}
+        if os.path.exists(metadata):
+            import yaml
+            with open(metadata, 'r', encoding='utf-8') as f:
+                names = parse_names((yaml.safe_load(f) or {}).get('names'))
+        shape = [dimension.get_length() if dimension.is_static else None for dimension in model.inputs[0].get_partial_shape()]
+        super().__init__(shape, names, backend_info)
+
+    def run(self, batch):
+        return self.compiled(batch)[self.compiled.output(0)]
+
+
+def quantize_onnx(source, target, calibration=None):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    import onnx
+
+    images = sorted(path for path in glob.glob(os.path.join(calibration, '*'))
+                    if os.path.splitext(path)[1].lower() in ('.jpg', '.jpeg', '.png', '.bmp')) if calibration else []
+    if images:
+        session = ort.InferenceSession(source, providers=['CPUExecutionProvider'])
+        model_input = session.get_inputs()[0]
+        size = tuple(d if isinstance(d, int) and d > 0 else IMAGE_SIZE for d in model_input.shape[2:])
+
+        class ImageReader(CalibrationDataReader):
+            def __init__(self):
+                self.paths = iter(images)
+
+            def get_next(self):
+                path = next(self.paths, None)
+                if path is None:
+                    return None
+                return {model_input.name: preprocess([cv2.imread(path)], size)[0]}
+
+        # static QDQ quantization calibrated on our own footage keeps activations in int8 as well
+        quantize_static(source, target, ImageReader(), quant_format=QuantFormat.QDQ, per_channel=True,
+                        weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+    else:
+        logger.warning("no calibration images, falling back to dynamic int8 quantization")
+        quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+
+    # quantization drops the ultralytics metadata that carries the class names
+    original, quantized = onnx.load(source), onnx.load(target)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(original.metadata_props)
+    onnx.save(quantized, target)
+    return target
+
+
+def export_model(model_path, backend, int8=False, calibration=None, image_size=IMAGE_SIZE):
+    # ultralytics is only needed to export, so ONNX/OpenVINO-only deployments can run without it
+    from ultralytics import YOLO
+
+    target = exported_path(model_path, backend, int8)
+    if backend == 'onnx':
+        source = exported_path(model_path, 'onnx')
+        if not os.path.exists(source):
+            YOLO(model_path).export(format='onnx', imgsz=image_size, dynamic=True, simplify=True)
+        return quantize_onnx(source, target, calibration) if int8 else source
+    if backend == 'openvino':
+        # ultralytics calibrates openvino int8 through NNCF on a dataset yaml
+        YOLO(model_path).export(format='openvino', imgsz=image_size, dynamic=True, int8=int8, data=calibration)
+        return target
+    raise ValueError(f"nothing to export for backend {backend}")
+
+
+def load_model(model_path, backend=MODEL_BACKEND, int8=MODEL_INT8, threads=MODEL_THREADS):
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"backend must be one of {', '.join(MODEL_BACKENDS)}")
+
+    info = {'backend': backend, 'int8': int8 and backend != 'pytorch', 'threads': threads or None}
+    if backend != 'pytorch':
+        runtime = ort if backend == 'onnx' else ov
+        try:
+            if runtime is None:
+                raise RuntimeError(f"the {backend} runtime is not installed")
+            path = exported_path(model_path, backend, int8)
+            if not os.path.exists(path):
+                logger.info(f"exporting {model_path} for {backend}")
+                path = export_model(model_path, backend, int8)
+            model_class = OnnxRuntimeModel if backend == 'onnx' else OpenVinoModel
+            model = model_class(path, threads, dict(info, path=path))
+            logger.info(f"{backend} model loaded from {path}")
+            return model
+        except Exception as e:
+            logger.warning(f"{backend} backend unavailable, using PyTorch: {e}")
+            info = {'backend': 'pytorch', 'int8': False, 'threads': threads or None}
+
+    from ultralytics import YOLO
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    model = YOLO(model_path)
+    model.backend_info = dict(info, path=model_path)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export best.pt for the ONNX Runtime or OpenVINO backend')
+    parser.add_argument('backend', choices=MODEL_BACKENDS[1:])
+    parser.add_argument('--model', default=os.environ.get('DETECTION_MODEL_PATH', r".\best.pt"))
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--calibration', help='image directory (onnx) or dataset yaml (openvino) for int8 calibration')
+    parser.add_argument('--image-size', type=int, default=IMAGE_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    path = export_model(args.model, args.backend, args.int8, args.calibration, args.image_size)
+    logger.info(f"exported {args.model} to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import os
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from detection_pipeline import pairwise_iou
+
+TRACKER_DETECT_INTERVAL = int(os.environ.get('DETECTION_TRACKER_INTERVAL', 3))
+MAX_DETECT_INTERVAL = 30
+TRACKER_HIGH_THRESHOLD = 0.5
+TRACKER_LOW_THRESHOLD = 0.1
+TRACKER_MATCH_IOU = 0.3
+TRACKER_LOW_MATCH_IOU = 0.5
+TRACKER_MIN_HITS = 2
+TRACKER_MAX_LOST = int(os.environ.get('DETECTION_TRACKER_MAX_LOST', 30))
+
+POSITION_WEIGHT = 1 / 20
+VELOCITY_WEIGHT = 1 / 160
+
+TRACK_DTYPE = np.dtype([('bbox', 'f4', (4,)), ('confidence', 'f4'), ('class_id', 'i4'), ('track_id', 'i4')])
+TRACK_STATE_DTYPE = np.dtype([('track_id', 'i4'), ('class_id', 'i4'), ('confidence', 'f4'), ('hits', 'i4'),
+                              ('missed', 'i4'), ('lost', 'i4'), ('confirmed', '?')])
+
+# constant-velocity model over (cx, cy, w, h); one step is one pipeline frame
+TRANSITION = np.eye(8)
+TRANSITION[:4, 4:] = np.eye(4)
+MEASUREMENT = np.eye(4, 8)
+
+
+def detect_interval_from(data):
+    detect_interval = int(data.get('detect_interval', TRACKER_DETECT_INTERVAL))
+    if not 1 <= detect_interval <= MAX_DETECT_INTERVAL:
+        raise ValueError(f"detect_interval must be between 1 and {MAX_DETECT_INTERVAL}")
+    return detect_interval
+
+
+def xyxy_to_xywh(boxes):
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    return np.column_stack([(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]])
+
+
+def xywh_to_xyxy(boxes):
+    return np.column_stack([boxes[:, :2] - boxes[:, 2:4] / 2, boxes[:, :2] + boxes[:, 2:4] / 2])
+
+
+def size_noise(mean, position, velocity):
+    # noise scales with box size so near and far objects are tracked alike
+    w, h = mean[:, 2], mean[:, 3]
+    return np.column_stack([position * w, position * h, position * w, position * h,
+                            velocity * w, velocity * h, velocity * w, velocity * h]) ** 2
+
+
+def kalman_initiate(measurements):
+    mean = np.hstack([measurements, np.zeros_like(measurements)])
+    cov = np.zeros((len(mean), 8, 8))
+    variance = size_noise(mean, 2 * POSITION_WEIGHT, 10 * VELOCITY_WEIGHT)
+    cov[:, range(8), range(8)] = variance
+    return mean, cov
+
+
+def kalman_predict(mean, cov):
+    noise = np.zeros_like(cov)
+    noise[:, range(8), range(8)] = size_noise(mean, POSITION_WEIGHT, VELOCITY_WEIGHT)
+    return mean @ TRANSITION.T, TRANSITION @ cov @ TRANSITION.T + noise
+
+
+def kalman_update(mean, cov, measurements):
+    noise = np.zeros((len(mean), 4, 4))
+    noise[:, range(4), range(4)] = size_noise(mean, POSITION_WEIGHT, VELOCITY_WEIGHT)[:, :4]
+    projected = MEASUREMENT @ cov @ MEASUREMENT.T + noise
+    gain = cov @ MEASUREMENT.T @ np.linalg.inv(projected)
+    innovation = measurements - mean @ MEASUREMENT.T
+    mean = mean + np.einsum('rij,rj->ri', gain, innovation)
+    cov = cov - gain @ projected @ np.transpose(gain, (0, 2, 1))
+    return mean, cov
+
+
+class ObjectTracker:
+    # ByteTrack-style: confident boxes are matched first, weak ones only rescue existing tracks
+    def __init__(self, detect_interval=TRACKER_DETECT_INTERVAL, high_threshold=TRACKER_HIGH_THRESHOLD,
+                 low_threshold=TRACKER_LOW_THRESHOLD, min_hits=TRACKER_MIN_HITS, max_lost=TRACKER_MAX_LOST):
+        self.detect_interval = detect_interval
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.min_hits = min_hits
+        self.max_lost = max_lost
+        self.mean = np.empty((0, 8))
+        self.cov = np.empty((0, 8, 8))
+        self.state = np.empty(0, dtype=TRACK_STATE_DTYPE)
+        self.next_id = 1
+        self.frames_since_detection = 0
+
+    def detection_due(self):
+        return not len(self.state) or self.frames_since_detection + 1 >= self.detect_interval
+
+    def _advance(self):
+        if len(self.state):
+            self.mean, self.cov = kalman_predict(self.mean, self.cov)
+        self.state['lost'] += 1
+        self.frames_since_detection += 1
+
+    def _associate(self, tracks, detections, min_iou):
+        if not len(tracks) or not len(detections):
+            return [], list(tracks), list(range(len(detections)))
+
+        iou = pairwise_iou(xywh_to_xyxy(self.mean[tracks, :4]), detections['bbox'])
+        iou[self.state['class_id'][tracks][:, None] != detections['class_id'][None, :]] = 0
+        rows, cols = linear_sum_assignment(-iou)
+        keep = iou[rows, cols] >= min_iou
+        matches = list(zip(np.asarray(tracks)[rows[keep]].tolist(), cols[keep].tolist()))
+        matched_tracks = {track for track, _ in matches}
+        matched_detections = {detection for _, detection in matches}
+        return (matches, [track for track in tracks if track not in matched_tracks],
+                [detection for detection in range(len(detections)) if detection not in matched_detections])
+
+    def predict(self):
+        self._advance()
+        return self.detections()
+
+    def update(self, detections):
+        # returns the tracked boxes and the tracks confirmed by this update, each counted once in its lifetime
+        self._advance()
+        self.frames_since_detection = 0
+
+        high = detections[detections['confidence'] >= self.high_threshold]
+        low = detections[(detections['confidence'] >= self.low_threshold) & (detections['confidence'] < self.high_threshold)]
+        matches, unmatched, new = self._associate(list(range(len(self.state))), high, TRACKER_MATCH_IOU)
+        low_matches, unmatched, _ = self._associate(unmatched, low, TRACKER_LOW_MATCH_IOU)
+
+        for matched, source in ((matches, high), (low_matches, low)):
+            if not matched:
+                continue
+            tracks, rows = (np.array(index) for index in zip(*matched))
+            self.mean[tracks], self.cov[tracks] = kalman_update(self.mean[tracks], self.cov[tracks],
+                                                                xyxy_to_xywh(source['bbox'][rows]))
+            self.state['confidence'][tracks] = source['confidence'][rows]
+            self.state['hits'][tracks] += 1
+            self.state['missed'][tracks] = 0
+            self.state['lost'][tracks] = 0
+        self.state['missed'][unmatched] += 1
+
+        if new:
+            mean, cov = kalman_initiate(xyxy_to_xywh(high['bbox'][new]))
+            state = np.zeros(len(new), dtype=TRACK_STATE_DTYPE)
+            state['track_id'] = np.arange(self.next_id, self.next_id + len(new))
+            state['class_id'] = high['class_id'][new]
+            state['confidence'] = high['confidence'][new]
+            state['hits'] = 1
+            self.next_id += len(new)
+            self.mean = np.vstack([self.mean, mean])
+            self.cov = np.concatenate([self.cov, cov])
+            self.state = np.concatenate([self.state, state])
+
+        confirmed = ~self.state['confirmed'] & (self.state['hits'] >= self.min_hits)
+        self.state['confirmed'] |= confirmed
+        newly_confirmed = self._as_detections(confirmed)
+
+        # tentative tracks die on their first miss; confirmed ones survive occlusions up to max_lost frames
+        alive = np.where(self.state['confirmed'], self.state['lost'] <= self.max_lost, self.state['missed'] == 0)
+        self.mean, self.cov, self.state = self.mean[alive], self.cov[alive], self.state[alive]
+        return self.detections(), newly_confirmed
+
+    def _as_detections(self, mask):
+        detections = np.empty(int(np.count_nonzero(mask)), dtype=TRACK_DTYPE)
+        detections['bbox'] = xywh_to_xyxy(self.mean[mask, :4])
+        for field in ('confidence', 'class_id', 'track_id'):
+            detections[field] = self.state[field][mask]
+        return detections
+
+    def detections(self):
+        return self._as_detections(self.state['confirmed'] & (self.state['missed'] == 0))
+
+    def stats(self):
+        return {
+            'detect_interval': self.detect_interval,
+            'active_tracks': int(np.count_nonzero(self.state['confirmed'] & (self.state['missed'] == 0))),
+            'lost_tracks': int(np.count_nonzero(self.state['confirmed'] & (self.state['missed'] > 0))),
+            'tentative_tracks': int(np.count_nonzero(~self.state['confirmed']))
+        }
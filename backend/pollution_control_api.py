@@ -12,13 +12,18 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import json
 import os
+from data_parser import parse_pollution_data
+from expression_kinetics import PARAMETER_NAMES, fit_kinetics, kinetics_report
 
 app = Flask(__name__)
 CORS(app)
 
+POLLUTION_DATA_PATH = os.environ.get('POLLUTION_DATA_PATH',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'polludata.xlsx'))
+
 class PollutionControlModel:
-    def __init__(self):
-        
+    def __init__(self, data_path=POLLUTION_DATA_PATH):
+        self.data_path = data_path
         self.load_experimental_data()
         self.fit_models()
     
@@ -41,6 +46,40 @@ class PollutionControlModel:
             'time': [0, 3, 7, 14, 21],  
             'protein_conc': [0, 1.56, 3.06, 3.22, 3.25]  
         }
+        self.data_source = 'built-in'
+        
+        if not os.path.exists(self.data_path):
+            return
+        try:
+            workbook = parse_pollution_data(self.data_path)
+        except Exception as e:
+            self.data_source = f'built-in ({self.data_path} unreadable: {e})'
+            return
+        
+        # blocks missing from the workbook keep the built-in measurements
+        dosage = workbook['dosage_model']
+        if dosage.get('original_pb_concentration') and len(dosage['original_pb_concentration']) == len(dosage['treated_pb_amount']):
+            self.dose_data.update({
+                'pb_initial': dosage['original_pb_concentration'],
+                'pb_final': dosage['treated_pb_amount'],
+                'removal': dosage['difference'],
+                'protein_conc': dosage['protein_concentration'],
+                'time': dosage['treatment_time']
+            })
+        time_model = workbook['time_model']
+        if time_model.get('time_points') and len(time_model['time_points']) == len(time_model['pb_concentrations']):
+            self.time_data.update({
+                'time': time_model['time_points'],
+                'pb_conc': time_model['pb_concentrations'],
+                'protein_conc': time_model['protein_concentration']
+            })
+        expression = workbook['protein_expression']
+        if expression.get('time_points') and len(expression['time_points']) == len(expression['protein_concentrations']):
+            self.expression_data = {
+                'time': expression['time_points'],
+                'protein_conc': expression['protein_concentrations']
+            }
+        self.data_source = self.data_path
     
     def fit_models(self):
         time_min = np.array(self.time_data['time'])
@@ -70,11 +109,40 @@ class PollutionControlModel:
         self.avg_efficiency_30min = np.mean(removal_rates)
         print(f"Average 30-min efficiency from dose data: {self.avg_efficiency_30min:.3f}")
         
-        self.protein_params = {
-            'max_conc': 3.25,      
-            'growth_rate': 0.15,   
-            'lag_time': 2.0        
-        }
+        try:
+            fits, best = fit_kinetics(self.expression_data['time'], [self.expression_data['protein_conc']])
+            if best[0] is None:
+                raise ValueError('expression fit did not converge')
+            self.protein_model = best[0]
+            self.protein_params = dict(zip(PARAMETER_NAMES, fits[best[0]]['params'][0].tolist()))
+        except Exception:
+            self.protein_model = 'gompertz'
+            self.protein_params = {
+                'max_conc': 3.25,      
+                'growth_rate': 0.15,   
+                'lag_time': 2.0        
+            }
+    
+    def forecast_protein_expression(self, time=None, protein_conc=None, names=None, forecast_times=None,
+                                    level=0.95, fraction=0.95):
+        time = np.asarray(self.expression_data['time'] if time is None else time, dtype=float)
+        replicates = np.atleast_2d(np.asarray(self.expression_data['protein_conc'] if protein_conc is None else protein_conc,
+                                              dtype=float))
+        if replicates.shape[1] != len(time):
+            raise ValueError('each replicate needs one concentration per time point')
+        if len(time) < 4:
+            raise ValueError('need at least 4 time points')
+        
+        if names is None:
+            names = [f'culture-{i + 1}' for i in range(len(replicates))]
+        elif not isinstance(names, list) or len(names) != len(replicates):
+            raise ValueError('names must be a list with one name per replicate')
+        if forecast_times is None:
+            forecast_times = np.linspace(time.min(), time.max() * 2, 50)
+        forecast_times = np.atleast_1d(np.asarray(forecast_times, dtype=float))
+        if forecast_times.ndim != 1:
+            raise ValueError('forecast_times must be a list of times')
+        return kinetics_report(time, replicates, [str(name) for name in names], forecast_times, level=level, fraction=fraction)
     
     def exponential_decay_model(self, t, pb_initial, target_efficiency):
         c0_ref, k_ref, c_inf_ref = self.lead_params
@@ -270,12 +338,52 @@ def predict_treatment():
             'error': str(e)
         }), 500
 
+@app.route('/api/pollution-control/protein-forecast', methods=['GET', 'POST'])
+def forecast_protein():
+    try:
+        data = request.get_json(silent=True) or {}
+        level = float(data.get('level', 0.95))
+        fraction = float(data.get('fraction', 0.95))
+        
+        if not 0.5 <= level < 1 or not 0.5 <= fraction < 1:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid input parameters'
+            }), 400
+        
+        try:
+            report = model.forecast_protein_expression(
+                time=data.get('time'),
+                protein_conc=data.get('protein_conc'),
+                names=data.get('names'),
+                forecast_times=data.get('forecast_times'),
+                level=level,
+                fraction=fraction
+            )
+        except (ValueError, TypeError, IndexError) as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        report['success'] = True
+        return jsonify(report)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/pollution-control/experimental-data', methods=['GET'])
 def get_experimental_data():
     return jsonify({
         'dose_response': model.dose_data,
         'time_course': model.time_data,
-        'protein_expression': model.expression_data
+        'protein_expression': model.expression_data,
+        'data_source': model.data_source,
+        'protein_model': model.protein_model,
+        'protein_params': model.protein_params
     })
 
 @app.route('/api/pollution-control/health', methods=['GET'])
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -6,12 +6,34 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from io import BytesIO, StringIO
 import base64
+import functools
+import hashlib
+import inspect
 import json
+import math
 import os
+import pickle
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
 from datetime import datetime
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    # public from pandas 2.1; older releases only have the private one
+    from pandas._libs.tslibs.parsing import guess_datetime_format
 from scipy import stats
 from scipy.optimize import curve_fit
+from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.spatial.distance import squareform
 from sklearn.metrics import r2_score, mean_squared_error
+from dataset_store import dataset_store
+from expression_kinetics import kinetics_report
+from http_cache import conditional_response
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -22,40 +44,786 @@ CORS(app)
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+MAX_DATASETS = int(os.environ.get('PROTEIN_MAX_DATASETS', 32))
+MAX_DATASET_BYTES = int(os.environ.get('PROTEIN_MAX_DATASET_MB', 512)) * 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get('PROTEIN_MAX_UPLOAD_MB', 256)) * 1024 * 1024
+CSV_CHUNK_ROWS = int(os.environ.get('PROTEIN_CSV_CHUNK_ROWS', 20000))
+ANALYSIS_CACHE_SIZE = int(os.environ.get('PROTEIN_ANALYSIS_CACHE_SIZE', 256))
+ANALYSIS_CACHE_BYTES = int(os.environ.get('PROTEIN_ANALYSIS_CACHE_MB', 64)) * 1024 * 1024
+FIT_WORKERS = int(os.environ.get('PROTEIN_FIT_WORKERS', os.cpu_count() or 1))
+MIN_WELLS_FOR_POOL = 16
+MAX_BATCH_FILES = int(os.environ.get('PROTEIN_MAX_BATCH_FILES', 500))
+# uncompressed, summed over every file of a batch
+MAX_BATCH_BYTES = int(os.environ.get('PROTEIN_MAX_BATCH_MB', 1024)) * 1024 * 1024
+MAX_TRACKED_UPLOADS = 256
+
+SAMPLE_INTENSITY_CSV = """Induction time/h,0.0 ,0.5 ,1.0 ,1.5 ,2.0 ,3.0 ,4.0 ,5.0 ,6.0 ,20.0 
+Mean intensity (a.u.),0.20 ,7.95 ,10.38 ,11.49 ,12.49 ,13.97 ,15.76 ,17.48 ,17.68 ,18.02 """
+
+SAMPLE_GROUP_CSV = """OD600值,A-a-1,A-a-2,A-a-3,B-a-1,B-a-2,B-a-3
+2025/8/10 22:00,0.018,0.015,0.014,0.015,0.016,0.016
+2025/8/11 22:00,0.014,0.029,0.002,0.026,0.027,0.011
+2025/8/12 22:00,0.018,0.020,0.002,0.021,0.032,0.004
+2025/8/13 22:00,0.005,0.006,-0.008,0.012,0.019,0.008
+2025/8/14 22:00,0.019,0.017,0.005,0.018,0.021,0.011
+2025/8/15 22:00,0.012,0.013,-0.006,0.011,0.024,0.010
+2025/8/16 22:00,0.015,0.018,0.003,0.012,0.022,0.008"""
+
+SAMPLE_DATASETS = {
+    'sample-intensity': SAMPLE_INTENSITY_CSV,
+    'sample-groups': SAMPLE_GROUP_CSV
+}
+
+# pyplot keeps global figure state, so renders from concurrent requests must not interleave
+chart_lock = threading.Lock()
+
+class AnalysisCache:
+    # bounded by both entry count and the pickled size of the results, since rendered charts run to megabytes
+    def __init__(self, max_entries=ANALYSIS_CACHE_SIZE, max_bytes=ANALYSIS_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()
+    
+    def lookup(self, key):
+        name = key[1]
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                blob = self.entries[key]
+            else:
+                self.misses[name] = self.misses.get(name, 0) + 1
+                return False, None
+        # entries are stored pickled, so every caller gets its own copy and changing it never reaches the cache
+        return True, pickle.loads(blob)
+    
+    def store(self, key, result):
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= len(self.entries[key])
+            self.entries[key] = blob
+            self.entries.move_to_end(key)
+            self.bytes += len(blob)
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+    
+    def invalidate(self, content_hash):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == content_hash]:
+                self.bytes -= len(self.entries.pop(key))
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': dict(self.hits),
+                'misses': dict(self.misses)
+            }
+
+analysis_cache = AnalysisCache()
+
+def dataset_hash(df):
+    digest = hashlib.sha1()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def memoized(name):
+    # results are keyed by dataset content and options, so identical uploads share entries
+    def decorator(method):
+        signature = inspect.signature(method)
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **options):
+            # held throughout, so the key and the result always belong to the same rows while append_frame swaps them
+            with self.lock:
+                if self.content_hash is None:
+                    return method(self, *args, **options)
+                
+                # positional and keyword spellings of the same call, defaults included, share one entry
+                bound = signature.bind(self, *args, **options)
+                bound.apply_defaults()
+                options = dict(list(bound.arguments.items())[1:])
+                key = (self.content_hash, name, tuple(sorted(options.items())))
+                found, result = analysis_cache.lookup(key)
+                if found:
+                    self._restore(name, result)
+                    return result
+                
+                result = method(self, **options)
+                analysis_cache.store(key, result)
+                return result
+        return wrapper
+    return decorator
+
+def linear_func(x, a, b):
+    return a * x + b
+
+def exponential_func(x, a, b, c):
+    return a * np.exp(b * x) + c
+
+def saturation_func(x, a, b, c):
+    return a * (1 - np.exp(-b * x)) + c
+
+def curve_fit_first(func, x, y, starts):
+    # warm starts come first; fall back to the cold start when they fail to converge
+    for p0 in starts:
+        try:
+            popt, _ = curve_fit(func, x, y, p0=p0, maxfev=2000)
+            return popt
+        except Exception:
+            continue
+    return None
+
+def fit_nonlinear_models(x, y, warm=None):
+    warm = warm or {}
+    models = []
+    
+    try:
+        p0 = [max(y) - min(y), 0.1, min(y)]
+        starts = ([warm['Saturation']] if 'Saturation' in warm else []) + [p0]
+        popt_sat = curve_fit_first(saturation_func, x, y, starts)
+        if popt_sat is not None:
+            y_pred_sat = saturation_func(x, *popt_sat)
+            rmse_sat = np.sqrt(mean_squared_error(y, y_pred_sat))
+            models.append({
+                'name': 'Saturation',
+                'parameters': popt_sat.tolist(),
+                'rmse': float(rmse_sat),
+                'equation': f'y = {popt_sat[0]:.3f}(1-exp(-{popt_sat[1]:.3f}x)) + {popt_sat[2]:.3f}'
+            })
+    except:
+        pass
+    
+    try:
+        starts = ([warm['Exponential']] if 'Exponential' in warm else []) + [None]
+        popt_exp = curve_fit_first(exponential_func, x, y, starts)
+        if popt_exp is not None:
+            y_pred_exp = exponential_func(x, *popt_exp)
+            rmse_exp = np.sqrt(mean_squared_error(y, y_pred_exp))
+            models.append({
+                'name': 'Exponential',
+                'parameters': popt_exp.tolist(),
+                'rmse': float(rmse_exp),
+                'equation': f'y = {popt_exp[0]:.3f}exp({popt_exp[1]:.3f}x) + {popt_exp[2]:.3f}'
+            })
+    except:
+        pass
+    
+    return models
+
+def fit_nonlinear_chunk(x, columns, warm_starts=None):
+    warm_starts = warm_starts or [None] * len(columns)
+    results = []
+    for y, warm in zip(columns, warm_starts):
+        mask = ~np.isnan(y)
+        results.append(fit_nonlinear_models(x[mask], y[mask], warm) if mask.sum() >= 3 else [])
+    return results
+
+def fit_linear_batch(x, Y):
+    params = np.full((Y.shape[1], 2), np.nan)
+    rmse = np.full(Y.shape[1], np.nan)
+    design = np.column_stack([x, np.ones_like(x)])
+    
+    # wells without gaps share the design matrix and are solved together in one lstsq call
+    complete = ~np.isnan(Y).any(axis=0)
+    if complete.any() and len(x) >= 3:
+        coef, _, _, _ = np.linalg.lstsq(design, Y[:, complete], rcond=None)
+        residuals = Y[:, complete] - design @ coef
+        params[complete] = coef.T
+        rmse[complete] = np.sqrt((residuals ** 2).mean(axis=0))
+    
+    for j in np.flatnonzero(~complete):
+        mask = ~np.isnan(Y[:, j])
+        if mask.sum() >= 3:
+            coef, _, _, _ = np.linalg.lstsq(design[mask], Y[mask, j], rcond=None)
+            params[j] = coef
+            rmse[j] = np.sqrt(((Y[mask, j] - design[mask] @ coef) ** 2).mean())
+    
+    return params, rmse
+
+fit_pool = None
+fit_pool_lock = threading.Lock()
+
+def init_pool_worker():
+    # pool workers fit inline; a pool inside a pool worker would oversubscribe the CPUs
+    global FIT_WORKERS
+    FIT_WORKERS = 1
+
+def get_fit_pool():
+    global fit_pool
+    with fit_pool_lock:
+        if fit_pool is None:
+            fit_pool = ProcessPoolExecutor(max_workers=FIT_WORKERS, initializer=init_pool_worker)
+        return fit_pool
+
+def reset_fit_pool():
+    global fit_pool
+    with fit_pool_lock:
+        if fit_pool is not None:
+            fit_pool.shutdown(wait=False, cancel_futures=True)
+        fit_pool = None
+
+def fit_nonlinear_batch(x, Y, warm_starts=None):
+    columns = [Y[:, j] for j in range(Y.shape[1])]
+    warm_starts = warm_starts or [None] * len(columns)
+    if len(columns) < MIN_WELLS_FOR_POOL or FIT_WORKERS < 2:
+        return fit_nonlinear_chunk(x, columns, warm_starts)
+    
+    size = math.ceil(len(columns) / (FIT_WORKERS * 4))
+    chunks = [columns[i:i + size] for i in range(0, len(columns), size)]
+    warm_chunks = [warm_starts[i:i + size] for i in range(0, len(columns), size)]
+    try:
+        results = []
+        for part in get_fit_pool().map(fit_nonlinear_chunk, repeat(x), chunks, warm_chunks):
+            results.extend(part)
+        return results
+    except (BrokenProcessPool, OSError) as e:
+        print(f"error: fitting pool unavailable, fitting inline: {e}")
+        reset_fit_pool()
+        return fit_nonlinear_chunk(x, columns, warm_starts)
+
+def linear_sums(x, Y):
+    mask = ~np.isnan(Y)
+    Yz = np.where(mask, Y, 0.0)
+    M = mask.astype(float)
+    return {
+        'n': M.sum(axis=0),
+        'sx': x @ M,
+        'sxx': (x ** 2) @ M,
+        'sy': Yz.sum(axis=0),
+        'syy': (Yz ** 2).sum(axis=0),
+        'sxy': x @ Yz
+    }
+
+def add_sums(total, part):
+    return {key: total[key] + part[key] for key in total}
+
+def linear_from_sums(sums):
+    # closed-form least squares from running sums, so appended rows never revisit old ones
+    n, sx, sxx, sy, syy, sxy = (sums[key] for key in ('n', 'sx', 'sxx', 'sy', 'syy', 'sxy'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+        b = (sy - a * sx) / n
+        rss = syy - 2 * a * sxy - 2 * b * sy + a ** 2 * sxx + 2 * a * b * sx + n * b ** 2
+        rmse = np.sqrt(np.maximum(rss, 0.0) / n)
+    rmse[n < 3] = np.nan
+    return np.column_stack([a, b]), rmse
+
+MODEL_FUNCS = {
+    'Linear': linear_func,
+    'Saturation': saturation_func,
+    'Exponential': exponential_func
+}
+
+def is_number(value):
+    try:
+        float(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the point of each bucket that spans the largest triangle
+    # with the previously kept point and the next bucket's average, so peaks and steps survive
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    
+    every = (n - 2) / (threshold - 2)
+    sampled = np.empty(threshold, dtype=int)
+    sampled[0] = 0
+    sampled[-1] = n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        start = int(math.floor(i * every)) + 1
+        end = next_start
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        sampled[i + 1] = a
+    
+    return x[sampled], y[sampled]
+
+def finite_list(values):
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    if finite.all():
+        return values.tolist()
+    values = values.astype(object)
+    values[~finite] = None
+    return values.tolist()
+
+def series_payload(x, y, max_points):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    sampled_x, sampled_y = lttb(x[keep], y[keep], max_points)
+    return {
+        'x': finite_list(sampled_x),
+        'y': finite_list(sampled_y),
+        'total_points': int(keep.sum())
+    }
+
+def histogram_payload(values, bins):
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    counts, edges = np.histogram(values, bins=min(bins, len(values)))
+    return {
+        'counts': counts.tolist(),
+        'edges': finite_list(edges),
+        'mean': float(values.mean()),
+        'std': float(values.std())
+    }
+
+def fit_well_models(x, Y, names, linear=None, warm_starts=None):
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    
+    params, rmse = linear if linear is not None else fit_linear_batch(x, Y)
+    nonlinear = fit_nonlinear_batch(x, Y, warm_starts)
+    
+    table = []
+    for j, name in enumerate(names):
+        models = []
+        if not np.isnan(rmse[j]):
+            models.append({
+                'name': 'Linear',
+                'parameters': params[j].tolist(),
+                'rmse': float(rmse[j]),
+                'equation': f'y = {params[j][0]:.3f}x + {params[j][1]:.3f}'
+            })
+        models.extend(nonlinear[j])
+        
+        if not models:
+            continue
+        
+        best_model = min(models, key=lambda m: m['rmse'])
+        table.append({
+            'well': str(name),
+            'data_points': int((~np.isnan(Y[:, j])).sum()),
+            'model': best_model['name'],
+            'rmse': best_model['rmse'],
+            'equation': best_model['equation'],
+            'best_model': best_model,
+            'all_models': models
+        })
+    
+    return table
+
+def summarize_wells(wells):
+    if not wells:
+        return {}
+    
+    model_counts = {}
+    for well in wells:
+        model_counts[well['model']] = model_counts.get(well['model'], 0) + 1
+    model = max(model_counts, key=model_counts.get)
+    
+    return {
+        'model': model,
+        'rmse': float(np.median([well['rmse'] for well in wells if well['model'] == model])),
+        'model_counts': model_counts,
+        'well_count': len(wells),
+        'wells': wells
+    }
+
+def growth_records(frame, a_cols, b_cols, start=0):
+    a_mean = frame[a_cols].mean(axis=1) if a_cols else pd.Series(0, index=frame.index)
+    b_mean = frame[b_cols].mean(axis=1) if b_cols else pd.Series(0, index=frame.index)
+    
+    prev_a = a_mean.shift(1)
+    prev_b = b_mean.shift(1)
+    growth_rate_a = ((a_mean - prev_a) / prev_a * 100).where(prev_a != 0, 0)
+    growth_rate_b = ((b_mean - prev_b) / prev_b * 100).where(prev_b != 0, 0)
+    growth_rate = (growth_rate_a + growth_rate_b) / 2
+    growth_rate.iloc[:1] = 0
+    
+    # rows before start only seed the previous-row means
+    valid = frame.iloc[:, 0].notna().to_numpy().copy()
+    valid[:start] = False
+    times = frame.iloc[:, 0][valid].dt.strftime('%Y-%m-%d')
+    
+    return [
+        {'time': t, 'groupA': a, 'groupB': b, 'growthRate': g}
+        for t, a, b, g in zip(
+            times.tolist(),
+            a_mean[valid].round(4).tolist(),
+            b_mean[valid].round(4).tolist(),
+            growth_rate[valid].round(2).tolist()
+        )
+    ]
+
+def group_columns(df):
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    a_cols = [col for col in numeric_cols if 'A-' in col or 'a-' in col]
+    b_cols = [col for col in numeric_cols if 'B-' in col or 'b-' in col]
+    return numeric_cols, a_cols, b_cols
+
+def correlation_sums(a_mean, b_mean):
+    both = a_mean.notna() & b_mean.notna()
+    a = a_mean[both].to_numpy(dtype=float)
+    b = b_mean[both].to_numpy(dtype=float)
+    return {
+        'n': len(a),
+        'sa': a.sum(), 'sb': b.sum(),
+        'saa': (a ** 2).sum(), 'sbb': (b ** 2).sum(), 'sab': (a * b).sum(),
+        'b_first': b[0] if len(b) else None,
+        'b_varies': bool(len(b) and (b != b[0]).any())
+    }
+
+def merge_correlation_sums(total, part):
+    merged = {key: total[key] + part[key] for key in ('n', 'sa', 'sb', 'saa', 'sbb', 'sab')}
+    merged['b_first'] = total['b_first'] if total['b_first'] is not None else part['b_first']
+    merged['b_varies'] = total['b_varies'] or part['b_varies'] or (
+        part['b_first'] is not None and merged['b_first'] is not None and part['b_first'] != merged['b_first'])
+    return merged
+
+def correlation_from_sums(sums):
+    n = sums['n']
+    if n < 2:
+        return {}
+    
+    ss_a = sums['saa'] - sums['sa'] ** 2 / n
+    ss_b = sums['sbb'] - sums['sb'] ** 2 / n
+    cov = sums['sab'] - sums['sa'] * sums['sb'] / n
+    r = float(np.clip(cov / np.sqrt(ss_a * ss_b), -1.0, 1.0)) if ss_a > 0 and ss_b > 0 else float('nan')
+    p_value = float(correlation_pvalues(np.array([[r]]), np.array([[n]]))[0, 0])
+    
+    # r2_score(a, b): b taken as the prediction of a
+    ss_res = sums['saa'] - 2 * sums['sab'] + sums['sbb']
+    r_squared = float(1 - ss_res / ss_a) if sums['b_varies'] and ss_a > 0 else 0
+    
+    return {
+        'pearson_r': r,
+        'p_value': p_value,
+        'r_squared': r_squared,
+        'sample_size': int(n),
+        'analysis_type': 'group_comparison'
+    }
+
+def column_stats(frame):
+    values = frame.to_numpy(dtype=float)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return {
+            'count': (~np.isnan(values)).sum(axis=0).astype(float),
+            'sum': np.nansum(values, axis=0),
+            'sumsq': np.nansum(values ** 2, axis=0),
+            'min': np.nanmin(values, axis=0) if len(values) else np.full(values.shape[1], np.nan),
+            'max': np.nanmax(values, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+        }
+
+def merge_column_stats(total, part):
+    return {
+        'count': total['count'] + part['count'],
+        'sum': total['sum'] + part['sum'],
+        'sumsq': total['sumsq'] + part['sumsq'],
+        'min': np.fmin(total['min'], part['min']),
+        'max': np.fmax(total['max'], part['max'])
+    }
+
+def describe_column_stats(columns, stats_):
+    count = stats_['count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = stats_['sum'] / count
+        std = np.sqrt(np.maximum(stats_['sumsq'] - stats_['sum'] ** 2 / count, 0.0) / (count - 1))
+    return {
+        str(col): {
+            'count': int(count[j]),
+            'mean': finite_list([mean[j]])[0],
+            'std': finite_list([std[j]])[0],
+            'min': finite_list([stats_['min'][j]])[0],
+            'max': finite_list([stats_['max'][j]])[0]
+        }
+        for j, col in enumerate(columns)
+    }
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+CORRECTION_METHODS = ('fdr_bh', 'bonferroni', 'none')
+
+def pairwise_pearson(X):
+    # pairwise-complete Pearson r for every column pair, built from masked matrix products
+    mask = ~np.isnan(X)
+    M = mask.astype(float)
+    Xz = np.where(mask, X, 0.0)
+    
+    n = M.T @ M
+    sum_x = Xz.T @ M
+    sum_xx = (Xz ** 2).T @ M
+    sum_xy = Xz.T @ Xz
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * sum_xy - sum_x * sum_x.T
+        var = (n * sum_xx - sum_x ** 2) * (n * sum_xx - sum_x ** 2).T
+        r = np.clip(cov / np.sqrt(var), -1.0, 1.0)
+    r[n < 3] = np.nan
+    return r, n
+
+def correlation_pvalues(r, n):
+    dof = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = r * np.sqrt(dof / (1.0 - r ** 2))
+    p = 2 * stats.t.sf(np.abs(t), np.maximum(dof, 1))
+    p[np.abs(r) >= 1.0] = 0.0
+    p[np.isnan(r)] = np.nan
+    return p
+
+def adjust_pvalues(p, correction):
+    # corrections are applied over the distinct pairs (upper triangle) only
+    k = p.shape[0]
+    upper = np.triu_indices(k, 1)
+    values = p[upper]
+    valid = ~np.isnan(values)
+    adjusted = np.full_like(values, np.nan)
+    m = valid.sum()
+    
+    if correction == 'bonferroni':
+        adjusted[valid] = np.minimum(values[valid] * m, 1.0)
+    elif correction == 'fdr_bh':
+        order = np.argsort(values[valid])
+        ranked = values[valid][order] * m / np.arange(1, m + 1)
+        ranked = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+        result = np.empty(m)
+        result[order] = ranked
+        adjusted[valid] = result
+    else:
+        adjusted = values
+    
+    out = np.zeros_like(p)
+    out[upper] = adjusted
+    out = out + out.T
+    np.fill_diagonal(out, 0.0)
+    return out
+
+def cluster_order(r):
+    k = r.shape[0]
+    if k < 3:
+        return np.arange(k)
+    distance = 1.0 - np.nan_to_num(r, nan=0.0)
+    distance = (distance + distance.T) / 2
+    np.fill_diagonal(distance, 0.0)
+    return leaves_list(linkage(squareform(np.clip(distance, 0.0, 2.0), checks=False), method='average'))
+
+class LimitedStream:
+    # counts what the parser pulls from an upload, so the size cap applies to the upload rather than the parsed frame
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+    
+    def _count(self, data):
+        self.bytes_read += len(data)
+        if self.bytes_read > self.max_bytes:
+            raise ValueError(f"upload exceeds the size cap of {self.max_bytes // (1024 * 1024)} MB")
+        return data
+    
+    def read(self, size=-1):
+        return self._count(self.stream.read(size))
+    
+    def readline(self, size=-1):
+        return self._count(self.stream.readline(size))
+    
+    def __iter__(self):
+        return iter(self.readline, self.stream.read(0))
+
+def read_csv_frame(stream, chunk_rows=None, max_bytes=None, progress=None):
+    chunk_rows = chunk_rows or CSV_CHUNK_ROWS
+    stream = LimitedStream(stream, max_bytes or MAX_UPLOAD_BYTES)
+    
+    # every chunk is read as text and coerced the same way, so a stray token is missing wherever it falls;
+    # the layout and the time format are decided once, from the first chunk
+    try:
+        reader = pd.read_csv(stream, dtype=str, chunksize=chunk_rows, encoding='utf-8')
+    except pd.errors.EmptyDataError:
+        raise ValueError("no data rows")
+    
+    chunks = []
+    rows = 0
+    for chunk in reader:
+        if not chunks:
+            columns = chunk.columns.str.strip()
+            numeric_cols = list(columns[1:])
+            time_col = None if 'Induction time/h' in columns else columns[0]
+            time_format = None
+            if time_col is not None:
+                times = chunk.iloc[:, 0].dropna()
+                time_format = guess_datetime_format(times.iloc[0].strip()) if len(times) else None
+        chunk.columns = columns
+        
+        chunk[numeric_cols] = chunk[numeric_cols].apply(pd.to_numeric, errors='coerce').astype('float64')
+        if time_col is not None:
+            chunk[time_col] = pd.to_datetime(chunk[time_col], format=time_format, errors='coerce')
+        
+        chunks.append(chunk)
+        rows += len(chunk)
+        if progress:
+            progress(rows, stream.bytes_read)
+    
+    if not chunks:
+        raise ValueError("no data rows")
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
 class ProteinAnalyzer:
     def __init__(self):
         self.data = None
+        self.content_hash = None
         self.analysis_results = {}
         self.correlation_results = {}
         self.fitting_results = {}
+        self.analyzed = False
+        self.incremental = None
+        # reentrant: memoized analyses take it and call one another, also from run_analyses
+        self.lock = threading.RLock()
     
     def load_data(self, csv_content):
-
-        try:
-            
-            df = pd.read_csv(StringIO(csv_content))
-            
+        return self.load_stream(StringIO(csv_content))
     
-            df.columns = df.columns.str.strip()
-            
-    
-            if 'Induction time/h' in df.columns:
-                numeric_cols = df.columns[1:]
-                for col in numeric_cols:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            else:
-                time_col = df.columns[0]
-                df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-                
-                numeric_cols = df.columns[1:]
-                for col in numeric_cols:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            self.data = df
+    def load_stream(self, stream, chunk_rows=None, max_bytes=None, progress=None):
+        try:
+            df = read_csv_frame(stream, chunk_rows, max_bytes, progress)
+            self.load_frame(df)
             return True, "success"
         except Exception as e:
             return False, f"error: {str(e)}"
     
+    def load_frame(self, df, content_hash=None):
+        self.data = df
+        self.content_hash = content_hash or dataset_hash(df)
+        self.analysis_results = {}
+        self.correlation_results = {}
+        self.fitting_results = {}
+        self.analyzed = False
+        self.incremental = None
+    
+    def append_stream(self, stream):
+        try:
+            new_rows = read_csv_frame(stream)
+        except Exception as e:
+            return False, f"error: {str(e)}", []
+        
+        with self.lock:
+            if self.data is None:
+                return False, "error: no data loaded", []
+            if 'Induction time/h' in self.data.columns:
+                return False, "error: append needs a dataset with one row per time point", []
+            if set(new_rows.columns) != set(self.data.columns):
+                return False, "error: appended columns do not match the dataset", []
+            
+            self.run_analyses_locked()
+            return True, "success", self.append_frame(new_rows[self.data.columns])
+    
+    def append_frame(self, new_rows):
+        old_len = len(self.data)
+        numeric_cols, a_cols, b_cols = group_columns(self.data)
+        if self.incremental is None:
+            self.incremental = self.incremental_state(self.data, numeric_cols, a_cols, b_cols, 0)
+        part = self.incremental_state(new_rows, numeric_cols, a_cols, b_cols, old_len)
+        state = {
+            'column_stats': merge_column_stats(self.incremental['column_stats'], part['column_stats']),
+            'correlation_sums': merge_correlation_sums(self.incremental['correlation_sums'], part['correlation_sums']),
+            'linear_sums': add_sums(self.incremental['linear_sums'], part['linear_sums'])
+        }
+        
+        # only the new rows are analyzed for growth; the last old row seeds their growth rate
+        seeded = pd.concat([self.data.iloc[-1:], new_rows], ignore_index=True)
+        new_records = growth_records(seeded, a_cols, b_cols, start=1)
+        growth = (self.analysis_results.get('growth_patterns') or []) + new_records
+        
+        correlation = correlation_from_sums(state['correlation_sums']) if a_cols and b_cols else {}
+        
+        data = pd.concat([self.data, new_rows], ignore_index=True)
+        fitting = self.fitting_results
+        if len(numeric_cols) and len(data) >= 3:
+            warm_starts = {well['well']: {m['name']: m['parameters'] for m in well['all_models']}
+                           for well in (self.fitting_results or {}).get('wells', [])}
+            wells = fit_well_models(
+                np.arange(len(data), dtype=float),
+                data[numeric_cols].to_numpy(dtype=float),
+                list(numeric_cols),
+                linear=linear_from_sums(state['linear_sums']),
+                warm_starts=[warm_starts.get(str(col)) for col in numeric_cols]
+            )
+            fitting = summarize_wells(wells)
+        
+        # chain the content hash instead of rehashing the whole dataset
+        digest = hashlib.sha1(self.content_hash.encode('utf-8'))
+        digest.update(dataset_hash(new_rows).encode('utf-8'))
+        
+        self.data = data
+        self.content_hash = digest.hexdigest()
+        self.incremental = state
+        self.adopt_results({'growth_patterns': growth, 'correlation': correlation, 'fitting': fitting})
+        return new_records
+    
+    def incremental_state(self, frame, numeric_cols, a_cols, b_cols, offset):
+        a_mean = frame[a_cols].mean(axis=1) if a_cols else pd.Series(np.nan, index=frame.index)
+        b_mean = frame[b_cols].mean(axis=1) if b_cols else pd.Series(np.nan, index=frame.index)
+        return {
+            'column_stats': column_stats(frame[numeric_cols]),
+            'correlation_sums': correlation_sums(a_mean, b_mean),
+            'linear_sums': linear_sums(np.arange(offset, offset + len(frame), dtype=float),
+                                       frame[numeric_cols].to_numpy(dtype=float))
+        }
+    
+    def running_statistics(self):
+        if self.incremental is None:
+            return None
+        numeric_cols, _, _ = group_columns(self.data)
+        return describe_column_stats(numeric_cols, self.incremental['column_stats'])
+    
+    def run_analyses(self):
+        with self.lock:
+            self.run_analyses_locked()
+    
+    def run_analyses_locked(self):
+        if not self.analyzed:
+            self.analyze_growth_patterns()
+            self.perform_correlation_analysis()
+            self.perform_curve_fitting()
+            self.analyzed = True
+    
+    def adopt_results(self, results):
+        # seed the shared cache with analyses computed elsewhere (e.g. in a batch worker process)
+        for name in ('growth_patterns', 'correlation', 'fitting'):
+            analysis_cache.store((self.content_hash, name, ()), results[name])
+            self._restore(name, results[name])
+        self.analyzed = True
+    
+    def _restore(self, name, result):
+        if result is None:
+            return
+        if name == 'growth_patterns':
+            self.analysis_results['growth_patterns'] = result
+        elif name == 'correlation':
+            self.correlation_results = result
+        elif name == 'fitting':
+            self.fitting_results = result
+    
+    def memory_usage(self):
+        if self.data is None:
+            return 0
+        return int(self.data.memory_usage(deep=True).sum())
+    
+    @memoized('growth_patterns')
     def analyze_growth_patterns(self):
         if self.data is None:
             return None
@@ -100,29 +868,7 @@ class ProteinAnalyzer:
                 a_cols = [col for col in numeric_cols if 'A-' in col or 'a-' in col]
                 b_cols = [col for col in numeric_cols if 'B-' in col or 'b-' in col]
                 
-                results = []
-                for idx, row in self.data.iterrows():
-                    if pd.isna(row.iloc[0]):  
-                        continue
-                    
-                    a_mean = row[a_cols].mean() if a_cols else 0
-                    b_mean = row[b_cols].mean() if b_cols else 0
-                    
-                    if idx > 0:
-                        prev_a = self.data.iloc[idx-1][a_cols].mean() if a_cols else 0
-                        prev_b = self.data.iloc[idx-1][b_cols].mean() if b_cols else 0
-                        
-                        growth_rate_a = ((a_mean - prev_a) / prev_a * 100) if prev_a != 0 else 0
-                        growth_rate_b = ((b_mean - prev_b) / prev_b * 100) if prev_b != 0 else 0
-                    else:
-                        growth_rate_a = growth_rate_b = 0
-                    
-                    results.append({
-                        'time': row.iloc[0].strftime('%Y-%m-%d') if pd.notna(row.iloc[0]) else '',
-                        'groupA': round(a_mean, 4),
-                        'groupB': round(b_mean, 4),
-                        'growthRate': round((growth_rate_a + growth_rate_b) / 2, 2)
-                    })
+                results = growth_records(self.data, a_cols, b_cols)
                 
                 self.analysis_results['growth_patterns'] = results
                 return results
@@ -131,6 +877,7 @@ class ProteinAnalyzer:
             print(f"error: {e}")
             return None
     
+    @memoized('correlation')
     def perform_correlation_analysis(self):
         if self.data is None:
             return None
@@ -180,12 +927,13 @@ class ProteinAnalyzer:
                 results = {}
                 
                 if a_cols and b_cols:
-                    a_mean = self.data[a_cols].mean(axis=1).dropna()
-                    b_mean = self.data[b_cols].mean(axis=1).dropna()
+                    a_mean = self.data[a_cols].mean(axis=1)
+                    b_mean = self.data[b_cols].mean(axis=1)
                     
-                    min_len = min(len(a_mean), len(b_mean))
-                    a_mean = a_mean.iloc[:min_len]
-                    b_mean = b_mean.iloc[:min_len]
+                    # pairwise-complete rows, the same ones correlation_sums keeps when rows are appended
+                    both = a_mean.notna() & b_mean.notna()
+                    a_mean = a_mean[both]
+                    b_mean = b_mean[both]
                     
                     if len(a_mean) > 1 and len(b_mean) > 1:
                         pearson_r, p_value = stats.pearsonr(a_mean, b_mean)
@@ -206,6 +954,7 @@ class ProteinAnalyzer:
             print(f"error: {e}")
             return None
     
+    @memoized('fitting')
     def perform_curve_fitting(self):
         if self.data is None:
             return None
@@ -215,86 +964,36 @@ class ProteinAnalyzer:
                 row = self.data.iloc[0]
                 
                 if 'intensity' in str(row.iloc[0]).lower():
+                    time_cols = []
                     time_values = []
-                    intensity_values = []
-
+                    
                     for col in self.data.columns[1:]:
                         try:
-                            time_val = float(col)  
-                            intensity_val = float(row[col]) 
-                            time_values.append(time_val)
-                            intensity_values.append(intensity_val)
+                            time_values.append(float(col))
+                            time_cols.append(col)
                         except (ValueError, TypeError):
                             continue
                     
                     if len(time_values) < 3:
                         return None
                     
-                    x = np.array(time_values)
-                    y = np.array(intensity_values)
-                    
-                    def linear_func(x, a, b):
-                        return a * x + b
-                    
-                    def exponential_func(x, a, b, c):
-                        return a * np.exp(b * x) + c
-                    
-                    def saturation_func(x, a, b, c):
-                        return a * (1 - np.exp(-b * x)) + c
+                    # every row is one series sampled at the induction times in the header
+                    series = self.data[time_cols].to_numpy(dtype=float).T
+                    names = self.data.iloc[:, 0].astype(str).tolist()
+                    wells = fit_well_models(np.array(time_values), series, names)
                     
                     results = {}
                     
-                    models = []
-                    
-                    try:
-                        popt_linear, _ = curve_fit(linear_func, x, y)
-                        y_pred_linear = linear_func(x, *popt_linear)
-                        rmse_linear = np.sqrt(mean_squared_error(y, y_pred_linear))
-                        models.append({
-                            'name': 'Linear',
-                            'parameters': popt_linear.tolist(),
-                            'rmse': float(rmse_linear),
-                            'equation': f'y = {popt_linear[0]:.3f}x + {popt_linear[1]:.3f}'
-                        })
-                    except:
-                        pass
-                    
-                    try:
-                        p0 = [max(y) - min(y), 0.1, min(y)]
-                        popt_sat, _ = curve_fit(saturation_func, x, y, p0=p0, maxfev=2000)
-                        y_pred_sat = saturation_func(x, *popt_sat)
-                        rmse_sat = np.sqrt(mean_squared_error(y, y_pred_sat))
-                        models.append({
-                            'name': 'Saturation',
-                            'parameters': popt_sat.tolist(),
-                            'rmse': float(rmse_sat),
-                            'equation': f'y = {popt_sat[0]:.3f}(1-exp(-{popt_sat[1]:.3f}x)) + {popt_sat[2]:.3f}'
-                        })
-                    except:
-                        pass
-                    
-                    try:
-                        popt_exp, _ = curve_fit(exponential_func, x, y, maxfev=2000)
-                        y_pred_exp = exponential_func(x, *popt_exp)
-                        rmse_exp = np.sqrt(mean_squared_error(y, y_pred_exp))
-                        models.append({
-                            'name': 'Exponential',
-                            'parameters': popt_exp.tolist(),
-                            'rmse': float(rmse_exp),
-                            'equation': f'y = {popt_exp[0]:.3f}exp({popt_exp[1]:.3f}x) + {popt_exp[2]:.3f}'
-                        })
-                    except:
-                        pass
-                    
-                    if models:
-                        best_model = min(models, key=lambda m: m['rmse'])
+                    if wells and wells[0]['well'] == names[0]:
+                        best_model = wells[0]['best_model']
                         results = {
                             'best_model': best_model,
-                            'all_models': models,
-                            'data_points': len(time_values),
+                            'all_models': wells[0]['all_models'],
+                            'data_points': wells[0]['data_points'],
                             'model': best_model['name'],
                             'rmse': best_model['rmse'],
-                            'equation': best_model['equation']
+                            'equation': best_model['equation'],
+                            'wells': wells
                         }
                     
                     self.fitting_results = results
@@ -303,44 +1002,202 @@ class ProteinAnalyzer:
             else:
                 numeric_cols = self.data.select_dtypes(include=[np.number]).columns
                 
-                a_cols = [col for col in numeric_cols if 'A-' in col or 'a-' in col]
-                b_cols = [col for col in numeric_cols if 'B-' in col or 'b-' in col]
-                
-                if not (a_cols and b_cols):
+                if len(numeric_cols) == 0 or len(self.data) < 3:
                     return None
                 
-                a_mean = self.data[a_cols].mean(axis=1).dropna()
-                b_mean = self.data[b_cols].mean(axis=1).dropna()
+                x = np.arange(len(self.data), dtype=float)
+                wells = fit_well_models(x, self.data[numeric_cols].to_numpy(dtype=float), list(numeric_cols))
+                
+                results = summarize_wells(wells)
                 
-                min_len = min(len(a_mean), len(b_mean))
-                if min_len < 3:  
+                self.fitting_results = results
+                return results
+            
+        except Exception as e:
+            print(f"error: {e}")
+            return None
+    
+    def well_matrix(self):
+        if 'Induction time/h' in self.data.columns:
+            time_cols = [col for col in self.data.columns[1:] if is_number(col)]
+            return self.data.iloc[:, 0].astype(str).tolist(), self.data[time_cols].to_numpy(dtype=float).T
+        
+        numeric_cols = self.data.select_dtypes(include=[np.number]).columns
+        return [str(col) for col in numeric_cols], self.data[numeric_cols].to_numpy(dtype=float)
+    
+    def expression_series(self):
+        names, X = self.well_matrix()
+        if 'Induction time/h' in self.data.columns:
+            return np.array([float(col) for col in self.data.columns[1:] if is_number(col)]), X, names
+        
+        # time-stamped rows become hours since the first reading
+        times = pd.to_datetime(self.data.iloc[:, 0], errors='coerce')
+        valid = times.notna().to_numpy()
+        hours = (times[valid] - times[valid].min()).dt.total_seconds().to_numpy() / 3600
+        return hours, X[valid], names
+    
+    @memoized('kinetics')
+    def expression_kinetics(self, horizon=None, points=20, level=0.95, fraction=0.95):
+        if self.data is None:
+            return None
+        
+        try:
+            t, X, names = self.expression_series()
+            if len(t) < 4 or not names:
+                return None
+            
+            horizon = np.ptp(t) if horizon is None else horizon
+            forecast_times = np.linspace(t.max(), t.max() + horizon, points)
+            report = kinetics_report(t, X.T, names, forecast_times, level=level, fraction=fraction)
+            report['time_unit'] = 'hours'
+            return report
+            
+        except Exception as e:
+            print(f"error: {e}")
+            return None
+    
+    @memoized('correlation_matrix')
+    def correlation_matrix(self, method='pearson', correction='fdr_bh', cluster=True):
+        if self.data is None:
+            return None
+        
+        try:
+            names, X = self.well_matrix()
+            if len(names) < 2 or X.shape[0] < 3:
+                return None
+            
+            if method == 'spearman':
+                # ranks are taken over each full column; pairs then use their common non-missing rows
+                X = pd.DataFrame(X).rank().to_numpy()
+            
+            r, n = pairwise_pearson(X)
+            np.fill_diagonal(r, 1.0)
+            p = correlation_pvalues(r, n)
+            np.fill_diagonal(p, 0.0)
+            p_adjusted = adjust_pvalues(p, correction)
+            
+            order = cluster_order(r) if cluster else np.arange(len(names))
+            r = r[np.ix_(order, order)]
+            p = p[np.ix_(order, order)]
+            p_adjusted = p_adjusted[np.ix_(order, order)]
+            
+            return {
+                'method': method,
+                'correction': correction,
+                'clustered': bool(cluster),
+                'wells': [names[i] for i in order],
+                'order': order.tolist(),
+                'sample_size': int(X.shape[0]),
+                'r': finite_list(np.round(r, 6)),
+                'p_value': finite_list(p),
+                'p_adjusted': finite_list(p_adjusted)
+            }
+        
+        except Exception as e:
+            print(f"error: {e}")
+            return None
+    
+    @memoized('chart_data')
+    def chart_series(self, max_points=500):
+        if self.data is None:
+            return None
+        
+        try:
+            if 'Induction time/h' in self.data.columns:
+                row = self.data.iloc[0]
+                if 'intensity' not in str(row.iloc[0]).lower():
                     return None
                 
-                x = np.array(range(min_len))
-                y_a = np.array(a_mean.iloc[:min_len])
-                y_b = np.array(b_mean.iloc[:min_len])
+                time_values = []
+                intensity_values = []
+                for col in self.data.columns[1:]:
+                    try:
+                        time_values.append(float(col))
+                        intensity_values.append(float(row[col]))
+                    except (ValueError, TypeError):
+                        continue
                 
-                def linear_func(x, a, b):
-                    return a * x + b
+                if not time_values:
+                    return None
                 
-                def exponential_func(x, a, b, c):
-                    return a * np.exp(b * x) + c
+                x = np.array(time_values)
+                y = np.array(intensity_values)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    growth_rate = np.where(y[:-1] != 0, (y[1:] - y[:-1]) / y[:-1] * 100, 0)
+                    cumulative_growth = (y / y[0] - 1) * 100
                 
-                results = {}
+                fitted_curve = None
+                fitting_results = self.perform_curve_fitting()
+                if fitting_results and 'best_model' in fitting_results:
+                    best_model = fitting_results['best_model']
+                    x_smooth = np.linspace(x.min(), x.max(), min(100, max_points))
+                    fitted_curve = {
+                        'model': best_model['name'],
+                        'rmse': best_model['rmse'],
+                        'x': finite_list(x_smooth),
+                        'y': finite_list(MODEL_FUNCS[best_model['name']](x_smooth, *best_model['parameters']))
+                    }
                 
+                return {
+                    'layout': 'intensity',
+                    'x_unit': 'hours',
+                    'intensity': series_payload(x, y, max_points),
+                    'growth_rate': series_payload(x[1:], growth_rate, max_points),
+                    'cumulative_growth': series_payload(x, cumulative_growth, max_points),
+                    'histogram': histogram_payload(y, 8),
+                    'fitted_curve': fitted_curve
+                }
             
+            else:
+                numeric_cols = self.data.select_dtypes(include=[np.number]).columns
+                a_cols = [col for col in numeric_cols if 'A-' in col or 'a-' in col]
+                b_cols = [col for col in numeric_cols if 'B-' in col or 'b-' in col]
                 
-                self.fitting_results = results
-                return results
-            
+                valid = self.data.iloc[:, 0].notna()
+                frame = self.data[valid]
+                x = frame.iloc[:, 0].astype('datetime64[ms]').astype('int64').to_numpy(dtype=float)
+                
+                growth = self.analyze_growth_patterns() or []
+                growth_rate = np.array([entry['growthRate'] for entry in growth], dtype=float)
+                
+                panels = {
+                    'layout': 'groups',
+                    'x_unit': 'epoch_ms',
+                    'growth_rate': series_payload(x, growth_rate, max_points) if len(growth_rate) == len(x) else None,
+                    'histogram': histogram_payload(frame[numeric_cols].to_numpy().ravel(), 20),
+                    'fitted_curve': None
+                }
+                
+                for group, cols in (('groupA', a_cols), ('groupB', b_cols)):
+                    if not cols:
+                        panels[group] = None
+                        panels[f'{group}_cumulative_growth'] = None
+                        continue
+                    y = frame[cols].mean(axis=1).to_numpy(dtype=float)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        cumulative_growth = (y / y[0] - 1) * 100 if len(y) else y
+                    panels[group] = series_payload(x, y, max_points)
+                    panels[f'{group}_cumulative_growth'] = series_payload(x, cumulative_growth, max_points)
+                
+                return panels
+        
         except Exception as e:
             print(f"error: {e}")
             return None
     
-    def generate_visualization(self):
+    def generate_visualization(self, dpi=300):
+        chart_bytes = self.render_chart(dpi=dpi)
+        return BytesIO(chart_bytes) if chart_bytes else None
+    
+    @memoized('chart')
+    def render_chart(self, dpi=300):
         if self.data is None:
             return None
         
+        with chart_lock:
+            return self._render_chart(dpi)
+    
+    def _render_chart(self, dpi):
         try:
             if 'Induction time/h' in self.data.columns:
                 fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
@@ -442,20 +1299,146 @@ class ProteinAnalyzer:
             plt.tight_layout()
             
             img_buffer = BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-            img_buffer.seek(0)
+            plt.savefig(img_buffer, format='png', dpi=dpi, bbox_inches='tight')
             plt.close()
             
-            return img_buffer
+            return img_buffer.getvalue()
         except Exception as e:
             print(f"error: {e}")
             return None
 
-analyzer = ProteinAnalyzer()
+class DatasetRegistry:
+    def __init__(self, max_datasets=MAX_DATASETS, max_bytes=MAX_DATASET_BYTES):
+        self.max_datasets = max_datasets
+        self.max_bytes = max_bytes
+        self.datasets = OrderedDict()
+        self.sizes = {}
+        self.pinned = set()
+        self.lock = threading.Lock()
+    
+    def add(self, analyzer, dataset_id=None, pinned=False):
+        dataset_id = dataset_id or uuid.uuid4().hex
+        with self.lock:
+            self.datasets[dataset_id] = analyzer
+            self.datasets.move_to_end(dataset_id)
+            self.sizes[dataset_id] = analyzer.memory_usage()
+            if pinned:
+                self.pinned.add(dataset_id)
+            self._evict(keep=dataset_id)
+        return dataset_id
+    
+    def get(self, dataset_id):
+        with self.lock:
+            analyzer = self.datasets.get(dataset_id)
+            if analyzer is not None:
+                self.datasets.move_to_end(dataset_id)
+            return analyzer
+    
+    def remove(self, dataset_id):
+        with self.lock:
+            self.sizes.pop(dataset_id, None)
+            self.pinned.discard(dataset_id)
+            analyzer = self.datasets.pop(dataset_id, None)
+            if analyzer is None:
+                return False
+            self._release(analyzer)
+            return True
+    
+    def describe(self):
+        with self.lock:
+            return [{
+                'dataset_id': dataset_id,
+                'rows': len(analyzer.data) if analyzer.data is not None else 0,
+                'columns': len(analyzer.data.columns) if analyzer.data is not None else 0,
+                'bytes': self.sizes[dataset_id],
+                'pinned': dataset_id in self.pinned
+            } for dataset_id, analyzer in self.datasets.items()]
+    
+    def _evict(self, keep=None):
+        # least recently used first; pinned sample datasets and the newest upload are never evicted
+        for dataset_id in list(self.datasets):
+            unpinned = len(self.datasets) - len(self.pinned)
+            if unpinned <= self.max_datasets and sum(self.sizes.values()) <= self.max_bytes:
+                break
+            if dataset_id in self.pinned or dataset_id == keep:
+                continue
+            analyzer = self.datasets.pop(dataset_id)
+            del self.sizes[dataset_id]
+            self._release(analyzer)
+    
+    def _release(self, analyzer):
+        self._release_hash(analyzer.content_hash)
+    
+    def _release_hash(self, content_hash):
+        # cached analyses can be shared by datasets with identical content
+        if content_hash is None:
+            return
+        if all(other.content_hash != content_hash for other in self.datasets.values()):
+            analysis_cache.invalidate(content_hash)
+    
+    def replace_hash(self, dataset_id, old_hash):
+        # an appended dataset keeps its id but moves to a new content hash
+        with self.lock:
+            if dataset_id in self.datasets:
+                self.sizes[dataset_id] = self.datasets[dataset_id].memory_usage()
+            self._release_hash(old_hash)
+            self._evict(keep=dataset_id)
+
+registry = DatasetRegistry()
+
+def get_sample_analyzer(sample_id):
+    analyzer = registry.get(sample_id)
+    if analyzer is None:
+        analyzer = ProteinAnalyzer()
+        analyzer.load_data(SAMPLE_DATASETS[sample_id])
+        registry.add(analyzer, dataset_id=sample_id, pinned=True)
+    return analyzer
+
+def load_dataset(dataset_id):
+    analyzer = registry.get(dataset_id)
+    if analyzer is not None:
+        return analyzer
+    
+    # evicted or left over from a previous run: map it back in from the dataset store
+    entry = dataset_store.entry(dataset_id)
+    if entry is None or entry['kind'] != 'protein':
+        return None
+    df = dataset_store.load(dataset_id)
+    if df is None:
+        return None
+    
+    analyzer = ProteinAnalyzer()
+    analyzer.load_frame(df, content_hash=entry['metadata'].get('content_hash'))
+    registry.add(analyzer, dataset_id=dataset_id)
+    return analyzer
+
+def resolve_analyzer(sample_id):
+    dataset_id = request.args.get('dataset_id')
+    if dataset_id in SAMPLE_DATASETS:
+        # built-in samples are loaded on first use, like the default dataset of each endpoint
+        return get_sample_analyzer(dataset_id)
+    if dataset_id:
+        return load_dataset(dataset_id)
+    return get_sample_analyzer(sample_id)
+
+upload_progress = OrderedDict()
+upload_progress_lock = threading.Lock()
+
+def track_upload(upload_id, **fields):
+    with upload_progress_lock:
+        entry = upload_progress.setdefault(upload_id, {'upload_id': upload_id})
+        entry.update(fields)
+        upload_progress.move_to_end(upload_id)
+        while len(upload_progress) > MAX_TRACKED_UPLOADS:
+            upload_progress.popitem(last=False)
 
 @app.route('/api/protein-upload', methods=['POST'])
 def upload_protein_data():
     try:
+        # checked before request.files, which would buffer the whole body first
+        if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+            return jsonify({'error': f'upload exceeds the size cap of {MAX_UPLOAD_BYTES // (1024 * 1024)} MB'}), 413
+        
         if 'file' not in request.files:
             return jsonify({'error': 'no file uploaded'}), 400
         
@@ -466,38 +1449,276 @@ def upload_protein_data():
         if not file.filename.endswith('.csv'):
             return jsonify({'error': 'please upload CSV file'}), 400
         
-        csv_content = file.read().decode('utf-8')
+        # the id comes in the query string so clients can poll it while the body is still being parsed
+        upload_id = request.args.get('upload_id') or uuid.uuid4().hex
+        track_upload(upload_id, status='parsing', rows=0, bytes_read=0, total_bytes=request.content_length)
+        
+        def report(rows, bytes_read):
+            track_upload(upload_id, rows=rows, bytes_read=bytes_read)
         
-        success, message = analyzer.load_data(csv_content)
+        analyzer = ProteinAnalyzer()
+        success, message = analyzer.load_stream(file.stream, progress=report)
         
         if success:
-            growth_analysis = analyzer.analyze_growth_patterns()
-            correlation_analysis = analyzer.perform_correlation_analysis()
-            fitting_analysis = analyzer.perform_curve_fitting()
+            track_upload(upload_id, status='analyzing')
+            analyzer.run_analyses()
+            dataset_id = registry.add(analyzer)
+            dataset_store.save(dataset_id, analyzer.data, 'protein', metadata={
+                'filename': file.filename,
+                'content_hash': analyzer.content_hash
+            })
+            track_upload(upload_id, status='done', dataset_id=dataset_id)
+            growth_analysis = analyzer.analysis_results.get('growth_patterns')
             
             return jsonify({
                 'message': message,
+                'upload_id': upload_id,
+                'dataset_id': dataset_id,
                 'data_preview': growth_analysis[:5] if growth_analysis else [],
                 'total_records': len(growth_analysis) if growth_analysis else 0,
-                'correlation': correlation_analysis,
-                'fitting': fitting_analysis
+                'correlation': analyzer.correlation_results,
+                'fitting': analyzer.fitting_results
             })
         else:
+            track_upload(upload_id, status='failed', error=message)
             return jsonify({'error': message}), 400
             
     except Exception as e:
         return jsonify({'error': f'error: {str(e)}'}), 500
 
+@app.route('/api/protein-upload/progress/<upload_id>', methods=['GET'])
+def get_upload_progress(upload_id):
+    with upload_progress_lock:
+        entry = upload_progress.get(upload_id)
+        entry = dict(entry) if entry else None
+    if entry is None:
+        return jsonify({'error': 'upload not found'}), 404
+    return jsonify(entry)
+
+def analyze_csv_bytes(filename, content):
+    analyzer = ProteinAnalyzer()
+    success, message = analyzer.load_stream(BytesIO(content))
+    if not success:
+        return {'filename': filename, 'error': message}
+    
+    analyzer.run_analyses()
+    return {
+        'filename': filename,
+        'data': analyzer.data,
+        'content_hash': analyzer.content_hash,
+        'growth_patterns': analyzer.analysis_results.get('growth_patterns'),
+        'correlation': analyzer.correlation_results,
+        'fitting': analyzer.fitting_results
+    }
+
+def collect_batch_files(files):
+    # sizes are checked before anything is decompressed, so a small zip cannot expand into the worker's memory
+    batch = []
+    total = 0
+    for file in files:
+        if file.filename.endswith('.zip'):
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    name = member.filename
+                    if member.is_dir() or not name.endswith('.csv') or name.startswith('__MACOSX/'):
+                        continue
+                    if member.file_size > MAX_UPLOAD_BYTES:
+                        raise ValueError(f'{name} exceeds the size cap of {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+                    total += member.file_size
+                    if total > MAX_BATCH_BYTES:
+                        raise ValueError(f'batch exceeds the size cap of {MAX_BATCH_BYTES // (1024 * 1024)} MB')
+                    with archive.open(member) as source:
+                        batch.append((name, source.read(member.file_size)))
+        elif file.filename.endswith('.csv'):
+            content = file.read(MAX_BATCH_BYTES - total + 1)
+            total += len(content)
+            if total > MAX_BATCH_BYTES:
+                raise ValueError(f'batch exceeds the size cap of {MAX_BATCH_BYTES // (1024 * 1024)} MB')
+            batch.append((file.filename, content))
+    return batch
+
+def register_batch_result(result):
+    if 'error' in result:
+        return {'filename': result['filename'], 'error': result['error']}
+    
+    analyzer = ProteinAnalyzer()
+    analyzer.load_frame(result['data'], content_hash=result['content_hash'])
+    analyzer.adopt_results(result)
+    dataset_id = registry.add(analyzer)
+    dataset_store.save(dataset_id, analyzer.data, 'protein', metadata={
+        'filename': result['filename'],
+        'content_hash': analyzer.content_hash
+    })
+    
+    growth = result['growth_patterns'] or []
+    correlation = result['correlation'] or {}
+    fitting = result['fitting'] or {}
+    return {
+        'filename': result['filename'],
+        'dataset_id': dataset_id,
+        'rows': len(analyzer.data),
+        'columns': len(analyzer.data.columns),
+        'total_records': len(growth),
+        'pearson_r': correlation.get('pearson_r'),
+        'p_value': correlation.get('p_value'),
+        'model': fitting.get('model'),
+        'rmse': fitting.get('rmse')
+    }
+
+def iter_batch_results(batch):
+    if len(batch) < 2 or FIT_WORKERS < 2:
+        for filename, content in batch:
+            yield analyze_csv_bytes(filename, content)
+        return
+    
+    try:
+        pool = get_fit_pool()
+        futures = {pool.submit(analyze_csv_bytes, filename, content): filename for filename, content in batch}
+    except (BrokenProcessPool, OSError) as e:
+        print(f"error: analysis pool unavailable, analyzing inline: {e}")
+        reset_fit_pool()
+        for filename, content in batch:
+            yield analyze_csv_bytes(filename, content)
+        return
+    
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:
+            yield {'filename': futures[future], 'error': f'error: {str(e)}'}
+
+@app.route('/api/protein-upload-batch', methods=['POST'])
+def upload_protein_batch():
+    try:
+        if request.content_length and request.content_length > MAX_BATCH_BYTES:
+            return jsonify({'error': f'batch exceeds the size cap of {MAX_BATCH_BYTES // (1024 * 1024)} MB'}), 413
+        
+        files = request.files.getlist('files') + request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'no file uploaded'}), 400
+        
+        try:
+            batch = collect_batch_files(files)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 413
+        if not batch:
+            return jsonify({'error': 'please upload CSV files or a zip of CSV files'}), 400
+        if len(batch) > MAX_BATCH_FILES:
+            return jsonify({'error': f'too many files: at most {MAX_BATCH_FILES} per batch'}), 400
+        
+        if request.args.get('stream', 'false').lower() == 'true':
+            # one JSON line per file, in completion order
+            def generate():
+                for result in iter_batch_results(batch):
+                    yield json.dumps(register_batch_result(result)) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        summary = [register_batch_result(result) for result in iter_batch_results(batch)]
+        summary.sort(key=lambda row: row['filename'])
+        return jsonify({
+            'message': 'success',
+            'total_files': len(summary),
+            'failed_files': sum(1 for row in summary if 'error' in row),
+            'summary': summary
+        })
+        
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'invalid zip file'}), 400
+    except Exception as e:
+        return jsonify({'error': f'error: {str(e)}'}), 500
+
+@app.route('/api/protein-cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(analysis_cache.stats())
+
+@app.route('/api/protein-datasets', methods=['GET'])
+def list_protein_datasets():
+    stored = {entry['dataset_id']: entry for entry in dataset_store.describe(kind='protein')}
+    datasets = registry.describe()
+    for dataset in datasets:
+        dataset['loaded'] = True
+        dataset['persisted'] = dataset['dataset_id'] in stored
+    
+    loaded = {dataset['dataset_id'] for dataset in datasets}
+    for dataset_id, entry in stored.items():
+        if dataset_id not in loaded:
+            datasets.append({
+                'dataset_id': dataset_id,
+                'rows': entry['rows'],
+                'columns': entry['columns'],
+                'bytes': entry['bytes'],
+                'pinned': False,
+                'loaded': False,
+                'persisted': True
+            })
+    return jsonify(datasets)
+
+@app.route('/api/protein-datasets/<dataset_id>', methods=['DELETE'])
+def delete_protein_dataset(dataset_id):
+    removed = registry.remove(dataset_id)
+    removed = dataset_store.remove(dataset_id) or removed
+    if not removed:
+        return jsonify({'error': 'dataset not found'}), 404
+    return jsonify({'message': 'dataset removed', 'dataset_id': dataset_id})
+
+@app.route('/api/protein-datasets/<dataset_id>/append', methods=['POST'])
+def append_protein_dataset(dataset_id):
+    try:
+        if dataset_id in SAMPLE_DATASETS:
+            return jsonify({'error': 'sample datasets are read-only'}), 400
+        
+        analyzer = load_dataset(dataset_id)
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
+        
+        # new rows come either as a CSV upload or as the raw request body from a reader feed
+        if 'file' in request.files:
+            stream = request.files['file'].stream
+        else:
+            stream = BytesIO(request.get_data())
+        
+        old_hash = analyzer.content_hash
+        old_rows = len(analyzer.data)
+        success, message, new_records = analyzer.append_stream(stream)
+        if not success:
+            return jsonify({'error': message}), 400
+        
+        registry.replace_hash(dataset_id, old_hash)
+        entry = dataset_store.entry(dataset_id)
+        try:
+            dataset_store.save(dataset_id, analyzer.data, 'protein', metadata={
+                'filename': entry['metadata'].get('filename') if entry else None,
+                'content_hash': analyzer.content_hash
+            })
+        except OSError as e:
+            # a reader may still hold the previous file mapped (Windows refuses the replace)
+            print(f"error: could not persist appended dataset {dataset_id}: {e}")
+        
+        growth = analyzer.analysis_results.get('growth_patterns') or []
+        fitting = {key: value for key, value in (analyzer.fitting_results or {}).items() if key != 'wells'}
+        return jsonify({
+            'message': message,
+            'dataset_id': dataset_id,
+            'appended_rows': len(analyzer.data) - old_rows,
+            'total_rows': len(analyzer.data),
+            'new_records': new_records,
+            'total_records': len(growth),
+            'statistics': analyzer.running_statistics(),
+            'correlation': analyzer.correlation_results,
+            'fitting': fitting
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'error: {str(e)}'}), 500
+
 @app.route('/api/protein-data', methods=['GET'])
 def get_protein_data():
     try:
-        if analyzer.data is None:
-            sample_data = """Induction time/h,0.0 ,0.5 ,1.0 ,1.5 ,2.0 ,3.0 ,4.0 ,5.0 ,6.0 ,20.0 
-Mean intensity (a.u.),0.20 ,7.95 ,10.38 ,11.49 ,12.49 ,13.97 ,15.76 ,17.48 ,17.68 ,18.02 """
-            
-            analyzer.load_data(sample_data)
-            analyzer.analyze_growth_patterns()
+        analyzer = resolve_analyzer('sample-intensity')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
         
+        analyzer.run_analyses()
         growth_data = analyzer.analysis_results.get('growth_patterns', [])
         return jsonify(growth_data)
         
@@ -507,28 +1728,100 @@ Mean intensity (a.u.),0.20 ,7.95 ,10.38 ,11.49 ,12.49 ,13.97 ,15.76 ,17.48 ,17.6
 @app.route('/api/protein-analysis-chart', methods=['GET'])
 def get_analysis_chart():
     try:
-        if analyzer.data is None:
-            sample_data = """OD600值,A-a-1,A-a-2,A-a-3,B-a-1,B-a-2,B-a-3
-2025/8/10 22:00,0.018,0.015,0.014,0.015,0.016,0.016
-2025/8/11 22:00,0.014,0.029,0.002,0.026,0.027,0.011
-2025/8/12 22:00,0.018,0.020,0.002,0.021,0.032,0.004
-2025/8/13 22:00,0.005,0.006,-0.008,0.012,0.019,0.008
-2025/8/14 22:00,0.019,0.017,0.005,0.018,0.021,0.011
-2025/8/15 22:00,0.012,0.013,-0.006,0.011,0.024,0.010
-2025/8/16 22:00,0.015,0.018,0.003,0.012,0.022,0.008"""
-            analyzer.load_data(sample_data)
+        analyzer = resolve_analyzer('sample-groups')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
         
-        img_buffer = analyzer.generate_visualization()
+        dpi = min(max(request.args.get('dpi', 300, type=int), 50), 300)
         
-        if img_buffer:
-            img_buffer.seek(0)
-            return send_file(img_buffer, mimetype='image/png')
-        else:
+        def render():
+            img_buffer = analyzer.generate_visualization(dpi=dpi)
+            if img_buffer:
+                img_buffer.seek(0)
+                return send_file(img_buffer, mimetype='image/png')
             return jsonify({'error': 'error: failed to generate chart'}), 500
+        
+        # the content hash versions the dataset, so an unchanged dataset revalidates with a 304
+        return conditional_response(f'{analyzer.content_hash}-chart-{dpi}', render, 'private, no-cache')
             
     except Exception as e:
         return jsonify({'error': f'error: failed to generate chart: {str(e)}'}), 500
 
+@app.route('/api/protein-chart-data', methods=['GET'])
+def get_chart_data():
+    try:
+        analyzer = resolve_analyzer('sample-intensity')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
+        
+        max_points = min(max(request.args.get('max_points', 500, type=int), 3), 10000)
+        
+        def build():
+            chart_data = analyzer.chart_series(max_points=max_points)
+            if chart_data is None:
+                return jsonify({'error': 'error: failed to build chart data'}), 500
+            return jsonify(chart_data)
+        
+        return conditional_response(f'{analyzer.content_hash}-chart-data-{max_points}', build, 'private, no-cache')
+        
+    except Exception as e:
+        return jsonify({'error': f'error: failed to build chart data: {str(e)}'}), 500
+
+@app.route('/api/protein-correlation-matrix', methods=['GET'])
+def get_correlation_matrix():
+    try:
+        analyzer = resolve_analyzer('sample-groups')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
+        
+        method = request.args.get('method', 'pearson')
+        correction = request.args.get('correction', 'fdr_bh')
+        cluster = request.args.get('cluster', 'true').lower() != 'false'
+        if method not in CORRELATION_METHODS:
+            return jsonify({'error': f'method must be one of {", ".join(CORRELATION_METHODS)}'}), 400
+        if correction not in CORRECTION_METHODS:
+            return jsonify({'error': f'correction must be one of {", ".join(CORRECTION_METHODS)}'}), 400
+        
+        def build():
+            matrix = analyzer.correlation_matrix(method=method, correction=correction, cluster=cluster)
+            if matrix is None:
+                return jsonify({'error': 'error: need at least 2 wells and 3 observations'}), 400
+            return jsonify(matrix)
+        
+        etag = f'{analyzer.content_hash}-correlation-matrix-{method}-{correction}-{int(cluster)}'
+        return conditional_response(etag, build, 'private, no-cache')
+        
+    except Exception as e:
+        return jsonify({'error': f'error: failed to compute correlation matrix: {str(e)}'}), 500
+
+@app.route('/api/protein-kinetics', methods=['GET'])
+def get_expression_kinetics():
+    try:
+        analyzer = resolve_analyzer('sample-intensity')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
+        
+        horizon = request.args.get('horizon', type=float)
+        points = min(max(request.args.get('points', 20, type=int), 2), 500)
+        level = request.args.get('level', 0.95, type=float)
+        fraction = request.args.get('fraction', 0.95, type=float)
+        if horizon is not None and not 0 <= horizon <= 1e6:
+            return jsonify({'error': 'horizon must be a non-negative number of hours'}), 400
+        if not 0.5 <= level < 1 or not 0.5 <= fraction < 1:
+            return jsonify({'error': 'level and fraction must be between 0.5 and 1'}), 400
+        
+        def build():
+            report = analyzer.expression_kinetics(horizon=horizon, points=points, level=level, fraction=fraction)
+            if report is None:
+                return jsonify({'error': 'error: need at least 4 time points to fit expression kinetics'}), 400
+            return jsonify(report)
+        
+        etag = f'{analyzer.content_hash}-kinetics-{horizon}-{points}-{level}-{fraction}'
+        return conditional_response(etag, build, 'private, no-cache')
+        
+    except Exception as e:
+        return jsonify({'error': f'error: failed to fit expression kinetics: {str(e)}'}), 500
+
 @app.route('/api/protein-chat', methods=['POST'])
 def protein_chat():
     try:
@@ -546,12 +1839,11 @@ def protein_chat():
 def get_correlation_analysis():
     
     try:
-        if analyzer.data is None:
-            sample_data = """Induction time/h,0.0 ,0.5 ,1.0 ,1.5 ,2.0 ,3.0 ,4.0 ,5.0 ,6.0 ,20.0 
-Mean intensity (a.u.),0.20 ,7.95 ,10.38 ,11.49 ,12.49 ,13.97 ,15.76 ,17.48 ,17.68 ,18.02 """
-            analyzer.load_data(sample_data)
-            analyzer.perform_correlation_analysis()
+        analyzer = resolve_analyzer('sample-intensity')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
         
+        analyzer.run_analyses()
         correlation_data = analyzer.correlation_results
         return jsonify(correlation_data)
         
@@ -561,12 +1853,11 @@ Mean intensity (a.u.),0.20 ,7.95 ,10.38 ,11.49 ,12.49 ,13.97 ,15.76 ,17.48 ,17.6
 @app.route('/api/protein-fitting', methods=['GET'])
 def get_fitting_results():
     try:
-        if analyzer.data is None:
-            sample_data = """Induction time/h,0.0 ,0.5 ,1.0 ,1.5 ,2.0 ,3.0 ,4.0 ,5.0 ,6.0 ,20.0 
-Mean intensity (a.u.),0.20 ,7.95 ,10.38 ,11.49 ,12.49 ,13.97 ,15.76 ,17.48 ,17.68 ,18.02 """
-            analyzer.load_data(sample_data)
-            analyzer.perform_curve_fitting()
+        analyzer = resolve_analyzer('sample-intensity')
+        if analyzer is None:
+            return jsonify({'error': 'dataset not found'}), 404
         
+        analyzer.run_analyses()
         fitting_data = analyzer.fitting_results
         return jsonify(fitting_data)
         
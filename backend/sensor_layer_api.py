@@ -5,6 +5,7 @@ from scipy.integrate import solve_ivp
 import matplotlib.pyplot as plt
 import os
 import uuid
+from http_cache import IMMUTABLE_MAX_AGE, send_cached_file
 
 app = Flask(__name__)
 CORS(app)
@@ -75,7 +76,8 @@ def get_sensor_image(filename):
     filepath = os.path.join(IMG_DIR, filename)
     if not os.path.exists(filepath):
         return 'File not found', 404
-    return send_file(filepath, mimetype='image/png')
+    # simulation images get a fresh uuid name per run and are never rewritten
+    return send_cached_file(filepath, mimetype='image/png', max_age=IMMUTABLE_MAX_AGE, immutable=True)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=True) 
\ No newline at end of file
@@ -1,182 +1,159 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-from ultralytics import YOLO
+from werkzeug.utils import secure_filename
 import cv2
 import base64
+import json
+import os
+import shutil
+import tempfile
 import time
-import threading
 import logging
+from detection_metrics import PROMETHEUS_CONTENT_TYPE, DetectionMetrics
+from detection_pipeline import (TARGET_FPS, DetectionPipeline, FrameBroadcaster, FrameDetector, MJPEG_BOUNDARY,
+                                camera_ids_from, mjpeg_frames, parse_camera_id, target_fps_from)
+from detection_statistics import DetectionStatistics
+from batch_detection import BatchDetector, DetectionSummary, ModelPool, batch_options_from, detect_media, media_kind
+from model_backends import load_model
+from object_tracker import TRACKER_DETECT_INTERVAL, TRACKER_LOW_THRESHOLD, ObjectTracker, detect_interval_from
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CONFIDENCE_THRESHOLD = 0.3
+
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000"])
 
 class SimpleDetectionService:
     def __init__(self, model_path=r".\best.pt"):
+        self.model_path = model_path
+        # batch requests borrow from models kept across requests instead of reloading the weights every time
+        self.batch_models = ModelPool(lambda: load_model(self.model_path))
         try:
-            self.model = YOLO(model_path)
+            self.model = load_model(model_path)
             logger.info("YOLO model loaded successfully")
         except Exception as e:
             logger.error(f"YOLO model loaded failed: {e}")
             self.model = None
             
-        self.camera = None
+        self.cameras = {}
         self.is_running = False
-        self.current_frame = None
-        self.current_detections = []
+        self.pipeline = None
+        self.frames = FrameBroadcaster()
+        self.metrics = DetectionMetrics()
+        self.detector = FrameDetector(self.model, CONFIDENCE_THRESHOLD, self.update_statistics, self.metrics,
+                                      jpeg_quality=70)
         
-        self.statistics = {
-            'total_detections': 0,
-            'plastic_types': {},
-            'detection_confidence_avg': 0.0,
-            'session_start_time': None,
-            'current_fps': 0
-        }
+        self.statistics = DetectionStatistics()
+        self.camera_statistics = {}
+    
+    @property
+    def camera_ids(self):
+        return list(self.cameras)
         
     def start_camera(self, camera_id=0):
+        camera = None
         try:
-            if self.camera:
-                self.camera.release()
+            if camera_id in self.cameras:
+                self.cameras.pop(camera_id).release()
                 
-            self.camera = cv2.VideoCapture(camera_id)
+            camera = cv2.VideoCapture(camera_id)
             
-            if not self.camera.isOpened():
+            if not camera.isOpened():
                 raise Exception(f"camera {camera_id} cannot be opened")
                 
-            ret, frame = self.camera.read()
+            ret, frame = camera.read()
             if not ret:
                 raise Exception("camera cannot read frame")
                 
+            self.cameras[camera_id] = camera
             logger.info(f"camera {camera_id} started successfully")
             return True
             
         except Exception as e:
             logger.error(f"camera startup failed: {e}")
-            if self.camera:
-                self.camera.release()
-                self.camera = None
+            if camera:
+                camera.release()
             return False
     
-    def update_statistics(self, class_name, confidence):
-        self.statistics['total_detections'] += 1
-        
-        if class_name not in self.statistics['plastic_types']:
-            self.statistics['plastic_types'][class_name] = 0
-        self.statistics['plastic_types'][class_name] += 1
+    def release_cameras(self):
+        for camera in self.cameras.values():
+            camera.release()
+        self.cameras = {}
+    
+    def update_statistics(self, detections, camera_id=None):
+        if not len(detections):
+            return
         
-        total = self.statistics['total_detections']
-        current_avg = self.statistics['detection_confidence_avg']
-        self.statistics['detection_confidence_avg'] = (current_avg * (total - 1) + confidence) / total
+        self.statistics.record(detections, self.model.names)
+        if camera_id in self.camera_statistics:
+            self.camera_statistics[camera_id].record(detections, self.model.names)
+    
+    def statistics_snapshot(self, camera_id=None):
+        statistics = self.camera_statistics.get(camera_id, self.statistics)
+        pipeline = self.pipeline
+        fps = (pipeline.source_fps.get(camera_id, 0) if camera_id in self.camera_statistics else pipeline.fps) if pipeline else 0
+        return dict(statistics.snapshot(), current_fps=fps)
 
-    def capture_frame(self):
-        if not self.camera:
-            return None
-            
-        try:
-            ret, frame = self.camera.read()
+    def frame_reader(self, camera_id):
+        camera = self.cameras[camera_id]
+        
+        def read_frame():
+            ret, frame = camera.read()
             if not ret:
-                logger.warning("cannot read camera frame")
+                logger.warning(f"cannot read frame from camera {camera_id}")
                 return None
-                
-            current_detections = []
-            
-            if self.model:
-                try:
-                    results = self.model.predict(frame, conf=0.3, verbose=False)
-                    if results and len(results) > 0:
-                        annotated_frame = results[0].plot()
-                        
-                        if results[0].boxes is not None:
-                            for box in results[0].boxes:
-                                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                                confidence = float(box.conf[0].cpu().numpy())
-                                class_id = int(box.cls[0].cpu().numpy())
-                                class_name = self.model.names[class_id]
-                                
-                                detection = {
-                                    'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                                    'confidence': confidence,
-                                    'class_id': class_id,
-                                    'class_name': class_name,
-                                    'timestamp': time.time()
-                                }
-                                current_detections.append(detection)
-                                
-                                self.update_statistics(class_name, confidence)
-                    else:
-                        annotated_frame = frame
-                except Exception as e:
-                    logger.warning(f"detection processing failed, using original frame: {e}")
-                    annotated_frame = frame
-            else:
-                annotated_frame = frame
-                
-
-            self.current_detections = current_detections
-                
-            _, buffer = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-            
-            self.current_frame = frame_base64
-            return frame_base64
-            
-        except Exception as e:
-            logger.error(f"frame processing failed: {e}")
-            return None
+            return frame
+        return read_frame
+    
+    def encode(self, item):
+        return self.detector.encode(item, camera_id=item[0], timestamp=time.time())
     
-    def start_detection(self, camera_id=0):
+    def publish(self, camera_id, payload):
+        jpeg, detections, info = payload
+        self.frames.publish(camera_id, jpeg, detections, **info)
+    
+    def start_detection(self, camera_ids=(0,), queue_size=2, annotate=False, target_fps=TARGET_FPS, motion_gate=True,
+                        tracking=True, detect_interval=TRACKER_DETECT_INTERVAL):
         if self.is_running:
             return True
-            
-        if not self.start_camera(camera_id):
-            return False
+        
+        for camera_id in camera_ids:
+            if not self.start_camera(camera_id):
+                self.release_cameras()
+                return False
             
         self.is_running = True
         
-        self.statistics = {
-            'total_detections': 0,
-            'plastic_types': {},
-            'detection_confidence_avg': 0.0,
-            'session_start_time': time.time(),
-            'current_fps': 0
-        }
+        self.statistics.reset(time.time())
+        self.camera_statistics = {camera_id: DetectionStatistics(time.time()) for camera_id in self.cameras}
+        trackers = {camera_id: ObjectTracker(detect_interval, high_threshold=CONFIDENCE_THRESHOLD)
+                    for camera_id in self.cameras} if tracking else {}
+        self.detector.reset(annotate, motion_gate, trackers, low_threshold=TRACKER_LOW_THRESHOLD)
         
-        def capture_loop():
-            frame_count = 0
-            fps_start_time = time.time()
-            
-            while self.is_running:
-                try:
-                    self.capture_frame()
-                    
-                    frame_count += 1
-                    if frame_count % 30 == 0:
-                        elapsed = time.time() - fps_start_time
-                        self.statistics['current_fps'] = 30 / elapsed if elapsed > 0 else 0
-                        fps_start_time = time.time()
-                    
-                    time.sleep(0.1)  
-                except Exception as e:
-                    logger.error(f"capture loop failed: {e}")
-                    time.sleep(1)
-                    
-        self.capture_thread = threading.Thread(target=capture_loop)
-        self.capture_thread.daemon = True
-        self.capture_thread.start()
+        # capture, inference and encoding run on their own threads joined by drop-oldest queues
+        sources = {camera_id: self.frame_reader(camera_id) for camera_id in self.cameras}
+        self.pipeline = DetectionPipeline(sources, self.detector.detect, self.encode, self.publish, queue_size=queue_size,
+                                          target_fps=target_fps, metrics=self.metrics)
+        self.pipeline.start()
         
-        logger.info("detection service started")
+        logger.info(f"detection service started on cameras {self.camera_ids}")
         return True
     
     def stop_detection(self):
         self.is_running = False
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-        self.current_frame = None
-        self.current_detections = []
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+        self.release_cameras()
+        self.frames.clear()
         logger.info("detection service stopped")
+    
+    def resolve_camera(self, camera_id):
+        if camera_id is None:
+            return next(iter(self.cameras), None)
+        return camera_id
 
 detection_service = SimpleDetectionService()
 
@@ -184,12 +161,18 @@ detection_service = SimpleDetectionService()
 def start_detection():
     try:
         data = request.get_json() or {}
-        camera_id = data.get('camera_id', 0)
+        camera_ids = camera_ids_from(data)
         
-        if detection_service.start_detection(camera_id):
+        target_fps = target_fps_from(data)
+        detect_interval = detect_interval_from(data)
+        
+        if detection_service.start_detection(camera_ids, annotate=bool(data.get('annotate', False)), target_fps=target_fps,
+                                             motion_gate=bool(data.get('motion_gate', True)),
+                                             tracking=bool(data.get('tracking', True)), detect_interval=detect_interval):
             return jsonify({
                 'status': 'success',
-                'message': 'detection started'
+                'message': 'detection started',
+                'camera_ids': detection_service.camera_ids
             })
         else:
             return jsonify({
@@ -197,6 +180,11 @@ def start_detection():
                 'message': 'camera startup failed'
             }), 500
             
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"detection startup failed: {e}")
         return jsonify({
@@ -221,12 +209,17 @@ def stop_detection():
 @app.route('/api/detection/frame', methods=['GET'])
 def get_frame():
     try:
-        if detection_service.current_frame:
+        camera_id = detection_service.resolve_camera(parse_camera_id(request.args.get('camera_id')))
+        entry = detection_service.frames.latest(camera_id)
+        if entry:
             return jsonify({
                 'status': 'success',
-                'frame': detection_service.current_frame,
-                'detections': detection_service.current_detections,
-                'statistics': detection_service.statistics,
+                'camera_id': camera_id,
+                'frame': base64.b64encode(entry['jpeg']).decode('utf-8'),
+                'frame_size': entry['frame_size'],
+                'annotated': entry['annotated'],
+                'detections': entry['detections'],
+                'statistics': detection_service.statistics_snapshot(camera_id),
                 'timestamp': time.time()
             })
         else:
@@ -240,26 +233,155 @@ def get_frame():
             'message': str(e)
         }), 500
 
+@app.route('/api/detection/stream', methods=['GET'])
+def stream_frames():
+    camera_id = detection_service.resolve_camera(parse_camera_id(request.args.get('camera_id')))
+    if not detection_service.is_running or camera_id not in detection_service.cameras:
+        return jsonify({
+            'status': 'error',
+            'message': 'detection is not running on this camera'
+        }), 404
+    
+    max_fps = request.args.get('max_fps', type=float)
+    frames = mjpeg_frames(detection_service.frames, camera_id, lambda: detection_service.is_running, max_fps)
+    response = Response(stream_with_context(frames), mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}')
+    response.headers['Cache-Control'] = 'no-cache, no-store'
+    return response
+
+@app.route('/api/detection/events', methods=['GET'])
+def stream_detections():
+    camera_id = detection_service.resolve_camera(parse_camera_id(request.args.get('camera_id')))
+    if not detection_service.is_running or camera_id not in detection_service.cameras:
+        return jsonify({
+            'status': 'error',
+            'message': 'detection is not running on this camera'
+        }), 404
+    
+    # detections travel as server-sent events next to the MJPEG stream, without the image bytes
+    def events():
+        sequence = 0
+        while detection_service.is_running:
+            entry = detection_service.frames.wait(camera_id, sequence)
+            if entry is None:
+                yield ': keep-alive\n\n'
+                continue
+            sequence = entry['sequence']
+            pipeline = detection_service.pipeline
+            yield 'data: ' + json.dumps({
+                'camera_id': camera_id,
+                'sequence': sequence,
+                'detections': entry['detections'],
+                'frame_size': entry['frame_size'],
+                'annotated': entry['annotated'],
+                'fps': pipeline.source_fps.get(camera_id, 0) if pipeline else 0,
+                'timestamp': entry['timestamp']
+            }) + '\n\n'
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/detection/annotation', methods=['POST'])
+def set_annotation():
+    data = request.get_json(silent=True) or {}
+    detection_service.detector.annotate = bool(data.get('enabled', False))
+    return jsonify({
+        'status': 'success',
+        'annotate': detection_service.detector.annotate
+    })
+
+@app.route('/api/detection/batch', methods=['POST'])
+def batch_detection():
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({
+            'status': 'error',
+            'message': 'no video or image files uploaded'
+        }), 400
+    if not detection_service.model:
+        return jsonify({
+            'status': 'error',
+            'message': 'model not loaded'
+        }), 503
+    
+    try:
+        options = batch_options_from(request.form)
+        names = [secure_filename(file.filename or '') for file in files]
+        for name in names:
+            if media_kind(name) is None:
+                raise ValueError(f"unsupported media: {name or 'unnamed upload'}")
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    # uploaded images form one source in upload order; each video is its own source
+    upload_dir = tempfile.mkdtemp(prefix='detection-batch-')
+    images, sources = [], []
+    for index, (file, name) in enumerate(zip(files, names)):
+        path = os.path.join(upload_dir, f'{index:04d}-{name}')
+        file.save(path)
+        if media_kind(name) == 'image':
+            images.append(path)
+        else:
+            sources.append((name, 'video', [path]))
+    if images:
+        sources.insert(0, ('images', 'images', images))
+    
+    detector = BatchDetector(detection_service.batch_models, options['batch_size'], options['workers'], options['conf'])
+    summary = DetectionSummary(options['conf'])
+    
+    def generate():
+        # one JSON object per line: every frame as it finishes, then the summary
+        try:
+            for frame in detect_media(detector, sources, summary, options['frame_stride']):
+                yield json.dumps(dict(frame, type='frame'), ensure_ascii=False) + '\n'
+            yield json.dumps(dict(summary.to_dict(), type='summary'), ensure_ascii=False) + '\n'
+        except Exception as e:
+            logger.error(f"batch detection failed: {e}")
+            yield json.dumps({'type': 'error', 'message': str(e)}) + '\n'
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/detection/status', methods=['GET'])
 def get_status():
     return jsonify({
         'is_running': detection_service.is_running,
-        'has_frame': detection_service.current_frame is not None,
+        'has_frame': len(detection_service.frames) > 0,
         'model_loaded': detection_service.model is not None,
-        'statistics': detection_service.statistics
+        'model_backend': getattr(detection_service.model, 'backend_info', None),
+        'camera_ids': detection_service.camera_ids,
+        'annotate': detection_service.detector.annotate,
+        'statistics': detection_service.statistics_snapshot(),
+        'camera_statistics': {str(camera_id): detection_service.statistics_snapshot(camera_id)
+                              for camera_id in list(detection_service.camera_statistics)},
+        'pipeline': detection_service.pipeline.stats() if detection_service.pipeline else None,
+        'motion_gate': detection_service.detector.motion_gate.stats() if detection_service.detector.motion_gate else None,
+        'tracking': {str(camera_id): tracker.stats() for camera_id, tracker in detection_service.detector.trackers.items()}
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    # scrape target: stage latency histograms, queue depths and drop counters in the Prometheus text format
+    text = detection_service.metrics.prometheus(detection_service.pipeline, detection_service.detector.motion_gate,
+                                                detection_service.statistics)
+    return Response(text, content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/api/detection/metrics', methods=['GET'])
+def get_metrics():
+    return jsonify(dict(detection_service.metrics.summary(detection_service.pipeline, detection_service.detector.motion_gate),
+                        status='success'))
+
 @app.route('/api/detection/statistics/reset', methods=['POST'])
 def reset_statistics():
     try:
-    try:
-        detection_service.statistics = {
-            'total_detections': 0,
-            'plastic_types': {},
-            'detection_confidence_avg': 0.0,
-            'session_start_time': time.time(),
-            'current_fps': 0
-        }
+        # reset in place, so the inference thread never records into a dict a request has just swapped out
+        detection_service.statistics.reset(time.time())
+        for statistics in list(detection_service.camera_statistics.values()):
+            statistics.reset(time.time())
         return jsonify({
             'status': 'success',
             'message': 'statistics reset'
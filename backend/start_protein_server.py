@@ -27,6 +27,8 @@ def main():
     print("  - /api/protein-data (GET) - get analysis data")
     print("  - /api/protein-analysis-chart (GET) - get visualization chart")
     print("  - /api/protein-chat (POST) - intelligent analysis assistant")
+    print("  - /api/protein-datasets (GET) - list uploaded datasets")
+    print("  - /api/protein-kinetics (GET) - expression kinetics and yield forecasts")
     print()
     print("server address: http://localhost:5000")
     print("press Ctrl+C to stop server")
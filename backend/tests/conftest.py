@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# the backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# keep persisted datasets out of backend/data
+os.environ.setdefault('DATASET_STORE_DIR', tempfile.mkdtemp(prefix='dataset-store-'))
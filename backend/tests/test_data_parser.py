@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+import data_parser
+from data_parser import parse_pollution_workbook, parse_sheet
+from dataset_store import DatasetStore
+
+
+def pollution_sheet():
+    return pd.DataFrame([
+        ['dosage_model', None, None, None],
+        ['original', 0, 10, 20],
+        ['added', 5, 0, 15],
+        ['treated', 1, 2, None],
+        ['difference', 4, -2, 0],
+        ['time_model', None, None, None],
+        ['time', 0, 30, 60],
+        ['pb', 'n/a', 3.5, 2.0],
+        ['protein_expression', 0, 12, 24]
+    ])
+
+
+def test_parse_sheet_keeps_zeros_and_drops_blanks():
+    data = parse_sheet(pollution_sheet())
+
+    assert data['dosage_model']['original_pb_concentration'] == [0, 10, 20]
+    assert data['dosage_model']['added_pb_amount'] == [5, 0, 15]
+    assert data['dosage_model']['treated_pb_amount'] == [1, 2]
+    assert data['dosage_model']['difference'] == [4, -2, 0]
+    assert data['dosage_model']['treatment_time'] == 30
+    assert data['time_model']['time_points'] == [0, 30, 60]
+    assert data['time_model']['pb_concentrations'] == [3.5, 2.0]
+    # protein_expression has its values on the header row and no second row in this sheet
+    assert data['protein_expression']['time_points'] == [0, 12, 24]
+    assert data['protein_expression']['protein_concentrations'] == []
+
+
+def test_parse_sheet_leaves_missing_blocks_empty():
+    data = parse_sheet(pd.DataFrame([['unrelated', 1, 2]]))
+    assert data == {'dosage_model': {}, 'time_model': {}, 'protein_expression': {}}
+
+
+def test_workbook_is_read_once_and_copied(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'polludata.xlsx'
+    path.write_bytes(b'workbook')
+    reads = []
+
+    def read_excel(file_path, sheet_name=None, header=None):
+        reads.append(file_path)
+        return {'Sheet1': pollution_sheet()}
+
+    monkeypatch.setattr(data_parser.pd, 'read_excel', read_excel)
+    monkeypatch.setattr(data_parser, 'parsed_workbooks', {})
+    store = DatasetStore(str(tmp_path / 'store'))
+
+    first = parse_pollution_workbook(str(path), store=store)
+    first['Sheet1']['dosage_model']['difference'].append(99)
+    assert parse_pollution_workbook(str(path), store=store)['Sheet1'] == parse_sheet(pollution_sheet())
+
+    # a new process finds the parsed workbook in the dataset store instead of reading the file again
+    monkeypatch.setattr(data_parser, 'parsed_workbooks', {})
+    assert parse_pollution_workbook(str(path), store=store)['Sheet1'] == parse_sheet(pollution_sheet())
+    assert len(reads) == 1
@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dataset_store import DatasetStore
+
+pytest.importorskip('pyarrow')
+
+
+def plate(rows=4):
+    return pd.DataFrame({
+        'time': pd.date_range('2025-08-10', periods=rows, freq='60min'),
+        'A-a-1': [0.1 * i if i != 2 else None for i in range(rows)],
+        'label': [f'row-{i}' for i in range(rows)]
+    })
+
+
+def test_save_load_round_trip(tmp_path):
+    frame = plate()
+    store = DatasetStore(str(tmp_path))
+    entry = store.save('plate', frame, 'protein', metadata={'content_hash': 'abc'})
+    assert entry['rows'] == 4
+
+    pd.testing.assert_frame_equal(store.load('plate'), frame, check_dtype=False)
+
+    # a fresh store reads the manifest back from disk
+    reopened = DatasetStore(str(tmp_path))
+    assert reopened.entry('plate')['metadata'] == {'content_hash': 'abc'}
+    assert [entry['dataset_id'] for entry in reopened.describe(kind='protein')] == ['plate']
+
+    assert reopened.remove('plate')
+    assert reopened.load('plate') is None
+    assert not reopened.remove('plate')
+
+
+def test_oldest_datasets_are_evicted_past_the_size_cap(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    size = store.save('first', plate(), 'protein')['bytes']
+    store.max_bytes = 2 * size
+    store.save('second', plate(), 'protein')
+    store.save('third', plate(), 'protein')
+
+    assert [entry['dataset_id'] for entry in store.describe()] == ['second', 'third']
+    assert not os.path.exists(os.path.join(str(tmp_path), 'first.arrow'))
+
+
+def test_expired_datasets_are_dropped_on_open(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.save('plate', plate(), 'protein')
+
+    reopened = DatasetStore(str(tmp_path), max_age=-1)
+    assert reopened.entry('plate') is None
+    assert reopened.load('plate') is None
@@ -0,0 +1,34 @@
+import pytest
+
+from detection_metrics import DetectionMetrics, LatencyHistogram, RateMeter
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.05, 0.05, 0.5):
+        histogram.observe(seconds)
+
+    counts, total, maximum = histogram.snapshot()
+    assert counts == [1, 2, 1, 0]
+    assert total == pytest.approx(0.605)
+    assert maximum == 0.5
+    assert histogram.quantile(0.5, counts) == pytest.approx(0.055)
+
+
+def test_rate_meter_decays_when_events_stop():
+    meter = RateMeter(window=5)
+    meter.started = 0
+    for now in range(10):
+        meter.mark(now)
+    assert meter.rate(10) == pytest.approx(1.0)
+    assert meter.rate(100) == 0.0
+
+
+def test_prometheus_exposition_has_cumulative_buckets():
+    metrics = DetectionMetrics(stages=('inference',))
+    metrics.observe('inference', 0.02)
+    text = metrics.prometheus()
+    assert '# TYPE detection_stage_latency_seconds histogram' in text
+    assert 'detection_stage_latency_seconds_bucket{stage="inference",le="0.025"} 1' in text
+    assert 'detection_stage_latency_seconds_bucket{stage="inference",le="+Inf"} 1' in text
+    assert 'detection_running 0' in text
@@ -0,0 +1,300 @@
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import detection_pipeline
+from detection_pipeline import (MJPEG_BOUNDARY, DetectionDelta, DetectionPipeline, DropOldestQueue, FrameBroadcaster,
+                                FrameDetector, MotionGate, RateController, camera_ids_from, class_counts,
+                                detection_dicts, extract_detections, mjpeg_frames)
+from object_tracker import ObjectTracker
+
+
+def test_drop_oldest_queue_keeps_the_newest_items():
+    queue = DropOldestQueue(maxsize=2)
+    for item in range(5):
+        queue.put(item)
+
+    assert queue.dropped == 3
+    assert len(queue) == 2
+    assert queue.get_nowait() == 3
+    assert queue.get(timeout=0) == 4
+    assert queue.get(timeout=0) is None
+
+
+def test_closed_queue_returns_without_waiting():
+    queue = DropOldestQueue()
+    queue.put('frame')
+    queue.close()
+    assert queue.get(timeout=5) is None
+
+
+def run_pipeline(pipeline, published, count, timeout=5.0):
+    pipeline.start()
+    deadline = time.time() + timeout
+    while len(published) < count and time.time() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+
+
+def test_pipeline_runs_frames_through_every_stage():
+    frames = itertools.count()
+
+    def read():
+        time.sleep(0.001)
+        return next(frames)
+
+    published = []
+    pipeline = DetectionPipeline(
+        {'camera': read},
+        infer=lambda batch: [frame * 10 for _, frame in batch],
+        encode=lambda result: f'frame-{result}',
+        publish=lambda source_id, payload: published.append((source_id, payload)),
+        target_fps=100
+    )
+    run_pipeline(pipeline, published, 5)
+
+    assert len(published) >= 5
+    assert all(source_id == 'camera' and payload.startswith('frame-') for source_id, payload in published)
+    # capture outruns inference, so stale frames were dropped rather than queued
+    stats = pipeline.stats()
+    assert stats['sources']['camera']['dropped_frames'] > 0
+    assert not pipeline.is_running
+
+
+def test_pipeline_batches_frames_from_every_camera():
+    def camera(name):
+        def read():
+            time.sleep(0.001)
+            return name
+        return read
+
+    batches = []
+    published = []
+
+    def infer(batch):
+        batches.append([source_id for source_id, _ in batch])
+        return [frame for _, frame in batch]
+
+    pipeline = DetectionPipeline({0: camera('front'), 'rtsp://back': camera('back')}, infer=infer,
+                                 encode=lambda result: result,
+                                 publish=lambda source_id, payload: published.append((source_id, payload)),
+                                 target_fps=50)
+    run_pipeline(pipeline, published, 10)
+
+    assert any(len(batch) == 2 for batch in batches)
+    assert set(published) == {(0, 'front'), ('rtsp://back', 'back')}
+    assert set(pipeline.stats()['sources']) == {'0', 'rtsp://back'}
+
+
+def test_camera_ids_are_parsed_and_deduplicated():
+    assert camera_ids_from({}) == [0]
+    assert camera_ids_from({'camera_id': '1'}) == [1]
+    assert camera_ids_from({'camera_ids': ['0', 0, 'rtsp://cam']}) == [0, 'rtsp://cam']
+    with pytest.raises(ValueError):
+        camera_ids_from({'camera_ids': []})
+    with pytest.raises(ValueError):
+        camera_ids_from({'camera_ids': list(range(17))})
+
+
+def test_broadcaster_wakes_waiters_only_for_newer_frames():
+    broadcaster = FrameBroadcaster()
+    broadcaster.publish(0, b'first', [])
+    entry = broadcaster.latest(0)
+    assert broadcaster.wait(0, after=entry['sequence'], timeout=0.01) is None
+
+    broadcaster.publish(1, b'other camera', [])
+    broadcaster.publish(0, b'second', [{'class_id': 0}])
+    entry = broadcaster.wait(0, after=entry['sequence'], timeout=0.01)
+    assert (entry['jpeg'], entry['detections']) == (b'second', [{'class_id': 0}])
+
+
+def test_mjpeg_parts_carry_each_new_jpeg():
+    broadcaster = FrameBroadcaster()
+    broadcaster.publish(0, b'jpeg-1', [])
+    parts = mjpeg_frames(broadcaster, 0, lambda: True)
+
+    part = next(parts)
+    assert part.startswith(f'--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: 6\r\n\r\n'.encode('ascii'))
+    assert part.endswith(b'jpeg-1\r\n')
+
+    broadcaster.publish(0, b'jpeg-22', [])
+    assert next(parts).endswith(b'jpeg-22\r\n')
+
+
+def box(x, class_id=0, confidence=0.9):
+    return {'bbox': [x, 10, x + 50, 60], 'confidence': confidence, 'class_id': class_id}
+
+
+def test_delta_sends_only_what_changed_between_keyframes():
+    delta = DetectionDelta(keyframe_interval=4)
+    first = delta.encode([box(0), box(200, class_id=1)])
+    assert first['keyframe'] and len(first['detections']) == 2
+    ids = {d['class_id']: d['id'] for d in first['detections']}
+
+    # a jitter inside the tolerance is not resent; a real move is an update with the same id
+    message = delta.encode([box(1), box(210, class_id=1)])
+    assert (message['keyframe'], message['added'], message['removed']) == (False, [], [])
+    assert [(d['id'], d['bbox'][0]) for d in message['updated']] == [(ids[1], 210)]
+
+    message = delta.encode([box(1), box(400, class_id=2)])
+    assert message['removed'] == [ids[1]]
+    assert [d['class_id'] for d in message['added']] == [2]
+
+    assert delta.encode([box(1), box(400, class_id=2)])['keyframe']
+
+
+def test_delta_uses_track_ids_when_every_detection_has_one():
+    delta = DetectionDelta()
+    delta.encode([dict(box(0), track_id=7)])
+    delta.request_keyframe()
+    message = delta.encode([dict(box(300), track_id=7)])
+    assert message['keyframe']
+    assert [d['id'] for d in message['detections']] == [7]
+
+
+class Tensor:
+    # the slice of the torch tensor interface that extract_detections relies on
+    def __init__(self, values):
+        self.values = np.asarray(values)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class Boxes(SimpleNamespace):
+    def __len__(self):
+        return len(self.conf.values if isinstance(self.conf, Tensor) else self.conf)
+
+
+def test_detections_are_extracted_from_whole_tensors():
+    boxes = Boxes(xyxy=Tensor([[0, 0, 10, 10], [5, 5, 20, 20], [1, 1, 2, 2]]), conf=Tensor([0.9, 0.4, 0.7]),
+                  cls=Tensor([1.0, 0.0, 1.0]))
+    detections = extract_detections(SimpleNamespace(boxes=boxes))
+
+    assert detections['bbox'].tolist() == [[0, 0, 10, 10], [5, 5, 20, 20], [1, 1, 2, 2]]
+    assert detections['class_id'].tolist() == [1, 0, 1]
+    assert class_counts(detections, {0: 'PET', 1: 'PP'}) == {'PET': 1, 'PP': 2}
+
+    dicts = detection_dicts(detections[:1], {0: 'PET', 1: 'PP'}, camera_id=3)
+    assert dicts == [{'camera_id': 3, 'bbox': [0.0, 0.0, 10.0, 10.0], 'confidence': pytest.approx(0.9),
+                      'class_id': 1, 'class_name': 'PP'}]
+
+    # exported-model backends hand over plain arrays
+    plain = Boxes(xyxy=np.zeros((1, 4)), conf=np.ones(1), cls=np.zeros(1))
+    assert len(extract_detections(SimpleNamespace(boxes=plain))) == 1
+    assert len(extract_detections(SimpleNamespace(boxes=None))) == 0
+
+
+class SlidingBoxModel:
+    # one object moving 5 px per frame; the frame's pixel value is its index
+    names = {0: 'PET'}
+
+    def __init__(self):
+        self.thresholds = []
+
+    def predict(self, frames, conf, verbose):
+        self.thresholds.append(conf)
+        results = []
+        for frame in frames:
+            x = 5.0 * frame[0, 0, 0]
+            results.append(SimpleNamespace(boxes=Boxes(xyxy=np.array([[x, 10, x + 40, 50]]), conf=np.array([0.9]),
+                                                       cls=np.array([0.0]))))
+        return results
+
+
+class Canvas:
+    # stands in for OpenCV and records the boxes drawn on each frame
+    FONT_HERSHEY_SIMPLEX = LINE_AA = IMWRITE_JPEG_QUALITY = 0
+
+    def __init__(self):
+        self.boxes = []
+
+    def rectangle(self, frame, top_left, bottom_right, color, thickness):
+        self.boxes.append(top_left + bottom_right)
+
+    def putText(self, *args):
+        pass
+
+    def imencode(self, extension, frame, params):
+        return True, np.frombuffer(b'jpeg', dtype=np.uint8)
+
+
+def test_tracked_frames_between_detector_runs_are_annotated(monkeypatch):
+    canvas = Canvas()
+    monkeypatch.setattr(detection_pipeline, 'cv2', canvas)
+    model = SlidingBoxModel()
+    counted = []
+    detector = FrameDetector(model, 0.3, lambda detections, camera_id: counted.extend(detections['class_id'].tolist()))
+    detector.reset(annotate=True, motion_gate=False, trackers={0: ObjectTracker(detect_interval=3, high_threshold=0.3)},
+                   low_threshold=0.1)
+
+    drawn = []
+    for index in range(12):
+        [item] = detector.detect([(0, np.full((48, 64, 3), index, dtype=np.uint8))])
+        canvas.boxes = []
+        jpeg, detections, info = detector.encode(item, camera_id=0)
+        assert jpeg == b'jpeg' and info['annotated']
+        drawn.append(len(canvas.boxes))
+
+    assert set(model.thresholds) == {0.1}
+    assert len(model.thresholds) < 12
+    # once the track is confirmed, frames the tracker predicted carry the box as well
+    assert drawn[-8:] == [1] * 8
+    assert counted == [0]
+
+
+def test_rate_controller_paces_on_inference_not_capture():
+    rate = RateController(target_fps=10)
+    rate.record('capture', 0.5)
+    assert rate.interval == 0.1
+
+    rate.record('inference', 0.25)
+    assert rate.interval == 0.25
+    rate.record('inference', 0.05)
+    assert rate.interval == pytest.approx(0.21)
+    assert rate.stats()['latency_ms']['capture'] == 500
+
+
+def test_rate_controller_survives_concurrent_stages():
+    rate = RateController()
+    stop = threading.Event()
+
+    def record(stage):
+        for i in itertools.count():
+            if stop.is_set():
+                return
+            rate.record(f'{stage}-{i % 50}', 0.01)
+
+    writers = [threading.Thread(target=record, args=(stage,)) for stage in ('capture', 'inference', 'encode')]
+    for writer in writers:
+        writer.start()
+    try:
+        for _ in range(2000):
+            rate.stats()
+            rate.interval
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+
+
+def test_motion_gate_skips_static_frames_until_the_refresh():
+    gate = MotionGate(pixel_threshold=25, area_threshold=0.01, max_skip_seconds=2)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    assert gate.changed(0, frame, now=0)
+    assert not gate.changed(0, frame, now=1)
+    # each camera keeps its own reference
+    assert gate.changed(1, frame, now=1)
+
+    moved = frame.copy()
+    moved[:10, :10] = 255
+    assert gate.changed(0, moved, now=1.5)
+    assert gate.changed(0, moved, now=4)
+    assert gate.stats()['skipped_frames'] == 1
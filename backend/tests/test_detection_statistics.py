@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from detection_statistics import HISTOGRAM_EDGES, DetectionStatistics, RollingCounter
+from object_tracker import TRACK_DTYPE
+
+NAMES = {0: 'PET', 1: 'PP'}
+
+
+def detections(count, class_id=0, confidence=0.5):
+    boxes = np.zeros(count, dtype=TRACK_DTYPE)
+    boxes['class_id'] = class_id
+    boxes['confidence'] = confidence
+    return boxes
+
+
+def test_rolling_counter_drops_buckets_that_leave_the_window():
+    counter = RollingCounter(60, 1)
+    counter.add(10, {'PET': 3}, 1.5)
+    counter.add(30, {'PP': 2}, 2.0)
+
+    summary = counter.summary(40, started=0)
+    assert summary['total_detections'] == 5
+    assert summary['plastic_types'] == {'PET': 3, 'PP': 2}
+    assert summary['detections_per_minute'] == pytest.approx(5 / 40 * 60)
+
+    summary = counter.summary(80, started=0)
+    assert summary['total_detections'] == 2
+    assert summary['plastic_types'] == {'PP': 2}
+    assert summary['detection_confidence_avg'] == pytest.approx(1.0)
+    assert counter.summary(200, started=0)['total_detections'] == 0
+
+
+def test_rolling_counter_clears_a_reused_slot():
+    counter = RollingCounter(60, 1)
+    counter.add(10, {'PET': 3}, 1.5)
+    # 70 lands in the slot 10 used one lap earlier
+    counter.add(70, {'PET': 1}, 0.5)
+    summary = counter.summary(70, started=0)
+    assert summary['total_detections'] == 1
+    assert summary['detection_confidence_avg'] == pytest.approx(0.5)
+
+
+def test_snapshot_totals_histograms_and_windows():
+    statistics = DetectionStatistics('start')
+    statistics.record(detections(3, 0, 0.5), NAMES, now=statistics.started)
+    statistics.record(detections(2, 1, 1.0), NAMES, now=statistics.started)
+
+    snapshot = statistics.snapshot(now=statistics.started + 30)
+    assert snapshot['total_detections'] == 5
+    assert snapshot['plastic_types'] == {'PET': 3, 'PP': 2}
+    assert snapshot['detection_confidence_avg'] == pytest.approx(3.5 / 5)
+    assert snapshot['session_start_time'] == 'start'
+    assert snapshot['confidence_histograms']['classes']['PET'] == np.histogram([0.5] * 3, bins=HISTOGRAM_EDGES)[0].tolist()
+    # a confidence of exactly 1 falls into the last bin, as with np.histogram
+    assert snapshot['confidence_histograms']['classes']['PP'][-1] == 2
+    assert snapshot['windows']['last_minute']['total_detections'] == 5
+
+    statistics.reset('again')
+    snapshot = statistics.snapshot()
+    assert snapshot['total_detections'] == 0
+    assert snapshot['session_start_time'] == 'again'
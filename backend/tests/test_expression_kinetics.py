@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from scipy.optimize import curve_fit
+
+from expression_kinetics import MODEL_FUNCS, batched_least_squares, initial_guess
+
+
+@pytest.mark.parametrize('model', ['gompertz', 'logistic'])
+def test_batched_least_squares_matches_curve_fit(model):
+    rng = np.random.default_rng(0)
+    t = np.array([0, 1, 2, 3, 5, 7, 10, 14, 18, 21], dtype=float)
+    truth = np.column_stack([rng.uniform(2, 4, 6), rng.uniform(0.3, 0.8, 6), rng.uniform(0.5, 2.5, 6)])
+    Y = np.array([MODEL_FUNCS[model](t, *p) for p in truth]) + rng.normal(0, 0.02, (6, len(t)))
+    Y[2, 4] = np.nan
+
+    params, cost, converged = batched_least_squares(model, t, Y, initial_guess(t, Y))
+    assert converged.all()
+
+    for row in range(len(Y)):
+        mask = ~np.isnan(Y[row])
+        expected, _ = curve_fit(MODEL_FUNCS[model], t[mask], Y[row, mask], p0=truth[row], maxfev=10000)
+        residual = MODEL_FUNCS[model](t[mask], *expected) - Y[row, mask]
+        assert cost[row] <= residual @ residual * (1 + 1e-6) + 1e-12
+        assert params[row] == pytest.approx(expected, rel=1e-3)
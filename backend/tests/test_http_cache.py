@@ -0,0 +1,44 @@
+from flask import Flask
+
+from http_cache import conditional_response, send_cached_file
+
+
+def test_conditional_response_skips_produce_on_a_match():
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/value')
+    def value():
+        return conditional_response('v1', lambda: calls.append(1) or 'body', 'private, no-cache')
+
+    client = app.test_client()
+    response = client.get('/value')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"v1"'
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    response = client.get('/value', headers={'If-None-Match': '"v1"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert calls == [1]
+
+
+def test_cached_file_revalidates_until_the_file_changes(tmp_path):
+    path = tmp_path / 'image.png'
+    path.write_bytes(b'first')
+    app = Flask(__name__)
+
+    @app.route('/image')
+    def image():
+        return send_cached_file(str(path), mimetype='image/png', max_age=60)
+
+    client = app.test_client()
+    etag = client.get('/image').headers['ETag']
+    response = client.get('/image', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+
+    path.write_bytes(b'second file')
+    response = client.get('/image', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.data == b'second file'
@@ -0,0 +1,43 @@
+import numpy as np
+
+from detection_pipeline import DETECTION_DTYPE
+from object_tracker import ObjectTracker
+
+
+def frame_detections(*boxes):
+    detections = np.zeros(len(boxes), dtype=DETECTION_DTYPE)
+    for i, (x, y, class_id) in enumerate(boxes):
+        detections[i]['bbox'] = (x, y, x + 40, y + 40)
+        detections[i]['confidence'] = 0.9
+        detections[i]['class_id'] = class_id
+    return detections
+
+
+def test_each_object_is_counted_once():
+    tracker = ObjectTracker(detect_interval=1)
+    counted = []
+    track_ids = set()
+    for frame in range(60):
+        boxes = [(10 + 3 * frame, 50, 0)]
+        if frame >= 20:
+            boxes.append((400 - 2 * frame, 200, 1))
+        # the first object is occluded for a few frames and must keep its track
+        if 30 <= frame < 34:
+            boxes = boxes[1:]
+        tracked, confirmed = tracker.update(frame_detections(*boxes))
+        counted.extend(confirmed['class_id'].tolist())
+        track_ids.update(tracked['track_id'].tolist())
+
+    assert sorted(counted) == [0, 1]
+    assert len(track_ids) == 2
+
+
+def test_predict_carries_tracks_between_detector_runs():
+    tracker = ObjectTracker(detect_interval=3)
+    for frame in range(3):
+        tracker.update(frame_detections((10 + 5 * frame, 50, 0)))
+    assert not tracker.detection_due()
+
+    predicted = tracker.predict()
+    assert len(predicted) == 1
+    assert predicted['bbox'][0, 0] > 20
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from pollution_control_api import app
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_forecast_defaults_to_the_experimental_data(client):
+    response = client.post('/api/pollution-control/protein-forecast', json={})
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['success']
+    assert report['cultures']
+
+
+def test_forecast_fits_posted_replicates(client):
+    time = [0, 1, 2, 4, 6, 8, 12]
+    curve = 3 / (1 + np.exp(-0.8 * (np.array(time) - 4)))
+    response = client.post('/api/pollution-control/protein-forecast', json={
+        'time': time,
+        'protein_conc': [curve.tolist(), (curve * 1.1).tolist()],
+        'names': ['left', 'right'],
+        'forecast_times': [12, 16]
+    })
+    assert response.status_code == 200
+    report = response.get_json()
+    assert [culture['name'] for culture in report['cultures']] == ['left', 'right']
+    assert report['cultures'][0]['model'] is not None
+    assert len(report['cultures'][0]['forecast']['mean']) == 2
+
+
+@pytest.mark.parametrize('payload', [
+    {'time': [0, 1, 2], 'protein_conc': [0.1, 0.2, 0.3]},
+    {'time': [0, 1, 2, 3], 'protein_conc': [0.1, 0.2]},
+    {'time': [0, 1, 2, 3], 'protein_conc': [0.1, 0.2, 0.3, 0.4], 'names': 'one'},
+    {'time': [0, 1, 2, 3], 'protein_conc': [0.1, 0.2, 0.3, 0.4], 'names': ['a', 'b']},
+    {'time': [0, 1, 2, 3], 'protein_conc': [0.1, 0.2, 0.3, 0.4], 'forecast_times': [[1, 2], [3, 4]]},
+    {'time': ['a', 'b'], 'protein_conc': [0.1, 0.2]},
+    {'level': 2}
+])
+def test_forecast_rejects_malformed_input(client, payload):
+    response = client.post('/api/pollution-control/protein-forecast', json=payload)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
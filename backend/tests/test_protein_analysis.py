@@ -0,0 +1,318 @@
+import json
+import zipfile
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import protein_analysis_api
+from protein_analysis_api import AnalysisCache, ProteinAnalyzer, analysis_cache, app, lttb, read_csv_frame, registry
+
+
+def plate_csv(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.random((rows, 4)).round(3)
+    values[rng.random(values.shape) < 0.15] = np.nan
+    # rows where a whole group is missing must drop out of both paths alike
+    values[3, :2] = np.nan
+    values[rows - 4, 2:] = np.nan
+    times = pd.date_range('2025-08-10 22:00', periods=rows, freq='h').strftime('%Y/%m/%d %H:%M')
+    frame = pd.DataFrame(values, columns=['A-a-1', 'A-a-2', 'B-a-1', 'B-a-2'])
+    frame.insert(0, 'OD600', times)
+    return frame.to_csv(index=False)
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def upload(client, content, filename='plate.csv'):
+    response = client.post('/api/protein-upload', data={'file': (BytesIO(content.encode('utf-8')), filename)},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['dataset_id']
+
+
+def test_append_correlation_matches_recompute_with_gaps():
+    lines = plate_csv(60).splitlines(keepends=True)
+    head, tail = ''.join(lines[:41]), ''.join(lines[:1] + lines[41:])
+
+    appended = ProteinAnalyzer()
+    assert appended.load_data(head)[0]
+    appended.run_analyses()
+    success, message, _ = appended.append_stream(BytesIO(tail.encode('utf-8')))
+    assert success, message
+
+    fresh = ProteinAnalyzer()
+    assert fresh.load_data(''.join(lines))[0]
+    fresh.run_analyses()
+
+    assert appended.correlation_results['sample_size'] == fresh.correlation_results['sample_size']
+    for key in ('pearson_r', 'p_value', 'r_squared'):
+        assert appended.correlation_results[key] == pytest.approx(fresh.correlation_results[key], rel=1e-9)
+
+
+def test_endpoints_resolve_datasets_by_id(client):
+    dataset_id = upload(client, plate_csv(20))
+    growth = client.get(f'/api/protein-data?dataset_id={dataset_id}').get_json()
+    assert len(growth) == 20
+    assert client.get('/api/protein-data').get_json()[0]['time'] == '0.0h'
+
+    # built-in samples are addressable by id, unknown ids are not
+    assert client.get('/api/protein-data?dataset_id=sample-groups').status_code == 200
+    assert client.get('/api/protein-fitting?dataset_id=missing').status_code == 404
+
+    # an evicted dataset is mapped back in from the dataset store
+    assert registry.remove(dataset_id)
+    assert client.get(f'/api/protein-data?dataset_id={dataset_id}').get_json() == growth
+    assert registry.get(dataset_id) is not None
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 1000])
+def test_chunked_read_matches_whole_read(chunk_rows):
+    lines = plate_csv(40, seed=1).splitlines(keepends=True)
+    # stray tokens read as missing wherever they fall, inside the first chunk or after it
+    lines[2] = lines[2].rsplit(',', 1)[0] + ',n.d.\n'
+    lines[30] = lines[30].rsplit(',', 1)[0] + ',OVRFLW\n'
+    content = ''.join(lines)
+
+    whole = read_csv_frame(StringIO(content), chunk_rows=len(lines))
+    chunked = read_csv_frame(BytesIO(content.encode('utf-8')), chunk_rows=chunk_rows)
+
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert pd.api.types.is_datetime64_any_dtype(chunked['OD600'])
+    assert np.isnan(chunked['B-a-2'].iloc[1])
+    assert np.isnan(chunked['B-a-2'].iloc[29])
+
+
+def test_read_csv_frame_stops_at_max_bytes():
+    content = plate_csv(40)
+    with pytest.raises(ValueError):
+        read_csv_frame(StringIO(content), chunk_rows=5, max_bytes=len(content) // 2)
+
+
+def test_read_csv_frame_reports_progress():
+    content = plate_csv(40)
+    reports = []
+    read_csv_frame(StringIO(content), chunk_rows=15, progress=lambda rows, bytes_read: reports.append(rows))
+    assert reports == [15, 30, 40]
+
+
+def test_upload_progress_is_tracked_by_upload_id(client):
+    response = client.post('/api/protein-upload?upload_id=plate-1',
+                           data={'file': (BytesIO(plate_csv(20).encode('utf-8')), 'plate.csv')},
+                           content_type='multipart/form-data')
+    progress = client.get('/api/protein-upload/progress/plate-1').get_json()
+    assert progress['status'] == 'done'
+    assert progress['rows'] == 20
+    assert progress['dataset_id'] == response.get_json()['dataset_id']
+    assert client.get('/api/protein-upload/progress/unknown').status_code == 404
+
+
+def test_analysis_cache_is_bounded_by_bytes_and_hands_out_copies():
+    cache = AnalysisCache(max_entries=10, max_bytes=3000)
+    cache.store(('a', 'chart', ()), b'x' * 1000)
+    cache.store(('b', 'chart', ()), b'x' * 1000)
+    cache.store(('c', 'chart', ()), b'x' * 1500)
+    assert cache.lookup(('a', 'chart', ()))[0] is False
+    assert cache.stats()['bytes'] <= 3000
+
+    cache.store(('d', 'growth_patterns', ()), [{'time': '0h'}])
+    found, result = cache.lookup(('d', 'growth_patterns', ()))
+    result[0]['time'] = 'changed'
+    assert cache.lookup(('d', 'growth_patterns', ()))[1] == [{'time': '0h'}]
+
+    # too big to be worth caching at all
+    cache.store(('e', 'chart', ()), b'x' * 4000)
+    assert cache.lookup(('e', 'chart', ()))[0] is False
+
+
+def test_memoized_calls_share_entries_across_spellings():
+    analyzer = ProteinAnalyzer()
+    assert analyzer.load_data(plate_csv(20, seed=2))[0]
+    first = analyzer.correlation_matrix('spearman')
+    hits = analysis_cache.stats()['hits'].get('correlation_matrix', 0)
+    assert analyzer.correlation_matrix(method='spearman', correction='fdr_bh') == first
+    assert analysis_cache.stats()['hits']['correlation_matrix'] == hits + 1
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    y[500] = 10
+
+    sampled_x, sampled_y = lttb(x, y, 100)
+    assert len(sampled_x) == 100
+    assert (sampled_x[0], sampled_x[-1]) == (0, 999)
+    assert np.all(np.diff(sampled_x) > 0)
+    assert 500 in sampled_x
+    assert np.array_equal(sampled_y, y[sampled_x.astype(int)])
+
+    short_x, short_y = x[:50], y[:50]
+    assert lttb(short_x, short_y, 100) == (short_x, short_y)
+
+
+def test_chart_data_is_downsampled_to_max_points(client):
+    dataset_id = upload(client, plate_csv(2000, seed=3))
+    response = client.get(f'/api/protein-chart-data?dataset_id={dataset_id}&max_points=200')
+    assert response.status_code == 200
+    chart = response.get_json()
+
+    assert chart['layout'] == 'groups'
+    group = chart['groupA']
+    assert len(group['x']) == 200
+    assert group['total_points'] > 200
+    assert group['x'] == sorted(group['x'])
+
+    intensity = client.get('/api/protein-chart-data').get_json()
+    assert intensity['layout'] == 'intensity'
+    assert intensity['intensity']['total_points'] == len(intensity['intensity']['x']) == 10
+
+
+def test_chart_endpoints_revalidate_with_etags(client):
+    dataset_id = upload(client, plate_csv(20, seed=4))
+    url = f'/api/protein-analysis-chart?dataset_id={dataset_id}&dpi=50'
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    etag = response.headers['ETag']
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # appending rows moves the dataset to a new content hash, so the old copy is stale
+    lines = plate_csv(25, seed=4).splitlines(keepends=True)
+    tail = ''.join(lines[:1] + lines[21:])
+    assert client.post(f'/api/protein-datasets/{dataset_id}/append', data=tail.encode('utf-8')).status_code == 200
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+def test_correlation_matrix_matches_pandas(client, method):
+    content = plate_csv(30, seed=5)
+    dataset_id = upload(client, content)
+    response = client.get(f'/api/protein-correlation-matrix?dataset_id={dataset_id}&method={method}&cluster=false')
+    assert response.status_code == 200
+    matrix = response.get_json()
+
+    frame = pd.read_csv(StringIO(content)).iloc[:, 1:]
+    if method == 'spearman':
+        frame = frame.rank()
+    expected = frame.corr(method='pearson').round(6)
+    assert matrix['wells'] == list(frame.columns)
+    assert np.allclose(np.array(matrix['r'], dtype=float), expected.to_numpy(), atol=1e-6)
+    assert np.all(np.array(matrix['p_adjusted']) >= np.array(matrix['p_value']) - 1e-12)
+
+    clustered = client.get(f'/api/protein-correlation-matrix?dataset_id={dataset_id}&method={method}').get_json()
+    assert sorted(clustered['wells']) == sorted(matrix['wells'])
+
+
+def test_correlation_matrix_rejects_unknown_methods(client):
+    assert client.get('/api/protein-correlation-matrix?method=kendall').status_code == 400
+    assert client.get('/api/protein-correlation-matrix?correction=none-such').status_code == 400
+
+
+def plate_zip(files):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_batch_upload_analyzes_every_csv_in_a_zip(client):
+    files = {f'plates/plate-{i}.csv': plate_csv(15, seed=10 + i) for i in range(3)}
+    files['plates/broken.csv'] = ''
+    files['notes.txt'] = 'skipped'
+    response = client.post('/api/protein-upload-batch', data={'files': (plate_zip(files), 'plates.zip')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    result = response.get_json()
+
+    assert result['total_files'] == 4
+    assert result['failed_files'] == 1
+    rows = {row['filename']: row for row in result['summary']}
+    assert 'error' in rows['plates/broken.csv']
+    single = ProteinAnalyzer()
+    single.load_data(files['plates/plate-0.csv'])
+    single.run_analyses()
+    assert rows['plates/plate-0.csv']['rows'] == 15
+    assert rows['plates/plate-0.csv']['pearson_r'] == pytest.approx(single.correlation_results['pearson_r'])
+    assert client.get(f"/api/protein-data?dataset_id={rows['plates/plate-1.csv']['dataset_id']}").status_code == 200
+
+
+def test_batch_upload_streams_one_line_per_file(client):
+    data = {'files': [(BytesIO(plate_csv(12, seed=20 + i).encode('utf-8')), f'plate-{i}.csv') for i in range(2)]}
+    response = client.post('/api/protein-upload-batch?stream=true', data=data, content_type='multipart/form-data')
+    assert response.mimetype == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(row['filename'] for row in rows) == ['plate-0.csv', 'plate-1.csv']
+    assert all(row['rows'] == 12 for row in rows)
+
+
+def test_batch_upload_rejects_oversized_archives(client, monkeypatch):
+    monkeypatch.setattr(protein_analysis_api, 'MAX_UPLOAD_BYTES', 10000)
+    monkeypatch.setattr(protein_analysis_api, 'MAX_BATCH_BYTES', 15000)
+
+    # compresses to a few hundred bytes but expands past the per-file cap
+    bomb = plate_zip({'big.csv': 'OD600,A-a-1\n' + '2025/8/10 22:00,0.1\n' * 1000})
+    response = client.post('/api/protein-upload-batch', data={'files': (bomb, 'bomb.zip')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 413
+
+    files = {f'plate-{i}.csv': 'OD600,A-a-1\n' + '2025/8/10 22:00,0.1\n' * 400 for i in range(3)}
+    response = client.post('/api/protein-upload-batch', data={'files': (plate_zip(files), 'plates.zip')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 413
+
+    response = client.post('/api/protein-upload-batch', data=b'x' * 20000, content_type='multipart/form-data; boundary=x')
+    assert response.status_code == 413
+
+
+def test_append_endpoint_extends_a_dataset(client):
+    lines = plate_csv(30, seed=6).splitlines(keepends=True)
+    dataset_id = upload(client, ''.join(lines[:21]))
+
+    # a reader feed posts the raw CSV body
+    response = client.post(f'/api/protein-datasets/{dataset_id}/append', data=''.join(lines[:1] + lines[21:26]).encode('utf-8'))
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result['appended_rows'], result['total_rows'], len(result['new_records'])) == (5, 25, 5)
+
+    response = client.post(f'/api/protein-datasets/{dataset_id}/append', content_type='multipart/form-data',
+                           data={'file': (BytesIO(''.join(lines[:1] + lines[26:]).encode('utf-8')), 'more.csv')})
+    result = response.get_json()
+    assert result['total_rows'] == 30
+
+    frame = pd.read_csv(StringIO(''.join(lines))).iloc[:, 1:]
+    assert result['statistics']['A-a-1']['mean'] == pytest.approx(frame['A-a-1'].mean())
+    assert result['statistics']['B-a-2']['count'] == frame['B-a-2'].count()
+    assert len(client.get(f'/api/protein-data?dataset_id={dataset_id}').get_json()) == 30
+
+
+def test_append_endpoint_rejects_bad_targets(client):
+    dataset_id = upload(client, plate_csv(10))
+    assert client.post(f'/api/protein-datasets/{dataset_id}/append', data=b'OD600,other\n2025/8/10 22:00,1\n').status_code == 400
+    assert client.post('/api/protein-datasets/sample-groups/append', data=b'').status_code == 400
+    assert client.post('/api/protein-datasets/missing/append', data=b'').status_code == 404
+
+
+def test_analyzer_without_data_has_no_running_statistics():
+    assert ProteinAnalyzer().running_statistics() is None
+
+
+def test_kinetics_endpoint_fits_and_validates(client):
+    report = client.get('/api/protein-kinetics?points=5').get_json()
+    assert report['time_unit'] == 'hours'
+    assert len(report['forecast_times']) == 5
+    assert report['cultures'][0]['name'] == 'Mean intensity (a.u.)'
+
+    assert client.get('/api/protein-kinetics?horizon=-1').status_code == 400
+    assert client.get('/api/protein-kinetics?level=1.5').status_code == 400
@@ -72,9 +72,13 @@ function ProteinPage() {
     }
   }, [messages, chatOpen]);
 
-  const loadExperimentData = async () => {
+  const withDataset = (url, datasetId) => (
+    datasetId ? `${url}?dataset_id=${encodeURIComponent(datasetId)}` : url
+  );
+
+  const loadExperimentData = async (datasetId) => {
     try {
-      const response = await fetch('http://localhost:5700/api/protein-data');
+      const response = await fetch(withDataset('http://localhost:5700/api/protein-data', datasetId));
       if (response.ok) {
         const data = await response.json();
         setExperimentData(data);
@@ -84,9 +88,9 @@ function ProteinPage() {
     }
   };
 
-  const loadAnalysisChart = async () => {
+  const loadAnalysisChart = async (datasetId) => {
     try {
-      const response = await fetch('http://localhost:5700/api/protein-analysis-chart');
+      const response = await fetch(withDataset('http://localhost:5700/api/protein-analysis-chart', datasetId));
       if (response.ok) {
         const blob = await response.blob();
         setChartImage(URL.createObjectURL(blob));
@@ -96,9 +100,9 @@ function ProteinPage() {
     }
   };
 
-  const loadCorrelationAnalysis = async () => {
+  const loadCorrelationAnalysis = async (datasetId) => {
     try {
-      const response = await fetch('http://localhost:5700/api/protein-correlation');
+      const response = await fetch(withDataset('http://localhost:5700/api/protein-correlation', datasetId));
       if (response.ok) {
         const data = await response.json();
         setCorrelationData(data);
@@ -108,9 +112,9 @@ function ProteinPage() {
     }
   };
 
-  const loadFittingResults = async () => {
+  const loadFittingResults = async (datasetId) => {
     try {
-      const response = await fetch('http://localhost:5700/api/protein-fitting');
+      const response = await fetch(withDataset('http://localhost:5700/api/protein-fitting', datasetId));
       if (response.ok) {
         const data = await response.json();
         setFittingResults(data);
@@ -128,26 +132,43 @@ function ProteinPage() {
     const formData = new FormData();
     formData.append('file', file);
     
+    // the server reports rows parsed so far under this id while the request is running
+    const uploadId = Date.now().toString(36) + Math.random().toString(36).slice(2);
+    const progressTimer = setInterval(async () => {
+      try {
+        const progress = await fetch(`http://localhost:5700/api/protein-upload/progress/${uploadId}`);
+        if (progress.ok) {
+          const entry = await progress.json();
+          const percent = entry.total_bytes ? ` (${Math.min(100, Math.round(entry.bytes_read / entry.total_bytes * 100))}%)` : '';
+          setUploadResult(`Parsing... ${entry.rows} rows${percent}`);
+        }
+      } catch (error) {
+        console.warn('Failed to load upload progress:', error);
+      }
+    }, 500);
+    
     try {
-      const response = await fetch('http://localhost:5700/api/protein-upload', {
+      const response = await fetch(`http://localhost:5700/api/protein-upload?upload_id=${uploadId}`, {
         method: 'POST',
         body: formData,
       });
+      clearInterval(progressTimer);
       
       if (response.ok) {
         const result = await response.json();
         setUploadResult('File uploaded successfully! Analyzing data...');
         setAnalysisData(result);
-        loadAnalysisChart();
-        loadCorrelationAnalysis();
-        loadFittingResults();
-        loadExperimentData();
+        loadAnalysisChart(result.dataset_id);
+        loadCorrelationAnalysis(result.dataset_id);
+        loadFittingResults(result.dataset_id);
+        loadExperimentData(result.dataset_id);
       } else {
         setUploadResult('Upload failed, please check file format');
       }
     } catch (error) {
       setUploadResult('Upload failed: ' + error.message);
     }
+    clearInterval(progressTimer);
     setUploading(false);
   };
 
@@ -0,0 +1,58 @@
+import React from 'react';
+
+const confidenceColor = (confidence) => (
+  confidence > 0.8 ? '#10B981' : confidence > 0.5 ? '#F59E0B' : '#EF4444'
+);
+
+// draws detection boxes over an object-fit: contain image; the viewBox is the frame's pixel grid
+const DetectionOverlay = ({ detections, frameSize }) => {
+  if (!frameSize || !detections || detections.length === 0) return null;
+
+  const [width, height] = frameSize;
+  const stroke = Math.max(2, width / 320);
+  const fontSize = Math.max(12, width / 50);
+
+  return (
+    <svg
+      viewBox={`0 0 ${width} ${height}`}
+      preserveAspectRatio="xMidYMid meet"
+      style={{
+        position: 'absolute',
+        top: 0,
+        left: 0,
+        width: '100%',
+        height: '100%',
+        pointerEvents: 'none'
+      }}
+    >
+      {detections.map((detection, index) => {
+        const [x1, y1, x2, y2] = detection.bbox;
+        const color = confidenceColor(detection.confidence);
+        return (
+          <g key={detection.id ?? index}>
+            <rect
+              x={x1}
+              y={y1}
+              width={x2 - x1}
+              height={y2 - y1}
+              fill="none"
+              stroke={color}
+              strokeWidth={stroke}
+            />
+            <text
+              x={x1 + stroke}
+              y={Math.max(fontSize, y1 - stroke)}
+              fill={color}
+              fontSize={fontSize}
+              fontWeight="600"
+            >
+              {`${detection.class_name} ${(detection.confidence * 100).toFixed(0)}%`}
+            </text>
+          </g>
+        );
+      })}
+    </svg>
+  );
+};
+
+export default DetectionOverlay;
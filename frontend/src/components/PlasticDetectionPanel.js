@@ -28,6 +28,7 @@ import {
   Settings as SettingsIcon
 } from '@mui/icons-material';
 import io from 'socket.io-client';
+import DetectionOverlay from './DetectionOverlay';
 
 const PlasticDetectionPanel = () => {
   const [isDetecting, setIsDetecting] = useState(false);
@@ -47,6 +48,8 @@ const PlasticDetectionPanel = () => {
 
   const socketRef = useRef(null);
   const detectionListRef = useRef(null);
+  const detectionsRef = useRef(new Map());
+  const frameUrlRef = useRef(null);
 
   useEffect(() => {
     const socket = io('http://localhost:5001', {
@@ -78,11 +81,24 @@ const PlasticDetectionPanel = () => {
       setError('无法连接到检测服务，请确保后端服务正在运行');
     });
 
-    socket.on('detection_update', (data) => {
+    socket.on('detection_frame', (data) => {
       try {
-        setDetectionData(data);
-        setCurrentFrame(data.frame);
-        setStatistics(data.statistics);
+        // detections arrive as a keyframe or as changes against the previous frame
+        const delta = data.detections;
+        const current = detectionsRef.current;
+        if (delta.keyframe) {
+          current.clear();
+          delta.detections.forEach((detection) => current.set(detection.id, detection));
+        } else {
+          delta.removed.forEach((id) => current.delete(id));
+          delta.added.concat(delta.updated).forEach((detection) => current.set(detection.id, detection));
+        }
+        setDetectionData({ ...data, detections: Array.from(current.values()) });
+        
+        const url = URL.createObjectURL(new Blob([data.frame], { type: 'image/jpeg' }));
+        if (frameUrlRef.current) URL.revokeObjectURL(frameUrlRef.current);
+        frameUrlRef.current = url;
+        setCurrentFrame(url);
         setFps(data.fps || 0);
         
         if (autoScroll && detectionListRef.current) {
@@ -93,6 +109,10 @@ const PlasticDetectionPanel = () => {
       }
     });
 
+    socket.on('statistics_update', (data) => {
+      setStatistics(data.statistics);
+    });
+
     socket.on('connection_status', (data) => {
       console.log('连接状态:', data);
     });
@@ -452,20 +472,25 @@ const PlasticDetectionPanel = () => {
               minHeight: '300px'
             }}>
               {currentFrame ? (
-                <img
-                  src={`data:image/jpeg;base64,${currentFrame}`}
-                  alt="检测视频流"
-                  style={{
-                    maxWidth: '100%',
-                    maxHeight: '100%',
-                    objectFit: 'contain',
-                    borderRadius: '4px'
-                  }}
-                  onError={() => {
-                    console.error('视频帧加载失败');
-                    setError('视频帧显示错误');
-                  }}
-                />
+                <>
+                  <img
+                    src={currentFrame}
+                    alt="检测视频流"
+                    style={{
+                      width: '100%',
+                      height: '100%',
+                      objectFit: 'contain',
+                      borderRadius: '4px'
+                    }}
+                    onError={() => {
+                      console.error('视频帧加载失败');
+                      setError('视频帧显示错误');
+                    }}
+                  />
+                  {detectionData && !detectionData.annotated && (
+                    <DetectionOverlay detections={detectionData.detections} frameSize={detectionData.frame_size} />
+                  )}
+                </>
               ) : isDetecting ? (
                 <Box sx={{ textAlign: 'center', color: '#ffffff', p: 4 }}>
                   <CircularProgress sx={{ color: '#EC4899', mb: 2 }} size={60} />
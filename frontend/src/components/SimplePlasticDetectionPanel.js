@@ -22,11 +22,13 @@ import {
   BarChart as ChartIcon,
   Visibility as VisibilityIcon
 } from '@mui/icons-material';
+import DetectionOverlay from './DetectionOverlay';
 
 const SimplePlasticDetectionPanel = () => {
   const [isDetecting, setIsDetecting] = useState(false);
   const [currentFrame, setCurrentFrame] = useState(null);
   const [currentDetections, setCurrentDetections] = useState([]);
+  const [frameInfo, setFrameInfo] = useState({ frameSize: null, annotated: false });
   const [statistics, setStatistics] = useState({
     total_detections: 0,
     plastic_types: {},
@@ -49,13 +51,11 @@ const SimplePlasticDetectionPanel = () => {
     }
   };
 
-  const fetchFrame = async () => {
+  const fetchStatistics = async () => {
     try {
-      const response = await fetch('http://localhost:5001/api/detection/frame');
+      const response = await fetch('http://localhost:5001/api/detection/status');
       if (response.ok) {
         const result = await response.json();
-        setCurrentFrame(result.frame);
-        setCurrentDetections(result.detections || []);
         setStatistics(result.statistics || statistics);
         setError(null);
       }
@@ -123,6 +123,7 @@ const SimplePlasticDetectionPanel = () => {
       
       if (result.status === 'success') {
         setIsDetecting(true);
+        setCurrentFrame(`http://localhost:5001/api/detection/stream?camera_id=0&t=${Date.now()}`);
         console.log('activated');
       } else {
         setError(result.message || 'activation failed');
@@ -161,12 +162,21 @@ const SimplePlasticDetectionPanel = () => {
   }, []);
 
   useEffect(() => {
-    let frameInterval;
+    let statisticsInterval;
+    let detectionEvents;
     if (isDetecting) {
-      frameInterval = setInterval(fetchFrame, 200);
+      // frames arrive over the MJPEG stream; detections come as server-sent events
+      detectionEvents = new EventSource('http://localhost:5001/api/detection/events?camera_id=0');
+      detectionEvents.onmessage = (event) => {
+        const result = JSON.parse(event.data);
+        setCurrentDetections(result.detections || []);
+        setFrameInfo({ frameSize: result.frame_size, annotated: result.annotated });
+      };
+      statisticsInterval = setInterval(fetchStatistics, 1000);
     }
     return () => {
-      if (frameInterval) clearInterval(frameInterval);
+      if (detectionEvents) detectionEvents.close();
+      if (statisticsInterval) clearInterval(statisticsInterval);
     };
   }, [isDetecting]);
 
@@ -382,16 +392,21 @@ const SimplePlasticDetectionPanel = () => {
               maxHeight: '500px'  // 固定最大高度
             }}>
               {currentFrame ? (
-                <img
-                  src={`data:image/jpeg;base64,${currentFrame}`}
-                  alt="Real-time Detection Video Stream"
-                  style={{
-                    width: '100%',
-                    height: '100%',
-                    objectFit: 'contain',
-                    borderRadius: '4px'
-                  }}
-                />
+                <>
+                  <img
+                    src={currentFrame}
+                    alt="Real-time Detection Video Stream"
+                    style={{
+                      width: '100%',
+                      height: '100%',
+                      objectFit: 'contain',
+                      borderRadius: '4px'
+                    }}
+                  />
+                  {!frameInfo.annotated && (
+                    <DetectionOverlay detections={currentDetections} frameSize={frameInfo.frameSize} />
+                  )}
+                </>
               ) : isDetecting ? (
                 <Box sx={{ textAlign: 'center', color: '#ffffff', p: 4 }}>
                   <CircularProgress sx={{ color: '#EC4899', mb: 2 }} size={60} />